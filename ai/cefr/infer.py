@@ -2,10 +2,11 @@
 from __future__ import annotations
 from pathlib import Path
 import re
-import joblib
 
 BASE_DIR = Path(__file__).resolve().parent
 MODEL_PATH = BASE_DIR / "models" / "cefr_model.joblib"
+# train.py yonma-yon eksport qiladi; bor bo‘lsa sklearn/scipy umuman import qilinmaydi
+NUMPY_MODEL_PATH = MODEL_PATH.with_suffix(".npz")
 
 def clean_word(w: str) -> str:
     w = (w or "").strip().lower()
@@ -13,12 +14,20 @@ def clean_word(w: str) -> str:
     w = re.sub(r"[^a-z0-9'\- ]", "", w)
     return w.strip()
 
+def default_model_path() -> Path:
+    return NUMPY_MODEL_PATH if NUMPY_MODEL_PATH.exists() else MODEL_PATH
+
 def load_model(path: str | None = None):
-    p = Path(path) if path else MODEL_PATH
+    """.npz => NumpyCefrModel (faqat NumPy), aks holda joblib’dagi sklearn Pipeline."""
+    p = Path(path) if path else default_model_path()
+    if p.suffix == ".npz":
+        from ai.cefr.npmodel import NumpyCefrModel
+        return NumpyCefrModel.load(p)
+    import joblib
     return joblib.load(p)
 
 def predict_level(model, word: str) -> str:
     w = clean_word(word)
     if not w:
         return "-"
-    return model.predict([w])[0]
\ No newline at end of file
+    return model.predict([w])[0]
@@ -0,0 +1,119 @@
+# ai/cefr/levels.py
+"""
+CEFR darajalari oldindan hisoblanadi — sahifalar model.predict chaqirmaydi, faqat filtrlaydi.
+
+- Asosiy lug‘at: {norm_en: daraja} lug‘at versiyasi (Lexicon.signature) va model fayli
+  sha256 bo‘yicha bir marta hisoblanib, lexicon snapshot yonida data/<csv>.cefr.pickle ga yoziladi
+- User so‘zlari: core.word_repo_db.upsert_word paytida words.level ustuniga yoziladi
+
+    python -m ai.cefr.levels            # deploy’da oldindan qurib qo‘yish
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, List, Mapping
+
+from ai.cefr.infer import default_model_path
+from ai.cefr.service import UNKNOWN, get_service
+from core.lexicon import (
+    SNAPSHOT_DIR,
+    SNAPSHOT_VERSION,
+    Lexicon,
+    file_sha256,
+    get_lexicon,
+    read_snapshot,
+    write_snapshot,
+)
+
+LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+
+_COMPUTE_LOCK = threading.Lock()  # lug‘at bo‘yicha predict bir vaqtda faqat bitta thread’da
+_MODEL_SIG: tuple | None = None  # (path, mtime_ns, size, sha256)
+_LEVELS: dict[tuple, Mapping[str, str]] = {}
+
+
+# =========================
+# MODEL FAYLI
+# =========================
+def model_signature(path: Path | None = None) -> str:
+    """Model faylining sha256 (mtime+size o‘zgarmaguncha qayta hisoblanmaydi)."""
+    global _MODEL_SIG
+    path = path or default_model_path()
+    stt = path.stat()
+    sig = _MODEL_SIG
+    if sig is None or sig[:3] != (path, stt.st_mtime_ns, stt.st_size):
+        sig = _MODEL_SIG = (path, stt.st_mtime_ns, stt.st_size, file_sha256(path))
+    return sig[3]
+
+
+def predict_levels(words: Iterable[str], *, memo: bool = True) -> List[str]:
+    """So‘zlar ro‘yxati uchun darajalar (umumiy CefrService orqali)."""
+    return get_service().predict_many(words, memo=memo)
+
+
+# =========================
+# LEXICON LEVELS
+# =========================
+def snapshot_path(lex: Lexicon) -> Path:
+    return SNAPSHOT_DIR / f"{Path(lex.signature[0]).stem}.cefr.pickle"
+
+
+def _compute(lex: Lexicon, model_sig: str) -> Mapping[str, str]:
+    snap = snapshot_path(lex)
+    cached = read_snapshot(snap)
+    if cached is not None and cached.get("lexicon") == lex.signature and cached.get("model") == model_sig:
+        return MappingProxyType(cached["levels"])
+
+    keys = list(lex.entries)
+    levels = dict(zip(keys, predict_levels([lex.entries[k][0] for k in keys], memo=False)))
+    write_snapshot(snap, {"version": SNAPSHOT_VERSION, "lexicon": lex.signature, "model": model_sig, "levels": levels})
+    return MappingProxyType(levels)
+
+
+def lexicon_levels(lex: Lexicon | None = None) -> Mapping[str, str]:
+    """
+    {norm_en: daraja} — lug‘at yoki model o‘zgarmaguncha process’da ham, diskda ham bir marta.
+    Model topilmasa / yuklanmasa exception ko‘tariladi (sahifa xabar ko‘rsatadi).
+    """
+    lex = lex if lex is not None else get_lexicon()
+    if not lex.ok:
+        return MappingProxyType({})
+    key = (lex.signature, model_signature())
+    hit = _LEVELS.get(key)
+    if hit is not None:
+        return hit
+    with _COMPUTE_LOCK:
+        hit = _LEVELS.get(key)
+        if hit is None:
+            hit = _compute(lex, key[1])
+            _LEVELS.clear()  # faqat joriy versiya kerak
+            _LEVELS[key] = hit
+    return hit
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from collections import Counter
+
+    ap = argparse.ArgumentParser(description="Lug‘at uchun CEFR darajalarini oldindan hisoblash")
+    ap.add_argument("--csv", default=None)
+    ap.add_argument("--force", action="store_true", help="snapshot’ni o‘chirib qayta hisoblash")
+    args = ap.parse_args()
+
+    lex = get_lexicon(args.csv)
+    if args.force:
+        try:
+            os.unlink(snapshot_path(lex))
+        except OSError:
+            pass
+    t0 = time.perf_counter()
+    levels = lexicon_levels(lex)
+    counts = Counter(levels.values())
+    print(
+        f"{len(levels)} so‘z ({(time.perf_counter() - t0) * 1000:.0f} ms) -> {snapshot_path(lex)}: "
+        + ", ".join(f"{lv}={counts.get(lv, 0)}" for lv in LEVELS)
+    )
@@ -0,0 +1,221 @@
+# ai/cefr/npmodel.py
+"""
+CEFR modelining sklearn’siz (faqat NumPy) varianti.
+
+train.py TfidfVectorizer(char_wb) + LogisticRegression pipeline’ini .npz ga eksport qiladi:
+vocabulary (n-gram’lar, indeks tartibida), idf, coef, intercept, classes. Bu yerdagi predict
+sklearn hisobini aynan takrorlaydi: char_wb n-gram -> tf * idf -> l2 norm -> coef·x + b -> argmax.
+
+Hashing varianti (train.py --hashing N): vocabulary yo‘q, n-gram ustuni murmurhash3_32 % N.
+Faqat o‘qitishda uchragan ustunlar saqlanadi (columns + float32 coef); qolganlari uchun
+coef 0, idf esa bitta default_idf — l2 norm sklearn’dagidek chiqadi.
+
+Natija joblib modeli bilan bir xil (train.py eksportdan keyin tekshiradi,
+bench.cefr_model esa lug‘at + dataset bo‘yicha solishtiradi).
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+_WHITE_SPACES = re.compile(r"\s\s+")  # sklearn _VectorizerMixin._white_spaces
+
+
+def char_wb_ngrams(text: str, ngram_range: tuple[int, int]) -> List[str]:
+    """sklearn TfidfVectorizer(analyzer="char_wb", lowercase=True) tokenizatsiyasi."""
+    text = _WHITE_SPACES.sub(" ", text.lower())
+    min_n, max_n = ngram_range
+    out = []
+    for w in text.split():
+        w = " " + w + " "
+        w_len = len(w)
+        for n in range(min_n, max_n + 1):
+            offset = 0
+            out.append(w[offset : offset + n])
+            while offset + n < w_len:
+                offset += 1
+                out.append(w[offset : offset + n])
+            if offset == 0:  # qisqa so‘z (w_len < n) bir marta sanaladi
+                break
+    return out
+
+
+def murmurhash3_32(data: bytes, seed: int = 0) -> int:
+    """MurmurHash3 x86_32, ishorali natija (sklearn.utils.murmurhash3_32 bilan bir xil)."""
+    c1, c2, mask = 0xCC9E2D51, 0x1B873593, 0xFFFFFFFF
+    h = seed & mask
+    n = len(data)
+    end = n - n % 4
+    for i in range(0, end, 4):
+        k = int.from_bytes(data[i : i + 4], "little")
+        k = (k * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+        h = ((h << 13) | (h >> 19)) & mask
+        h = (h * 5 + 0xE6546B64) & mask
+    k = 0
+    tail = n - end
+    if tail == 3:
+        k ^= data[end + 2] << 16
+    if tail >= 2:
+        k ^= data[end + 1] << 8
+    if tail >= 1:
+        k ^= data[end]
+        k = (k * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+    h ^= n
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & mask
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & mask
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+@lru_cache(maxsize=1 << 16)  # n-gram’lar kam takrorlanmaydi; xotira chegaralangan
+def _hash_gram(gram: str) -> int:
+    return abs(murmurhash3_32(gram.encode("utf-8")))
+
+
+class NumpyCefrModel:
+    """sklearn Pipeline’ning predict / decision_function’iga mos, lekin faqat NumPy."""
+
+    __slots__ = ("vocabulary", "idf", "coef", "intercept", "classes_", "ngram_range", "hashing", "default_idf")
+
+    def __init__(self, vocabulary: dict, idf, coef, intercept, classes, ngram_range, *, hashing: int = 0, default_idf: float = 0.0):
+        """
+        vocabulary: n-gram -> qator (oddiy) yoki saqlangan hash ustunlari, o‘sish tartibida (hashing > 0).
+        Hashing’da lookup — N uzunlikdagi int32 massiv (ustun -> qator, -1 => yo‘q): dict’dan ancha ixcham.
+        coef float32 bo‘lsa float32 saqlanadi (hisob baribir float64’da).
+        """
+        coef = np.asarray(coef)
+        if hashing:
+            slots = np.full(int(hashing), -1, dtype=np.int32)
+            slots[np.asarray(vocabulary, dtype=np.int64)] = np.arange(len(vocabulary), dtype=np.int32)
+            vocabulary = slots
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.coef = np.ascontiguousarray(coef.T if coef.dtype == np.float32 else coef.astype(np.float64).T)  # (n_features, n_classes)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.hashing = int(hashing)
+        self.default_idf = float(default_idf)
+
+    # ---------- LOAD / SAVE ----------
+    @classmethod
+    def load(cls, path: str | Path) -> "NumpyCefrModel":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Noma’lum model formati: {path}")
+            hashing = int(z["hashing"]) if "hashing" in z.files else 0
+            return cls(
+                z["columns"] if hashing else {g: i for i, g in enumerate(z["vocabulary"].tolist())},
+                z["idf"],
+                z["coef"],
+                z["intercept"],
+                z["classes"],
+                tuple(z["ngram_range"]),
+                hashing=hashing,
+                default_idf=float(z["default_idf"]) if hashing else 0.0,
+            )
+
+    @classmethod
+    def from_pipeline(cls, pipe, *, float32: bool = False) -> "NumpyCefrModel":
+        """
+        Fit qilingan sklearn Pipeline’dan (sklearn import qilinmaydi — faqat atributlar):
+        (tfidf=TfidfVectorizer, clf) yoki (hash=HashingVectorizer, tfidf=TfidfTransformer, clf).
+        """
+        steps, clf = pipe.named_steps, pipe.named_steps["clf"]
+        coef = clf.coef_.astype(np.float32) if float32 else clf.coef_
+        if "hash" in steps:
+            hv, tf = steps["hash"], steps["tfidf"]
+            if (
+                hv.analyzer != "char_wb" or not hv.lowercase or hv.strip_accents or hv.alternate_sign
+                or hv.norm is not None or tf.sublinear_tf or tf.norm != "l2" or not tf.use_idf
+            ):
+                raise ValueError("Faqat HashingVectorizer(char_wb, alternate_sign=False, norm=None) + TfidfTransformer(l2)")
+            # o‘qitishda uchramagan ustunlar: coef 0, idf = max (df=0)
+            cols = np.flatnonzero(np.any(clf.coef_ != 0, axis=0))
+            default_idf = float(np.max(tf.idf_))
+            return cls(
+                cols, tf.idf_[cols], coef[:, cols], clf.intercept_, clf.classes_,
+                hv.ngram_range, hashing=hv.n_features, default_idf=default_idf,
+            )
+        vec = steps["tfidf"]
+        if vec.analyzer != "char_wb" or not vec.lowercase or vec.strip_accents or vec.sublinear_tf or vec.norm != "l2":
+            raise ValueError("Faqat TfidfVectorizer(analyzer='char_wb', lowercase, norm='l2') qo‘llab-quvvatlanadi")
+        return cls(dict(vec.vocabulary_), vec.idf_, coef, clf.intercept_, clf.classes_, vec.ngram_range)
+
+    def save(self, path: str | Path) -> None:
+        if self.hashing:
+            extra = {
+                "hashing": np.int64(self.hashing),
+                "columns": np.flatnonzero(self.vocabulary >= 0).astype(np.int32),
+                "default_idf": np.float64(self.default_idf),
+            }
+        else:
+            keys = [""] * len(self.vocabulary)
+            for g, i in self.vocabulary.items():
+                keys[i] = g
+            extra = {"vocabulary": np.array(keys)}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            format_version=np.int64(FORMAT_VERSION),
+            idf=self.idf,
+            coef=self.coef.T,
+            intercept=self.intercept,
+            classes=self.classes_.astype(str),
+            ngram_range=np.array(self.ngram_range, dtype=np.int64),
+            **extra,
+        )
+
+    # ---------- INFERENCE ----------
+    def decision_function(self, texts: Iterable[str]) -> np.ndarray:
+        vocab, hashing = self.vocabulary, self.hashing
+        rows, cols, counts = [], [], []
+        n = 0
+        for n, text in enumerate(texts, 1):
+            for g, c in Counter(char_wb_ngrams(text, self.ngram_range)).items():
+                j = _hash_gram(g) % hashing if hashing else vocab.get(g)
+                if j is not None:
+                    rows.append(n - 1)
+                    cols.append(j)
+                    counts.append(c)
+
+        scores = np.tile(self.intercept, (n, 1))
+        if not rows:
+            return scores
+        rows_a = np.asarray(rows, dtype=np.intp)
+        cols_a = np.asarray(cols, dtype=np.intp)
+        counts_a = np.asarray(counts, dtype=np.float64)
+        extra = 0.0
+        if hashing:
+            # bir ustunga tushgan n-gram’lar qo‘shiladi (HashingVectorizer kabi)
+            uniq, inv = np.unique(rows_a * hashing + cols_a, return_inverse=True)
+            counts_a = np.bincount(inv, weights=counts_a)
+            rows_a, cols_a = uniq // hashing, vocab[uniq % hashing].astype(np.intp)
+            # saqlanmagan ustun: coef 0, lekin l2 norm’ga (tf * default_idf)^2 qo‘shadi
+            unknown = cols_a < 0
+            extra = np.bincount(rows_a[unknown], weights=(counts_a[unknown] * self.default_idf) ** 2, minlength=n)
+            rows_a, cols_a, counts_a = rows_a[~unknown], cols_a[~unknown], counts_a[~unknown]
+        vals = counts_a * self.idf[cols_a]
+        norms = np.sqrt(np.bincount(rows_a, weights=vals * vals, minlength=n) + extra)
+        vals /= norms[rows_a]
+        contrib = self.coef[cols_a] * vals[:, None]
+        for k in range(scores.shape[1]):
+            scores[:, k] += np.bincount(rows_a, weights=contrib[:, k], minlength=n)
+        return scores
+
+    def predict(self, texts: Iterable[str]) -> np.ndarray:
+        return self.classes_[self.decision_function(texts).argmax(axis=1)]
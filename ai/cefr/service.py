@@ -0,0 +1,102 @@
+# ai/cefr/service.py
+"""
+Process bo‘yicha bitta CEFR inference xizmati (web sahifalar, word_repo_db, bot — hammasi shu).
+
+- model bir marta yuklanadi (infer.load_model: .npz bo‘lsa sklearn’siz)
+- predict_many: tozalangan so‘z bo‘yicha LRU kesh, takrorlar bitta, keshda yo‘qlari
+  bitta (katta bo‘lsa BATCH_SIZE bo‘laklarda) predict’da
+- thread-safe: kesh lock ostida, predict lock’dan tashqarida
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, List
+
+from ai.cefr.infer import clean_word, load_model
+
+UNKNOWN = "-"  # clean_word’dan keyin bo‘sh qolgan so‘z (model’ga berilmaydi)
+CACHE_SIZE = int(os.getenv("CEFR_CACHE_SIZE", "8192"))
+BATCH_SIZE = 1024
+
+
+class CefrService:
+    def __init__(self, model=None, *, cache_size: int = CACHE_SIZE, batch_size: int = BATCH_SIZE):
+        self._model = model
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "batches": 0}
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = load_model()
+        return self._model
+
+    def _predict(self, cleaned: List[str]) -> List[str]:
+        out: List[str] = []
+        for i in range(0, len(cleaned), self.batch_size):
+            out.extend(self.model.predict(cleaned[i : i + self.batch_size]).tolist())
+        with self._lock:
+            self.stats["batches"] += -(-len(cleaned) // self.batch_size)
+        return out
+
+    def predict_many(self, words: Iterable[str], *, memo: bool = True) -> List[str]:
+        """
+        Har so‘z uchun daraja (A1..C2, bo‘sh so‘z uchun "-").
+        memo=False: butun lug‘at kabi bir martalik katta ro‘yxatlar LRU’ni siqib chiqarmasin.
+        """
+        cleaned = [clean_word(w) for w in words]
+        found: dict[str, str] = {}
+        if memo:
+            with self._lock:
+                for w in cleaned:
+                    if w and w not in found:
+                        lv = self._cache.get(w)
+                        if lv is not None:
+                            self._cache.move_to_end(w)
+                            found[w] = lv
+                self.stats["hits"] += len(found)
+
+        todo = [w for w in dict.fromkeys(cleaned) if w and w not in found]
+        if todo:
+            found.update(zip(todo, self._predict(todo)))
+            if memo:
+                with self._lock:
+                    self.stats["misses"] += len(todo)
+                    for w in todo:
+                        self._cache[w] = found[w]
+                        self._cache.move_to_end(w)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return [found[w] if w else UNKNOWN for w in cleaned]
+
+    def predict(self, word: str) -> str:
+        return self.predict_many([word])[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def info(self) -> dict:
+        with self._lock:
+            return {**self.stats, "cached": len(self._cache), "cache_size": self.cache_size}
+
+
+_SERVICE: CefrService | None = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_service() -> CefrService:
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = CefrService()
+    return _SERVICE
@@ -0,0 +1,274 @@
+# ai/cefr/sweep.py
+"""
+CEFR modeli uchun cross-validated hyperparameter sweep va model tanlash.
+
+- grid: n-gram oralig‘i x C x (vocabulary min_df | hashing n_features)
+- StratifiedKFold (seed qat’iy) — (config, fold) vazifalari joblib bilan barcha yadrolarda parallel
+- har fold uchun vektorlangan matritsalar joblib.Memory’da keshlanadi (data/cefr_sweep_cache):
+  C o‘zgarsa yoki sweep qayta ishga tushsa, vectorizer qayta fit qilinmaydi
+- CV bo‘yicha eng yaxshi --top config train qismida qayta o‘qitiladi, NumPy (production) inference
+  latency’si o‘lchanadi; --max-latency-us ga sig‘adigan eng aniq model tanlanadi
+- tanlangan model test qismida baholanadi, model + .npz + model card (.card.md) yoziladi
+
+    python -m ai.cefr.sweep                               # default grid, barcha yadrolar
+    python -m ai.cefr.sweep --jobs 4 --folds 5 --max-latency-us 150
+    python -m ai.cefr.sweep --quick --dry-run             # kichik grid, faqat natija (model yozilmaydi)
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import platform
+import statistics
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import sklearn
+from joblib import Memory, Parallel, delayed
+from sklearn.metrics import accuracy_score, classification_report, f1_score
+from sklearn.model_selection import StratifiedKFold
+
+from ai.cefr.npmodel import NumpyCefrModel
+from ai.cefr.train import (
+    DEFAULT_DATA,
+    DEFAULT_MODEL,
+    LEVEL_ORDER,
+    build_pipeline,
+    export_numpy,
+    load_dataset,
+    split,
+)
+from core.lexicon import PROJECT_ROOT
+
+CACHE_DIR = PROJECT_ROOT / "data" / "cefr_sweep_cache"
+SEED = 42
+
+GRID = {
+    "ngram_range": [(2, 5), (3, 5), (3, 6)],
+    "C": [0.5, 1.0, 4.0],
+    "features": [("vocab", 1), ("vocab", 2), ("vocab", 3), ("hash", 1 << 16), ("hash", 1 << 18)],
+}
+QUICK_GRID = {
+    "ngram_range": [(3, 5), (3, 6)],
+    "C": [1.0],
+    "features": [("vocab", 2), ("hash", 1 << 16)],
+}
+
+memory = Memory(CACHE_DIR, verbose=0)
+
+
+# =========================
+# CONFIG
+# =========================
+def expand(grid: dict) -> list[dict]:
+    return [
+        {"ngram_range": ng, "C": c, "kind": kind, "param": param}
+        for ng, c, (kind, param) in itertools.product(grid["ngram_range"], grid["C"], grid["features"])
+    ]
+
+
+def label(cfg: dict) -> str:
+    feat = f"min_df={cfg['param']}" if cfg["kind"] == "vocab" else f"hash={cfg['param']}"
+    return f"ngram={cfg['ngram_range'][0]}-{cfg['ngram_range'][1]} {feat} C={cfg['C']}"
+
+
+def pipeline_for(cfg: dict):
+    hashing = cfg["param"] if cfg["kind"] == "hash" else 0
+    min_df = cfg["param"] if cfg["kind"] == "vocab" else 1
+    return build_pipeline(hashing, ngram_range=cfg["ngram_range"], min_df=min_df, C=cfg["C"])
+
+
+# =========================
+# CV (parallel, keshlangan feature’lar)
+# =========================
+@memory.cache
+def fold_features(X: list[str], y: list[str], kind: str, param: int, ngram_range: tuple, fold: int, folds: int):
+    """Bitta fold uchun (X_tr, X_va, y_tr, y_va) — vectorizer faqat train qismida fit qilinadi."""
+    tr, va = list(StratifiedKFold(folds, shuffle=True, random_state=SEED).split(X, y))[fold]
+    features = pipeline_for({"ngram_range": ngram_range, "C": 1.0, "kind": kind, "param": param})[:-1]
+    X_tr = features.fit_transform([X[i] for i in tr])
+    X_va = features.transform([X[i] for i in va])
+    return X_tr, X_va, [y[i] for i in tr], [y[i] for i in va]
+
+
+def score_fold(X: list[str], y: list[str], cfg: dict, fold: int, folds: int) -> dict:
+    warnings.filterwarnings("ignore")
+    t0 = time.perf_counter()
+    X_tr, X_va, y_tr, y_va = fold_features(X, y, cfg["kind"], cfg["param"], cfg["ngram_range"], fold, folds)
+    clf = pipeline_for(cfg).steps[-1][1]  # LogisticRegression(C=...)
+    clf.fit(X_tr, y_tr)
+    pred = clf.predict(X_va)
+    return {
+        "acc": accuracy_score(y_va, pred),
+        "f1": f1_score(y_va, pred, average="macro"),
+        "fit_s": time.perf_counter() - t0,
+    }
+
+
+def cross_validate(X: list[str], y: list[str], configs: list[dict], folds: int, jobs: int) -> list[dict]:
+    tasks = [(cfg, f) for cfg in configs for f in range(folds)]
+    scores = Parallel(n_jobs=jobs)(delayed(score_fold)(X, y, cfg, f, folds) for cfg, f in tasks)
+    by_cfg: dict[str, list[dict]] = {}
+    for (cfg, _f), s in zip(tasks, scores):
+        by_cfg.setdefault(label(cfg), []).append(s)
+    results = []
+    for cfg in configs:
+        runs = by_cfg[label(cfg)]
+        accs = [r["acc"] for r in runs]
+        results.append(
+            {
+                "config": cfg,
+                "label": label(cfg),
+                "cv_acc": statistics.mean(accs),
+                "cv_acc_std": statistics.pstdev(accs),
+                "cv_f1": statistics.mean(r["f1"] for r in runs),
+                "fit_s": statistics.mean(r["fit_s"] for r in runs),
+            }
+        )
+    return sorted(results, key=lambda r: r["cv_acc"], reverse=True)
+
+
+# =========================
+# LATENCY (production yo‘li: NumpyCefrModel)
+# =========================
+def measure_latency(model: NumpyCefrModel, words: list[str]) -> dict:
+    times = []
+    for w in words:
+        t0 = time.perf_counter()
+        model.predict([w])
+        times.append((time.perf_counter() - t0) * 1e6)
+    times.sort()
+    t0 = time.perf_counter()
+    model.predict(words)
+    batch = time.perf_counter() - t0
+    return {
+        "p50_us": times[len(times) // 2],
+        "p95_us": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "batch_ms_per_1k": batch * 1000 / len(words) * 1000,
+    }
+
+
+# =========================
+# MODEL CARD
+# =========================
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def model_card(best: dict, results: list[dict], report: dict, args, n_rows: int, sizes: dict) -> str:
+    cfg = best["config"]
+    lines = [
+        "# CEFR model card",
+        "",
+        f"- Yaratildi: {datetime.now(timezone.utc).isoformat(timespec='seconds')}",
+        f"- Dataset: `{Path(args.data).name}` ({n_rows} qator, sha256 `{_sha256(Path(args.data))[:16]}`)",
+        f"- Bo‘linish: train/test 85/15 (random_state={SEED}, stratified); CV: {args.folds}-fold StratifiedKFold",
+        f"- Muhit: Python {platform.python_version()}, scikit-learn {sklearn.__version__}, numpy {np.__version__}",
+        f"- Sweep: {len(results)} config, latency chegarasi p50 <= {args.max_latency_us:.0f} us (NumPy inference, bitta so‘z)",
+        "",
+        "## Tanlangan model",
+        "",
+        f"- Config: `{best['label']}`",
+        f"- CV accuracy: {best['cv_acc']:.4f} ± {best['cv_acc_std']:.4f}, macro-F1 {best['cv_f1']:.4f}",
+        f"- Test accuracy: {report['accuracy']:.4f}, macro-F1 {report['macro avg']['f1-score']:.4f}",
+        f"- Latency: p50 {best['latency']['p50_us']:.0f} us, p95 {best['latency']['p95_us']:.0f} us, "
+        f"batch {best['latency']['batch_ms_per_1k']:.1f} ms / 1000 so‘z",
+        "- Fayllar: " + (", ".join(f"`{name}` {size / 1024:.0f} KB" for name, size in sizes.items()) or "— (dry run)"),
+        f"- Feature’lar: {'HashingVectorizer' if cfg['kind'] == 'hash' else 'TfidfVectorizer'}(char_wb)"
+        + (" + TfidfTransformer" if cfg["kind"] == "hash" else "")
+        + ", LogisticRegression(class_weight=balanced)",
+        "",
+        "## Daraja bo‘yicha (test)",
+        "",
+        "| Daraja | Precision | Recall | F1 | Support |",
+        "|---|---|---|---|---|",
+    ]
+    for lv in LEVEL_ORDER:
+        r = report.get(lv)
+        if r:
+            lines.append(f"| {lv} | {r['precision']:.3f} | {r['recall']:.3f} | {r['f1-score']:.3f} | {int(r['support'])} |")
+    lines += [
+        "",
+        "## Sweep (CV accuracy bo‘yicha)",
+        "",
+        "| Config | CV acc | ± | macro-F1 | fit, s | p50, us |",
+        "|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        lat = f"{r['latency']['p50_us']:.0f}" if "latency" in r else "—"
+        lines.append(
+            f"| `{r['label']}` | {r['cv_acc']:.4f} | {r['cv_acc_std']:.4f} | {r['cv_f1']:.4f} | {r['fit_s']:.1f} | {lat} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def card_path(model_path: Path) -> Path:
+    return model_path.with_suffix(".card.md")
+
+
+# =========================
+# CLI
+# =========================
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--data", default=str(DEFAULT_DATA))
+    ap.add_argument("--out", default=str(DEFAULT_MODEL), help="tanlangan model (.joblib; yonida .npz va .card.md)")
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--jobs", type=int, default=-1, help="parallel worker’lar (-1 => barcha yadrolar)")
+    ap.add_argument("--top", type=int, default=5, help="latency o‘lchanadigan eng yaxshi config’lar soni")
+    ap.add_argument("--max-latency-us", type=float, default=200.0, help="bitta so‘z p50 chegarasi")
+    ap.add_argument("--quick", action="store_true", help="kichik grid")
+    ap.add_argument("--dry-run", action="store_true", help="model/card yozmasdan, card’ni chiqarish")
+    ap.add_argument("--clear-cache", action="store_true", help="keshlangan feature matritsalarini o‘chirish")
+    args = ap.parse_args()
+    warnings.filterwarnings("ignore")
+
+    if args.clear_cache:
+        memory.clear(warn=False)
+
+    X, y = load_dataset(Path(args.data))
+    X_train, X_test, y_train, y_test = split(X, y)
+    configs = expand(QUICK_GRID if args.quick else GRID)
+
+    t0 = time.perf_counter()
+    results = cross_validate(X_train, y_train, configs, args.folds, args.jobs)
+    print(f"CV: {len(configs)} config x {args.folds} fold — {time.perf_counter() - t0:.1f} s")
+
+    best, best_pipe = None, None
+    for r in results[: args.top]:
+        pipe = pipeline_for(r["config"]).fit(X_train, y_train)
+        fast = NumpyCefrModel.from_pipeline(pipe, float32=r["config"]["kind"] == "hash")
+        r["latency"] = measure_latency(fast, X_test)
+        ok = r["latency"]["p50_us"] <= args.max_latency_us
+        print(f"  {r['label']:40} cv {r['cv_acc']:.4f}  p50 {r['latency']['p50_us']:5.0f} us  {'ok' if ok else 'sekin'}")
+        if ok and best is None:
+            best, best_pipe = r, pipe
+    if best is None:
+        print(f"Hech bir config p50 <= {args.max_latency_us:.0f} us chegarasiga sig‘madi (--top yoki chegarani oshiring)")
+        return 1
+
+    report = classification_report(y_test, best_pipe.predict(X_test), output_dict=True, zero_division=0)
+    out = Path(args.out)
+    sizes = {}
+    if not args.dry_run:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(best_pipe, out)
+        export_numpy(best_pipe, out.with_suffix(".npz"), X, float32=best["config"]["kind"] == "hash")
+        sizes = {p.name: p.stat().st_size for p in (out, out.with_suffix(".npz"))}
+
+    card = model_card(best, results, report, args, len(X), sizes)
+    if args.dry_run:
+        print(card)
+    else:
+        card_path(out).write_text(card, encoding="utf-8")
+        print(f"Tanlandi: {best['label']} (test acc {report['accuracy']:.4f}) -> {out}, {card_path(out).name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,7 @@
 # ai/cefr/train.py
+# python -m ai.cefr.train            # o‘qitish + .npz eksport
+# python -m ai.cefr.train --export-only
+# python -m ai.cefr.train --hashing 262144 --float32   # xotirasi chegaralangan variant
 from __future__ import annotations
 from pathlib import Path
 import re
@@ -7,16 +10,19 @@ import argparse
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
 
+from ai.cefr.npmodel import NumpyCefrModel
+
 LEVEL_ORDER = ["A1", "A2", "B1", "B2", "C1", "C2"]
 
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_DATA = BASE_DIR / "data" / "ENGLISH_CERF_WORDS.csv"
 DEFAULT_MODEL = BASE_DIR / "models" / "cefr_model.joblib"
+DEFAULT_HASHING_MODEL = BASE_DIR / "models" / "cefr_model_hash.joblib"
 
 
 def clean_word(w: str) -> str:
@@ -26,7 +32,7 @@ def clean_word(w: str) -> str:
     return w.strip()
 
 
-def main(data_path: Path, out_path: Path):
+def load_dataset(data_path: Path) -> tuple[list[str], list[str]]:
     df = pd.read_csv(data_path)
 
     if "headword" not in df.columns or "CEFR" not in df.columns:
@@ -40,28 +46,57 @@ def main(data_path: Path, out_path: Path):
     df = df[df["headword"].str.len() > 0]
     df = df.drop_duplicates(subset=["headword", "CEFR"])
 
-    X = df["headword"].tolist()
-    y = df["CEFR"].tolist()
+    return df["headword"].tolist(), df["CEFR"].tolist()
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.15, random_state=42, stratify=y
-    )
 
-    pipe = Pipeline(
+def split(X: list[str], y: list[str]):
+    """Doim bir xil train/test bo‘linishi — variantlarni solishtirish shunga tayanadi."""
+    return train_test_split(X, y, test_size=0.15, random_state=42, stratify=y)
+
+
+def build_pipeline(hashing: int = 0, *, ngram_range: tuple[int, int] = (3, 6), min_df: int = 2, C: float = 1.0) -> Pipeline:
+    """
+    hashing=0: TfidfVectorizer (n-gram vocabulary).
+    hashing=N: HashingVectorizer(N ustun) + TfidfTransformer — vocabulary saqlanmaydi, xotira N bilan chegaralangan.
+    pipe[:-1] — faqat feature qismi (ai.cefr.sweep shuni keshlaydi).
+    """
+    clf = LogisticRegression(
+        C=C,
+        max_iter=4000,
+        class_weight="balanced",
+        solver="lbfgs"
+    )
+    if hashing:
+        return Pipeline(
+            steps=[
+                ("hash", HashingVectorizer(
+                    analyzer="char_wb",
+                    ngram_range=ngram_range,
+                    n_features=hashing,
+                    alternate_sign=False,
+                    norm=None
+                )),
+                ("tfidf", TfidfTransformer()),
+                ("clf", clf),
+            ]
+        )
+    return Pipeline(
         steps=[
             ("tfidf", TfidfVectorizer(
                 analyzer="char_wb",
-                ngram_range=(3, 6),
-                min_df=2
-            )),
-            ("clf", LogisticRegression(
-                max_iter=4000,
-                class_weight="balanced",
-                solver="lbfgs"
+                ngram_range=ngram_range,
+                min_df=min_df
             )),
+            ("clf", clf),
         ]
     )
 
+
+def main(data_path: Path, out_path: Path, hashing: int = 0, float32: bool = False):
+    X, y = load_dataset(data_path)
+    X_train, X_test, y_train, y_test = split(X, y)
+
+    pipe = build_pipeline(hashing)
     pipe.fit(X_train, y_train)
 
     preds = pipe.predict(X_test)
@@ -74,11 +109,39 @@ def main(data_path: Path, out_path: Path):
     joblib.dump(pipe, out_path)
     print(f"\n Saved model: {out_path}")
 
+    export_numpy(pipe, out_path.with_suffix(".npz"), X, float32=float32)
+
+
+def export_numpy(pipe, npz_path: Path, check_words: list[str], float32: bool = False) -> None:
+    """
+    Pipeline -> .npz (ai.cefr.npmodel, sklearn’siz inference).
+    Saqlangandan keyin qayta yuklab, check_words bo‘yicha joblib modeli bilan solishtiriladi.
+    float32: coef float32’da saqlanadi — argmax’da teng-teng holatlar uchun 0.1% gacha farqqa ruxsat.
+    """
+    NumpyCefrModel.from_pipeline(pipe, float32=float32).save(npz_path)
+    fast = NumpyCefrModel.load(npz_path)
+    expected = pipe.predict(check_words)
+    got = fast.predict(check_words)
+    mismatch = int((expected != got).sum())
+    if mismatch > (len(check_words) // 1000 if float32 else 0):
+        npz_path.unlink()
+        raise RuntimeError(f"NumPy eksport mos emas: {mismatch}/{len(check_words)} ta so‘z — {npz_path} o‘chirildi")
+    ok = len(check_words) - mismatch
+    print(f" Saved NumPy model: {npz_path} ({npz_path.stat().st_size / 1024:.0f} KB, parity {ok}/{len(check_words)})")
+
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--data", default=str(DEFAULT_DATA), help="Dataset path")
-    ap.add_argument("--out", default=str(DEFAULT_MODEL), help="Model output path")
+    ap.add_argument("--out", default=None, help=f"Model output path (default: {DEFAULT_MODEL.name}, --hashing bilan {DEFAULT_HASHING_MODEL.name})")
+    ap.add_argument("--hashing", type=int, default=0, metavar="N", help="HashingVectorizer, N ustun (masalan 262144); 0 => vocabulary")
+    ap.add_argument("--float32", action="store_true", help=".npz’da coef float32")
+    ap.add_argument("--export-only", action="store_true", help="qayta o‘qitmasdan mavjud --out modelini .npz ga eksport qilish")
     args = ap.parse_args()
 
-    main(Path(args.data), Path(args.out))
\ No newline at end of file
+    out = Path(args.out) if args.out else (DEFAULT_HASHING_MODEL if args.hashing else DEFAULT_MODEL)
+    if args.export_only:
+        words, _ = load_dataset(Path(args.data))
+        export_numpy(joblib.load(out), out.with_suffix(".npz"), words, float32=args.float32)
+    else:
+        main(Path(args.data), out, args.hashing, args.float32)
\ No newline at end of file
@@ -0,0 +1,119 @@
+# bench/cefr_model.py
+"""
+CEFR modeli: joblib (sklearn Pipeline) vs .npz (ai.cefr.npmodel, faqat NumPy).
+
+1) parity: lug‘at + ENGLISH_CERF_WORDS.csv so‘zlari bo‘yicha birinchi model (reference) bilan
+2) cold start: alohida process’da import + load vaqti, RSS o‘sishi (Linux), sklearn import bo‘ldimi
+3) latency: bitta so‘z predict([w]) p50/p95 va butun lug‘at bitta batch’da
+4) accuracy: train.split() test qismida (hamma variant bir xil bo‘linishda o‘qitilgan)
+5) xotiradagi model hajmi (.npz): weights (coef + idf) va lookup (vocabulary dict yoki hash slot massivi)
+
+    python -m bench.cefr_model
+    python -m ai.cefr.train --hashing 262144 --float32     # hashing varianti
+    python -m bench.cefr_model --models ai/cefr/models/cefr_model.npz ai/cefr/models/cefr_model_hash.npz
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from ai.cefr.infer import MODEL_PATH, NUMPY_MODEL_PATH, clean_word, load_model
+from ai.cefr.npmodel import NumpyCefrModel
+from ai.cefr.train import DEFAULT_DATA, load_dataset, split
+from core.lexicon import PROJECT_ROOT, get_lexicon
+
+_COLD = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+
+def rss_mb():
+    # /proc/self/status (Linux): VmRSS; ru_maxrss fork’da parent qiymatini meros qiladi — yaramaydi
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) for l in f if l.startswith("VmRSS:")) / 1024
+
+rss0 = rss_mb()
+t0 = time.perf_counter()
+from ai.cefr.infer import load_model
+m = load_model(sys.argv[1])
+m.predict(["warm"])
+dt = time.perf_counter() - t0
+print(json.dumps({"load_s": dt, "rss_mb": rss_mb() - rss0, "sklearn": "sklearn" in sys.modules}))
+"""
+
+
+def _words() -> list[str]:
+    words = [clean_word(en) for en, _ in get_lexicon().entries.values()]
+    words += pd.read_csv(DEFAULT_DATA)["headword"].astype(str).map(clean_word).tolist()
+    return [w for w in dict.fromkeys(words) if w]
+
+
+def _cold(path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _COLD, str(path)], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _pct(xs: list[float], q: float) -> float:
+    return sorted(xs)[min(len(xs) - 1, int(len(xs) * q))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--models", nargs="+", default=[str(MODEL_PATH), str(NUMPY_MODEL_PATH)])
+    ap.add_argument("--single", type=int, default=2000, help="bitta so‘zli chaqiruvlar soni")
+    args = ap.parse_args()
+    warnings.filterwarnings("ignore")  # joblib: sklearn versiyasi farqi haqida ogohlantirish
+
+    words = _words()
+    lex_words = [w for w in (clean_word(en) for en, _ in get_lexicon().entries.values()) if w]
+    sample = random.Random(0).choices(words, k=args.single)
+    _, X_test, _, y_test = split(*load_dataset(DEFAULT_DATA))
+    reference = None
+
+    for path in map(Path, args.models):
+        cold = _cold(path)
+        model = load_model(str(path))
+        pred = model.predict(words)
+        if reference is None:
+            reference = pred
+        mismatch = int((pred != reference).sum())
+
+        times = []
+        for w in sample:
+            t0 = time.perf_counter()
+            model.predict([w])
+            times.append((time.perf_counter() - t0) * 1e6)
+        t0 = time.perf_counter()
+        model.predict(lex_words)
+        batch_ms = (time.perf_counter() - t0) * 1000
+        acc = float((model.predict(X_test) == y_test).mean())
+        arrays = ""
+        if isinstance(model, NumpyCefrModel):
+            weights = model.coef.nbytes + model.idf.nbytes
+            if model.hashing:
+                lookup = model.vocabulary.nbytes
+            else:  # dict + kalit str’lari
+                lookup = sys.getsizeof(model.vocabulary) + sum(map(sys.getsizeof, model.vocabulary))
+            kind = f"hash {model.hashing}" if model.hashing else "vocab"
+            arrays = f" | {kind}, {len(model.idf)} ustun, weights {weights / 1024:.0f} KB + lookup {lookup / 1024:.0f} KB"
+
+        print(
+            f"{path.name:22} {path.stat().st_size / 1024:6.0f} KB | cold {cold['load_s'] * 1000:6.0f} ms "
+            f"+{cold['rss_mb']:5.1f} MB sklearn={cold['sklearn']!s:5} | "
+            f"1 so‘z p50 {statistics.median(times):6.0f} us p95 {_pct(times, 0.95):6.0f} us | "
+            f"{len(lex_words)} so‘z {batch_ms:6.1f} ms | acc {acc:.4f} | farq {mismatch}/{len(words)}{arrays}"
+        )
+
+
+if __name__ == "__main__":
+    main()
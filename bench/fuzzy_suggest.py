@@ -0,0 +1,142 @@
+# bench/fuzzy_suggest.py
+"""
+Fuzzy suggestion benchmark: SymSpell deletion index vs chiziqli scan.
+
+Chiziqli scan — har so‘z bilan edit_distance (hozirgi startswith/contains scan
+xato yozilgan so‘zga umuman natija bermaydi, u ham solishtirish uchun o‘lchanadi).
+Lug‘at: 5000_lugat_en_uz.csv + katta hajm uchun undan yasalgan sintetik so‘zlar.
+So‘rovlar — lug‘atdagi so‘zga 1-2 ta xato (o‘chirish/qo‘shish/almashtirish/o‘rin
+almashtirish); masofa chegarasi suggest() dagidek (fuzzy_distance_for).
+
+    python -m bench.fuzzy_suggest
+    python -m bench.fuzzy_suggest --sizes 5000 200000 --queries 300
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import string
+import time
+
+from core.lexicon import get_lexicon
+from services.suggestion_service import (
+    FUZZY_MAX_DISTANCE,
+    FUZZY_MIN_QUERY,
+    FuzzyIndex,
+    SuggestionIndex,
+    edit_distance,
+    fuzzy_distance_for,
+)
+
+_LETTERS = string.ascii_lowercase
+
+
+def _vocab(size: int, rnd: random.Random) -> list[str]:
+    base = sorted({en for en, _ in get_lexicon().pairs}, key=str.lower)
+    words = list(base)
+    seen = {w.lower() for w in words}
+    while len(words) < size:
+        # haqiqiy so‘z + qo‘shimcha/almashtirish — tabiiy ko‘rinishdagi sintetik so‘zlar
+        w = rnd.choice(base).lower()
+        w = w[: rnd.randint(2, max(2, len(w)))] + "".join(rnd.choices(_LETTERS, k=rnd.randint(1, 5)))
+        if w not in seen:
+            seen.add(w)
+            words.append(w)
+    return sorted(words[:size], key=str.lower)
+
+
+def _typo(w: str, n: int, rnd: random.Random) -> str:
+    w = w.lower()
+    for _ in range(n):
+        op = rnd.randrange(4)
+        i = rnd.randrange(len(w)) if w else 0
+        if op == 0 and len(w) > 1:
+            w = w[:i] + w[i + 1 :]
+        elif op == 1:
+            w = w[:i] + rnd.choice(_LETTERS) + w[i:]
+        elif op == 2 and w:
+            w = w[:i] + rnd.choice(_LETTERS) + w[i + 1 :]
+        elif i + 1 < len(w):
+            w = w[:i] + w[i + 1] + w[i] + w[i + 2 :]
+    return w
+
+
+def _linear(lower: list[str], q: str, limit: int, md: int) -> list[tuple[int, int]]:
+    found = []
+    for pos, w in enumerate(lower):
+        d = edit_distance(q, w, md)
+        if d <= md:
+            found.append((d, abs(len(w) - len(q)), pos))
+    found.sort()
+    return [(pos, d) for d, _, pos in found[:limit]]
+
+
+def _ms(xs: list[float]) -> str:
+    xs = sorted(xs)
+    p95 = xs[min(len(xs) - 1, int(len(xs) * 0.95))]
+    return f"p50 {statistics.median(xs) * 1000:7.3f} ms  p95 {p95 * 1000:7.3f} ms"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5_000, 50_000, 200_000])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--limit", type=int, default=16)
+    ap.add_argument("--linear-queries", type=int, default=30, help="chiziqli scan sekin — kamroq so‘rov")
+    args = ap.parse_args()
+
+    md = FUZZY_MAX_DISTANCE
+    for size in args.sizes:
+        rnd = random.Random(size)
+        words = _vocab(size, rnd)
+        lower = [w.lower() for w in words]
+
+        t0 = time.perf_counter()
+        fz = FuzzyIndex(lower)
+        build = time.perf_counter() - t0
+        sugg = SuggestionIndex(words)
+
+        queries, targets = [], []
+        while len(queries) < args.queries:
+            i = rnd.randrange(len(words))
+            q = _typo(words[i], rnd.randint(1, md), rnd)
+            if len(q) >= FUZZY_MIN_QUERY:  # suggest() qisqaroq so‘rovga fuzzy qilmaydi
+                queries.append(q)
+                targets.append(i)
+
+        t_idx, hits, same = [], 0, 0
+        for q, target in zip(queries, targets):
+            t = time.perf_counter()
+            res = fz.lookup(q, args.limit, fuzzy_distance_for(q))
+            t_idx.append(time.perf_counter() - t)
+            hits += any(pos == target or lower[pos] == lower[target] for pos, _ in res)
+
+        t_lin = []
+        for q in queries[: args.linear_queries]:
+            t = time.perf_counter()
+            expected = _linear(lower, q, args.limit, fuzzy_distance_for(q))
+            t_lin.append(time.perf_counter() - t)
+            same += expected == fz.lookup(q, args.limit, fuzzy_distance_for(q))
+
+        t_old = []
+        for q in queries:
+            t = time.perf_counter()
+            [w for w in words if w.lower().startswith(q)] + [w for w in words if q in w.lower()]
+            t_old.append(time.perf_counter() - t)
+
+        t_sug = []
+        for q in queries:
+            t = time.perf_counter()
+            sugg.suggest(q, args.limit)
+            t_sug.append(time.perf_counter() - t)
+
+        print(f"\n== {len(words)} so‘z (index build {build:.2f} s, {len(fz.deletes)} delete kalit)")
+        print(f"  symspell lookup        {_ms(t_idx)}   to‘g‘ri so‘z topildi: {hits}/{len(queries)}")
+        print(f"  linear edit-distance   {_ms(t_lin)}   natija symspell bilan bir xil: {same}/{len(t_lin)}")
+        print(f"  eski startswith/contains scan {_ms(t_old)}")
+        print(f"  suggest() (prefix+contains+fuzzy) {_ms(t_sug)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# bench/quiz_complete.py
+"""
+Quiz yakuni benchmark (parallel userlar, yakun/s va latency):
+- eski yo‘l: save_attempt + add_xp + group_id — 3 connection, 3 tranzaksiya, javoblar executemany
+- complete_attempt_async: bitta tranzaksiya, javoblar bitta INSERT, Postgres’da pipeline, group_id class cache’dan
+
+    python -m bench.quiz_complete                      # 200 yakun x 1/16/64 parallel user, vaqtinchalik SQLite
+    python -m bench.quiz_complete --users 8 32 --completions 500 --questions 20
+    DATABASE_URL=postgresql://... python -m bench.quiz_complete   # bot schema, vaqtinchalik sinf
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from bot.services import classroom, leaderboard
+from bot.storage import db
+from core import sql
+
+_DELETE = [
+    sql.define("bench.qc_delete_answers", "DELETE FROM attempt_answers WHERE assignment_id=?"),
+    sql.define("bench.qc_delete_attempts", "DELETE FROM attempts WHERE assignment_id=?"),
+]
+_DELETE_CLASS = [
+    sql.define("bench.qc_delete_xp_log", "DELETE FROM xp_log WHERE class_id=?"),
+    sql.define("bench.qc_delete_xp_buckets", "DELETE FROM xp_buckets WHERE class_id=?"),
+    sql.define("bench.qc_delete_assignments", "DELETE FROM assignments WHERE class_id=?"),
+    sql.define("bench.qc_delete_class", "DELETE FROM classes WHERE id=?"),
+]
+_LEGACY_INSERT_ANSWER = sql.define(
+    "bench.qc_legacy_insert_answer",
+    "INSERT INTO attempt_answers (assignment_id, user_id, question_idx, chosen_id, ok) VALUES (?, ?, ?, ?, ?)",
+)
+_COUNT = sql.define("bench.qc_count", "SELECT COUNT(*) FROM attempt_answers WHERE assignment_id=?")
+
+
+async def _legacy(aid: int, cid: int, uid: int, answers: list, score: int, total: int) -> int | None:
+    """Oldingi student.py yakuni — taqqoslash uchun (javoblar executemany, group_id har safar DB’dan)."""
+    pct = round(score / total * 100, 1)
+    async with db.aconnection() as conn:
+        await sql.aexecute(conn, classroom._SAVE_ATTEMPT, (aid, cid, uid, f"bench {uid}", score, total, pct, 0, None))
+        await sql.aexecute(conn, classroom._DELETE_ANSWERS, (aid, uid))
+        await sql.aexecutemany(conn, _LEGACY_INSERT_ANSWER, [(aid, uid, qi, ch, 1 if ok else 0) for qi, ch, ok in answers])
+        await conn.commit()
+    async with db.aconnection() as conn:
+        await sql.aexecute(conn, classroom._ADD_XP, (cid, uid, f"bench {uid}", score * 10))
+        await leaderboard.record_async(conn, cid, uid, f"bench {uid}", score * 10)
+        await conn.commit()
+    async with db.aconnection() as conn:
+        cur = await sql.aexecute(conn, classroom._GROUP_BY_CLASS, (cid,))
+        row = await cur.fetchone()
+    return int(row[0]) if row else None
+
+
+async def _unit(aid: int, cid: int, uid: int, answers: list, score: int, total: int) -> int | None:
+    pct = round(score / total * 100, 1)
+    return await classroom.complete_attempt_async(
+        aid, cid, uid, f"bench {uid}", score, total, pct, answers=answers, xp=score * 10
+    )
+
+
+async def _run(fn, aid: int, cid: int, users: int, completions: int, n_q: int, rnd: random.Random) -> tuple[float, float, float]:
+    """users ta parallel user, jami completions ta yakun => (yakun/s, p50 ms, p95 ms)."""
+    jobs = []
+    for k in range(completions):
+        answers = [(qi, rnd.randint(0, 3), rnd.random() < 0.7) for qi in range(n_q)]
+        jobs.append((1_000_000 + k % (users * 4), answers, sum(1 for a in answers if a[2])))
+    queue = iter(jobs)
+    lat: list[float] = []
+
+    async def worker() -> None:
+        for uid, answers, score in queue:
+            t = time.perf_counter()
+            await fn(aid, cid, uid, answers, score, n_q)
+            lat.append(time.perf_counter() - t)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(users)))
+    wall = time.perf_counter() - t0
+    q = statistics.quantiles(lat, n=20)
+    return completions / wall, statistics.median(lat) * 1000.0, q[18] * 1000.0
+
+
+async def _main(args) -> None:
+    rnd = random.Random(42)
+    cid = await classroom.create_class_async("bench", -1_000_000_000_000 - time.time_ns() % 1_000_000, 1)
+    aid = int(await classroom.create_assignment_async(cid, args.questions, None))
+    try:
+        print(f"backend: {'postgres' if db._is_postgres() else 'sqlite'}  pool={db.POOL_SIZE}  "
+              f"completions={args.completions}  questions={args.questions}")
+        print(f"{'users':>6} {'legacy/s':>9} {'p50':>7} {'p95':>7} {'unit/s':>9} {'p50':>7} {'p95':>7}")
+        for users in args.users:
+            await _run(_unit, aid, cid, users, min(50, args.completions), args.questions, rnd)  # warm-up (prepare, cache)
+            old = await _run(_legacy, aid, cid, users, args.completions, args.questions, rnd)
+            new = await _run(_unit, aid, cid, users, args.completions, args.questions, rnd)
+            print(f"{users:>6} {old[0]:>9.0f} {old[1]:>7.1f} {old[2]:>7.1f} {new[0]:>9.0f} {new[1]:>7.1f} {new[2]:>7.1f}")
+
+        async with db.aconnection() as conn:
+            cur = await sql.aexecute(conn, _COUNT, (aid,))
+            n = (await cur.fetchone())[0]
+        assert n % args.questions == 0, "attempt_answers qatorlari to‘liq emas"
+    finally:
+        async with db.aconnection() as conn:
+            for st in _DELETE:
+                await sql.aexecute(conn, st, (aid,))
+            for st in _DELETE_CLASS:
+                await sql.aexecute(conn, st, (cid,))
+            await conn.commit()
+        await db.close_async_pool()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--users", type=int, nargs="+", default=[1, 16, 64])
+    ap.add_argument("--completions", type=int, default=200)
+    ap.add_argument("--questions", type=int, default=10)
+    args = ap.parse_args()
+
+    tmp = None
+    if not db._is_postgres():
+        tmp = tempfile.TemporaryDirectory()
+        db.DB_PATH = Path(tmp.name) / "bench.db"
+    db.init_db()
+    try:
+        asyncio.run(_main(args))
+    finally:
+        db.get_pool().close()
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# bench/stats_snapshot.py
+"""
+get_stats_obj benchmark: eski 6 query’li variant vs bitta snapshot query.
+
+    python -m bench.stats_snapshot                 # 10k va 100k attempt, vaqtinchalik SQLite
+    python -m bench.stats_snapshot --sizes 50000 --history-limit 200
+    DATABASE_URL=postgresql://... python -m bench.stats_snapshot   # web schema, vaqtinchalik user
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from core import db, sql
+from core.stats_repo_db import _ts_str, rebuild_rollup
+
+_LEGACY = [
+    sql.define("bench.legacy_manual_agg", "SELECT COUNT(*), COALESCE(SUM(total),0), COALESCE(SUM(score),0) FROM attempts WHERE user_id=? AND mode='manual'"),
+    sql.define("bench.legacy_manual_hist", "SELECT ts, score, total, pct FROM attempts WHERE user_id=? AND mode='manual' ORDER BY ts"),
+    sql.define("bench.legacy_csv_agg", "SELECT test_id, COUNT(*), COALESCE(SUM(total),0), COALESCE(SUM(score),0) FROM attempts WHERE user_id=? AND mode='csv' AND test_id IS NOT NULL GROUP BY test_id"),
+    sql.define("bench.legacy_csv_hist", "SELECT ts, test_id, score, total, pct FROM attempts WHERE user_id=? AND mode='csv' AND test_id IS NOT NULL ORDER BY ts"),
+    sql.define("bench.legacy_level_agg", "SELECT level, COUNT(*), COALESCE(SUM(total),0), COALESCE(SUM(score),0) FROM attempts WHERE user_id=? AND mode='level' AND level IS NOT NULL GROUP BY level"),
+    sql.define("bench.legacy_level_hist", "SELECT ts, level, score, total, pct FROM attempts WHERE user_id=? AND mode='level' AND level IS NOT NULL ORDER BY ts"),
+]
+_INSERT = sql.define(
+    "bench.insert_attempt",
+    "INSERT INTO attempts (user_id, mode, test_id, level, score, total, pct, ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+)
+_DELETE = sql.define("bench.delete_attempts", "DELETE FROM attempts WHERE user_id=?")
+_DELETE_USER = sql.define("bench.delete_user", "DELETE FROM users WHERE id=?")
+
+
+def _legacy_get_stats_obj(user_id: int) -> dict:
+    """Oldingi implementatsiya (6 ta alohida query) — taqqoslash uchun."""
+    conn = db.get_conn()
+    r = [sql.execute(conn, st, (user_id,)).fetchall() for st in _LEGACY]
+    conn.close()
+    m = r[0][0]
+    return {
+        "manual": {
+            "attempts": int(m[0]), "total_q": int(m[1]), "correct_q": int(m[2]),
+            "history": [{"ts": _ts_str(x[0]), "correct": int(x[1]), "total": int(x[2]), "pct": float(x[3])} for x in r[1]],
+        },
+        "csv": {
+            "tests": {str(int(x[0])): {"attempts": int(x[1]), "total_q": int(x[2]), "correct_q": int(x[3])} for x in r[2]},
+            "history": [{"ts": _ts_str(x[0]), "test_id": int(x[1]), "correct": int(x[2]), "total": int(x[3]), "pct": float(x[4])} for x in r[3]],
+        },
+        "level": {
+            "by_level": {str(x[0]).upper(): {"attempts": int(x[1]), "total_q": int(x[2]), "correct_q": int(x[3])} for x in r[4]},
+            "history": [{"ts": _ts_str(x[0]), "level": str(x[1]).upper(), "correct": int(x[2]), "total": int(x[3]), "pct": float(x[4])} for x in r[5]],
+        },
+    }
+
+
+def _seed(user_id: int, n: int, rnd: random.Random) -> None:
+    rows = []
+    t0 = 1_700_000_000
+    for i in range(n):
+        mode = rnd.choice(("manual", "csv", "level"))
+        total = 10
+        score = rnd.randint(0, total)
+        ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t0 + i * 60))
+        rows.append((
+            user_id, mode,
+            rnd.randint(1, 50) if mode == "csv" else None,
+            rnd.choice(("A1", "A2", "B1", "B2", "C1")) if mode == "level" else None,
+            score, total, score / total * 100.0, ts,
+        ))
+    conn = db.get_conn()
+    sql.executemany(conn, _INSERT, rows)
+    conn.commit()
+    conn.close()
+    # to‘g‘ridan-to‘g‘ri INSERT — rollup’ni attempts’dan qayta quramiz
+    rebuild_rollup(user_id)
+
+
+def _time(fn, repeat: int) -> float:
+    fn()  # warm-up (statement cache / prepare)
+    out = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t)
+    return statistics.median(out) * 1000.0
+
+
+def _tail(obj: dict, n: int) -> dict:
+    """Legacy natijani history_limit=n ko‘rinishiga keltirish (tekshiruv uchun)."""
+    return {
+        "manual": {**obj["manual"], "history": obj["manual"]["history"][-n:]},
+        "csv": {**obj["csv"], "history": obj["csv"]["history"][-n:]},
+        "level": {**obj["level"], "history": obj["level"]["history"][-n:]},
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--history-limit", type=int, default=100)
+    args = ap.parse_args()
+
+    from core.stats_repo_db import get_stats_obj
+    from core.user_repo_db import upsert_user
+
+    tmp = None
+    if not db._is_postgres():
+        tmp = tempfile.TemporaryDirectory()
+        db.DB_PATH = Path(tmp.name) / "bench.db"
+    db.init_db()
+
+    rnd = random.Random(42)
+    print(f"backend: {'postgres' if db._is_postgres() else 'sqlite'}  repeat={args.repeat}  (median, ms)")
+    print(f"{'attempts':>10} {'legacy 6q':>10} {'snapshot':>10} {'limit=' + str(args.history_limit):>10}")
+
+    for n in args.sizes:
+        user = upsert_user("bench", "user", f"+bench-{n}-{time.time_ns()}")
+        uid = int(user["id"])
+        try:
+            _seed(uid, n, rnd)
+            expected = _legacy_get_stats_obj(uid)
+            assert get_stats_obj(uid) == expected, "natijalar farq qiladi"
+            assert get_stats_obj(uid, history_limit=args.history_limit) == _tail(expected, args.history_limit), "limit natijasi farq qiladi"
+
+            legacy = _time(lambda: _legacy_get_stats_obj(uid), args.repeat)
+            snap = _time(lambda: get_stats_obj(uid), args.repeat)
+            lim = _time(lambda: get_stats_obj(uid, history_limit=args.history_limit), args.repeat)
+            print(f"{n:>10} {legacy:>10.1f} {snap:>10.1f} {lim:>10.1f}")
+        finally:
+            conn = db.get_conn()
+            sql.execute(conn, _DELETE, (uid,))
+            sql.execute(conn, _DELETE_USER, (uid,))
+            conn.commit()
+            conn.close()
+
+    db.get_pool().close()
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
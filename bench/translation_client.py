@@ -0,0 +1,150 @@
+# bench/translation_client.py
+"""
+TranslationClient benchmark lokal stub HTTP server’ga qarshi (internet kerak emas).
+
+Stub MyMemory formatida javob beradi, har so‘rovga --latency kechikish qo‘shadi.
+1) eski usul: har so‘z uchun alohida requests.get (ketma-ket)
+2) TranslationClient.translate_many: keep-alive session + parallel + coalescing
+3) provider "o‘ladi" (sekin/500): breaker ochiladi, javoblar lokal lug‘atdan
+4) kesh fayli ochilmaydi (TRANSLATION_CACHE_DB yaroqsiz): tarjimalar keshsiz, xatosiz
+
+    python -m bench.translation_client
+    python -m bench.translation_client --words 200 --latency 0.1 --workers 16
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from core.lexicon import get_lexicon
+from services import translation_cache
+from services.translation_client import CircuitBreaker, CircuitOpen, TranslationClient, parse_mymemory
+
+
+class _Stub:
+    latency = 0.05
+    mode = "ok"  # ok / error / slow
+    requests = 0
+    connections = 0
+    lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with _Stub.lock:
+            _Stub.connections += 1
+
+    def do_GET(self):
+        with _Stub.lock:
+            _Stub.requests += 1
+        q = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        if _Stub.mode == "error":
+            self._send(500, b"{}")
+            return
+        time.sleep(_Stub.latency * (20 if _Stub.mode == "slow" else 1))
+        body = json.dumps({"responseData": {"translatedText": f"uz:{q}"}, "matches": [{"translation": f"uz2:{q}"}]})
+        self._send(200, body.encode())
+
+    def _send(self, code: int, body: bytes) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _reset_counters() -> None:
+    _Stub.requests = 0
+    _Stub.connections = 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--words", type=int, default=100)
+    ap.add_argument("--latency", type=float, default=0.05, help="stub javob kechikishi (s)")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--duplicates", type=int, default=3, help="har so‘z necha marta so‘raladi (coalescing)")
+    args = ap.parse_args()
+
+    _Stub.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/get"
+
+    words = [en for en, _ in get_lexicon().unique_pairs[: args.words]]
+
+    # 1) eski: ketma-ket, har safar yangi connection
+    _reset_counters()
+    t0 = time.perf_counter()
+    serial = {w: parse_mymemory(requests.get(url, params={"q": w, "langpair": "en|uz"}, timeout=12).json()) for w in words}
+    t_serial = time.perf_counter() - t0
+    print(f"eski (ketma-ket requests.get):   {t_serial:6.2f} s  so‘rov={_Stub.requests} connection={_Stub.connections}")
+
+    # 2) client: parallel + keep-alive + coalescing (kesh o‘chiq — faqat tarmoq qismi o‘lchanadi)
+    client = TranslationClient(url, max_workers=args.workers, use_cache=False, retries=0)
+    _reset_counters()
+    t0 = time.perf_counter()
+    res = client.translate_many([w for w in words for _ in range(args.duplicates)])
+    t_client = time.perf_counter() - t0
+    assert all(res[w] == serial[w] for w in words), "natijalar mos emas"
+    print(
+        f"TranslationClient ({args.workers} worker):   {t_client:6.2f} s  so‘rov={_Stub.requests} "
+        f"connection={_Stub.connections}  x{t_serial / t_client:.1f}  stats={client.stats}"
+    )
+    client.close()
+
+    # 3) provider xato bersa: breaker ochiladi, keyin HTTP’siz lokal javob
+    client = TranslationClient(url, max_workers=args.workers, use_cache=False, retries=0, breaker=CircuitBreaker(5, 60))
+    _Stub.mode = "error"
+    _reset_counters()
+    t0 = time.perf_counter()
+    out = [client.submit(w) for w in words]
+    ok = fallback_err = 0
+    for f in out:
+        try:
+            f.result()
+            ok += 1
+        except CircuitOpen:
+            fallback_err += 1
+        except Exception:
+            fallback_err += 1
+    print(
+        f"provider 500:  {time.perf_counter() - t0:6.2f} s  so‘rov={_Stub.requests} (breaker={client.breaker.state}), "
+        f"lokal javob={ok}, javobsiz={fallback_err}  stats={client.stats}"
+    )
+    client.close()
+    _Stub.mode = "ok"
+
+    # 4) buzuq kesh yo‘li: har lookup miss, yozish o‘tkazib yuboriladi — natija tarmoqdan
+    translation_cache.CACHE_DB = Path("/proc/nope/translation_cache.db")
+    translation_cache._CONN, translation_cache._BROKEN_UNTIL = None, 0.0
+    client = TranslationClient(url, max_workers=args.workers, use_cache=True, retries=0)
+    _reset_counters()
+    t0 = time.perf_counter()
+    res = client.translate_many(words)
+    errors = sum(isinstance(v, Exception) for v in res.values())
+    assert errors == 0 and all(res[w] == serial[w] for w in words), "buzuq kesh bilan natijalar mos emas"
+    print(
+        f"buzuq kesh:    {time.perf_counter() - t0:6.2f} s  so‘rov={_Stub.requests}, xato={errors}  "
+        f"stats={client.stats}  cache={translation_cache.stats()['error']}"
+    )
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
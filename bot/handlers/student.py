@@ -9,46 +9,29 @@ from aiogram.types import (
     FSInputFile,
 )
 
-import json
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from bot.storage.db import get_conn
 from bot.services.quiz import normalize_correct_for_check
 from bot.services.classroom import (
-    ensure_member,
-    save_attempt,
-    get_group_id_by_class,
-    get_assignment_questions,
-    is_assignment_late,
+    complete_attempt_async,
+    ensure_member_async,
+    get_assignment_questions_async,
+    get_assignment_row_async,
+    is_assignment_late_async,
 )
+from bot.services.quiz_sessions import QuizSession, get_store, questions_for, remember_questions
 
 router = Router()
 TZ = ZoneInfo("Asia/Samarkand")
 
-# MVP state (RAM). Keyin DB/Redis ga o'tkazamiz.
-QUIZ = {}  # user_id -> state
 
-
-def get_assignment_row(assignment_id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, class_id, n_questions, is_active FROM assignments WHERE id=?",
-        (int(assignment_id),),
-    )
-    row = cur.fetchone()
-    conn.close()
-    return row
-
-
-def get_class_name(class_id: int) -> str:
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT name FROM classes WHERE id=?", (class_id,))
-    row = cur.fetchone()
-    conn.close()
-    return (row[0] if row and row[0] else "Class")
+async def _load_questions(assignment_id: int) -> list:
+    """questions_json -> [(en, uz, options)]; format buzuq bo‘lsa []."""
+    fixed = await get_assignment_questions_async(assignment_id)
+    if not isinstance(fixed, list) or (fixed and not isinstance(fixed[0], dict)):
+        return []
+    return [(q["en"], q["uz"], q.get("options") or []) for q in fixed]
 
 
 @router.message(F.text.startswith("/start"))
@@ -73,7 +56,7 @@ async def start_router(message: Message):
             await message.answer("❌ Link xato: assignment_id topilmadi.")
             return
 
-        row = get_assignment_row(assignment_id)
+        row = await get_assignment_row_async(assignment_id)
 
         # ✅ DEBUG: row nima qaytaryapti?
         print("🧾 assignment row =", row, "| type =", type(row))
@@ -94,7 +77,7 @@ async def start_router(message: Message):
             await message.answer("Bu topshiriq hozir aktiv emas (is_active=0).")
             return
 
-        fixed = get_assignment_questions(assignment_id)
+        fixed = await get_assignment_questions_async(assignment_id)
         if not fixed:
             await message.answer(
                 "Bu topshiriq uchun test tayyorlanmagan. O‘qituvchi /give_hw ni qayta bersin."
@@ -110,20 +93,20 @@ async def start_router(message: Message):
         questions = [(q["en"], q["uz"], q.get("options") or []) for q in fixed]
 
         # ✅ Robust: user join link ishlatmagan bo‘lsa ham members’ga yozib qo‘yamiz
-        ensure_member(class_id, message.from_user.id, message.from_user.full_name)
+        await ensure_member_async(class_id, message.from_user.id, message.from_user.full_name)
 
         # ✅ late flag
-        late = is_assignment_late(assignment_id)
-
-        QUIZ[message.from_user.id] = {
-            "assignment_id": assignment_id,
-            "class_id": class_id,
-            "i": 0,
-            "score": 0,
-            "questions": questions,
-            "answers": [],
-            "is_late": 1 if late else 0,
-        }
+        late = await is_assignment_late_async(assignment_id)
+
+        # sessiya DB’da (quiz_sessions) — restart/boshqa worker’dan keyin ham davom etadi
+        session = QuizSession.new(
+            message.from_user.id,
+            assignment_id,
+            class_id,
+            is_late=1 if late else 0,
+            qhash=remember_questions(assignment_id, questions),
+        )
+        await get_store().create(session)
 
         if late:
             await message.answer(
@@ -131,7 +114,7 @@ async def start_router(message: Message):
             )
 
         await message.answer("📝 Topshiriq boshlandi! Javobni tanlang.")
-        await send_question(message)
+        await send_question(message, session, questions)
         return
 
     # =========================
@@ -139,65 +122,48 @@ async def start_router(message: Message):
     # =========================
     if payload.startswith("join_"):
         class_id = int(payload.split("_")[1])
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT OR IGNORE INTO members (class_id, user_id, full_name) VALUES (?, ?, ?)",
-            (class_id, message.from_user.id, message.from_user.full_name),
-        )
-        conn.commit()
-        conn.close()
+        await ensure_member_async(class_id, message.from_user.id, message.from_user.full_name)
         await message.answer("🎉 Siz sinfga qo‘shildingiz!")
         return
 
 
-async def send_question(message: Message):
-    st = QUIZ.get(message.from_user.id)
-    if not st:
-        return
-
-    i = st["i"]
-    qs = st["questions"]
+async def send_question(message: Message, session: QuizSession, qs: list):
+    i = session.i
 
     # =========================
     # FINISH
     # =========================
     if i >= len(qs):
+        # sessiyani bitta handler "egallaydi" — natija va XP ikki marta yozilmaydi
+        if not await get_store().finish(session):
+            return
+
         total = len(qs)
-        score = st["score"]
+        score = session.score
         pct = round((score / total) * 100, 1) if total else 0.0
 
-        answers_json = json.dumps(st.get("answers", []), ensure_ascii=False)
-        is_late = int(st.get("is_late", 0))
+        is_late = session.is_late
+
+        # XP hisoblash
+        xp = score * 10
+        if pct == 100:
+            xp += 20
 
-        save_attempt(
-            st["assignment_id"],
-            st["class_id"],
+        # attempt + javoblar + XP bitta tranzaksiyada; group_id class cache’dan
+        group_id = await complete_attempt_async(
+            session.assignment_id,
+            session.class_id,
             message.from_user.id,
             message.from_user.full_name,
             score,
             total,
             pct,
             is_late=is_late,
-            answers_json=answers_json,
+            answers=session.answer_rows(qs),
+            xp=xp,
         )
 
-        # XP hisoblash
-        xp = score * 10
-        if pct == 100:
-            xp += 20
-
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO xp_log (class_id, user_id, full_name, xp) VALUES (?, ?, ?, ?)",
-            (st["class_id"], message.from_user.id, message.from_user.full_name, xp),
-        )
-        conn.commit()
-        conn.close()
-
         # Guruhga natija
-        group_id = get_group_id_by_class(st["class_id"])
         if group_id:
             late_txt = " ⏰ LATE" if is_late else ""
             await message.bot.send_message(
@@ -209,8 +175,6 @@ async def send_question(message: Message):
 
         # ✅ (Bu yerga keyin sertifikat yuborish funksiyangizni qo‘shasiz)
 
-        QUIZ.pop(message.from_user.id, None)
-
         await message.answer(
             f"✅ Tugadi! Natija: {score}/{total} ({pct}%)",
             reply_markup=ReplyKeyboardRemove(),
@@ -221,10 +185,7 @@ async def send_question(message: Message):
     # =========================
     # ASK QUESTION
     # =========================
-    en, correct_uz, opts = qs[i]
-
-    # ko'p tarjima bo'lsa ham, tekshiruv set orqali
-    st["correct_set"] = normalize_correct_for_check(correct_uz)
+    en, _correct_uz, opts = qs[i]
 
     kb = ReplyKeyboardMarkup(
         keyboard=[[KeyboardButton(text=o)] for o in opts],
@@ -240,32 +201,38 @@ async def answer_router(message: Message):
     if (message.text or "").startswith("/"):
         return
 
-    st = QUIZ.get(message.from_user.id)
-    if not st:
-        return
-
+    store = get_store()
     ans = (message.text or "").strip()
-    correct_set = st.get("correct_set", set())
-
-    ok = ans in correct_set
-
-    # ✅ analytics uchun log
-    i = st["i"]
-    en, correct_uz, _opts = st["questions"][i]
-    st["answers"].append(
-        {
-            "en": en,
-            "correct_uz": correct_uz,
-            "chosen": ans,
-            "ok": 1 if ok else 0,
-        }
-    )
+
+    # CAS: boshqa worker sessiyani o‘zgartirgan bo‘lsa (eskirgan LRU), DB’dan qayta o‘qib bir marta urinamiz
+    for _ in range(2):
+        session = await store.get(message.from_user.id)
+        if not session:
+            return
+
+        qs = await questions_for(session, _load_questions)
+        if qs is None or session.i >= len(qs):
+            await store.finish(session)
+            await message.answer(
+                "Bu topshiriq o‘zgartirilgan. Havolani qaytadan bosing.",
+                reply_markup=ReplyKeyboardRemove(),
+            )
+            return
+
+        # ko'p tarjima bo'lsa ham, tekshiruv set orqali
+        correct_set = normalize_correct_for_check(qs[session.i][1])
+        ok = ans in correct_set
+
+        # ✅ analytics uchun log (savol indeksi + tanlangan javob)
+        nxt = session.answered(ans, ok)
+        if await store.save(nxt):
+            break
+    else:
+        return
 
     if ok:
-        st["score"] += 1
         await message.answer("✅ To‘g‘ri!")
     else:
         await message.answer(f"❌ Noto‘g‘ri. To‘g‘risi: {', '.join(sorted(correct_set))}")
 
-    st["i"] += 1
-    await send_question(message)
\ No newline at end of file
+    await send_question(message, nxt, qs)
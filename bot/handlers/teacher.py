@@ -1,8 +1,6 @@
 from __future__ import annotations
 
-import json
 import re
-from collections import Counter
 from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 from bot.services.certificate import get_certificate_safe_path
@@ -24,13 +22,15 @@ from aiogram.types import (
     ReplyKeyboardRemove,
 )
 
-from bot.storage.db import get_conn
 from bot.services.classroom import (
-    create_assignment,
-    get_class_by_group,
-    set_assignment_questions,
-    weekly_top3,
+    class_status_async,
+    create_assignment_async,
+    create_class_async,
+    get_class_by_group_async,
+    get_user_last_attempt_async,
+    set_assignment_questions_async,
 )
+from bot.services import leaderboard
 from bot.services.quiz import build_fixed_quiz
 
 # Sertifikat (sizning xizmat formatiga mos)
@@ -150,20 +150,12 @@ async def do_create_class(message: Message):
     group_id = message.chat.id
     class_name = message.chat.title or "Class"
 
-    existing = get_class_by_group(group_id)
+    existing = await get_class_by_group_async(group_id)
     if existing:
         await message.answer("Bu guruh uchun sinf allaqachon yaratilgan.", reply_markup=teacher_panel_kb())
         return
 
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO classes (name, group_id, teacher_id) VALUES (?, ?, ?)",
-        (class_name, group_id, teacher_id),
-    )
-    class_id = cur.lastrowid
-    conn.commit()
-    conn.close()
+    class_id = await create_class_async(class_name, group_id, teacher_id)
 
     bot_username = (await message.bot.me()).username
     join_link = f"https://t.me/{bot_username}?start=join_{class_id}"
@@ -181,7 +173,7 @@ async def do_give_hw(message: Message, n_questions: int, deadline_hhmm: str | No
         await message.answer("Bu buyruq faqat guruhda ishlaydi.")
         return
 
-    cls = get_class_by_group(message.chat.id)
+    cls = await get_class_by_group_async(message.chat.id)
     if not cls:
         await message.answer("Avval /create_class qiling.", reply_markup=teacher_panel_kb())
         return
@@ -189,11 +181,11 @@ async def do_give_hw(message: Message, n_questions: int, deadline_hhmm: str | No
     class_id = cls[0]
 
     # 1) assignment yaratamiz
-    assignment_id = create_assignment(class_id, n_questions, deadline_hhmm=deadline_hhmm)
+    assignment_id = await create_assignment_async(class_id, n_questions, deadline_hhmm=deadline_hhmm)
 
     # 2) fixed quiz (hamma uchun bir xil) yaratib DB ga saqlaymiz
     fixed = build_fixed_quiz(n_questions, seed=assignment_id, k_options=4)
-    set_assignment_questions(assignment_id, fixed)
+    await set_assignment_questions_async(assignment_id, fixed)
 
     bot_username = (await message.bot.me()).username
     start_link = f"https://t.me/{bot_username}?start=hw_{assignment_id}"
@@ -213,78 +205,55 @@ async def do_give_hw(message: Message, n_questions: int, deadline_hhmm: str | No
     await message.answer("✅ Tayyor.", reply_markup=teacher_panel_kb())
 
 
-async def do_daily_top(message: Message):
+async def _do_top(message: Message, period: str, title: str, empty: str):
     if message.chat.type not in ["group", "supergroup"]:
         return
 
-    conn = get_conn()
-    cur = conn.cursor()
-
-    today = date.today().isoformat()
-
-    cur.execute(
-        """
-        SELECT full_name, SUM(xp) as total
-        FROM xp_log
-        WHERE DATE(created_at)=?
-        GROUP BY user_id
-        ORDER BY total DESC
-        LIMIT 10
-        """,
-        (today,),
-    )
-    rows = cur.fetchall()
-    conn.close()
+    cls = await get_class_by_group_async(message.chat.id)
+    if not cls:
+        await message.answer("Avval /create_class qiling.", reply_markup=teacher_panel_kb())
+        return
+
+    # shu sinfning bugungi / shu haftalik bucket’i (leaderboard.xp_buckets)
+    rows = await leaderboard.top_async(cls[0], period, limit=10)
 
     if not rows:
-        await message.answer("Bugun hali ball yig‘ilmagan.")
+        await message.answer(empty)
         return
 
-    text = "🏅 BUGUNGI TOP:\n\n"
+    text = f"{title}\n\n"
     medals = ["🥇", "🥈", "🥉"]
 
-    for i, (name, total) in enumerate(rows):
+    for i, (_uid, name, total) in enumerate(rows):
         prefix = medals[i] if i < 3 else f"{i+1}."
         text += f"{prefix} {name} — {total} XP\n"
 
     await message.answer(text)
 
 
+async def do_daily_top(message: Message):
+    await _do_top(message, leaderboard.DAY, "🏅 BUGUNGI TOP:", "Bugun hali ball yig‘ilmagan.")
+
+
 async def do_weekly_top(message: Message):
-    if message.chat.type not in ["group", "supergroup"]:
-        return
+    await _do_top(message, leaderboard.WEEK, "🏆 HAFTALIK TOP:", "Haftalik ball hali yo‘q.")
 
-    conn = get_conn()
-    cur = conn.cursor()
-
-    week_ago = (datetime.now(TZ) - timedelta(days=7)).strftime("%Y-%m-%d")
-
-    cur.execute(
-        """
-        SELECT full_name, SUM(xp) as total
-        FROM xp_log
-        WHERE DATE(created_at)>=?
-        GROUP BY user_id
-        ORDER BY total DESC
-        LIMIT 10
-        """,
-        (week_ago,),
-    )
-    rows = cur.fetchall()
-    conn.close()
 
-    if not rows:
-        await message.answer("Haftalik ball hali yo‘q.")
+async def do_my_rank(message: Message):
+    if message.chat.type not in ["group", "supergroup"]:
+        await message.answer("Bu buyruq faqat guruhda ishlaydi.")
         return
 
-    text = "🏆 HAFTALIK TOP:\n\n"
-    medals = ["🥇", "🥈", "🥉"]
+    cls = await get_class_by_group_async(message.chat.id)
+    if not cls:
+        return
 
-    for i, (name, total) in enumerate(rows):
-        prefix = medals[i] if i < 3 else f"{i+1}."
-        text += f"{prefix} {name} — {total} XP\n"
+    lines = [f"👤 {message.from_user.full_name}"]
+    for period, label in ((leaderboard.DAY, "Bugun"), (leaderboard.WEEK, "Shu hafta")):
+        r = await leaderboard.rank_async(cls[0], message.from_user.id, period)
+        lines.append(f"{label}: {r[0]}-o‘rin ({r[1]} XP)" if r else f"{label}: hali ball yo‘q")
 
-    await message.answer(text)
+    await message.answer("\n".join(lines))
 
 
 async def do_status(message: Message):
@@ -292,57 +261,25 @@ async def do_status(message: Message):
         await message.answer("Bu buyruq faqat guruhda ishlaydi.")
         return
 
-    cls = get_class_by_group(message.chat.id)
+    cls = await get_class_by_group_async(message.chat.id)
     if not cls:
         await message.answer("Avval /create_class qiling.", reply_markup=teacher_panel_kb())
         return
 
     class_id = cls[0]
 
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # active assignment
-    cur.execute(
-        """
-        SELECT id, n_questions, deadline_hhmm, deadline_at
-        FROM assignments
-        WHERE class_id=? AND is_active=1
-        ORDER BY id DESC LIMIT 1
-        """,
-        (class_id,),
-    )
-    a = cur.fetchone()
+    # active assignment + members + attempts + ko‘p xato qilingan savollar (bitta connection)
+    a, members, attempts, missed = await class_status_async(class_id)
 
     if not a:
-        conn.close()
         await message.answer("Aktiv topshiriq yo‘q.", reply_markup=teacher_panel_kb())
         return
 
     assignment_id, n_q, deadline_hhmm, deadline_at = a
 
-    # members
-    cur.execute(
-        "SELECT user_id, full_name FROM members WHERE class_id=? ORDER BY joined_at ASC",
-        (class_id,),
-    )
-    members = cur.fetchall()
-
-    # attempts
-    cur.execute(
-        """
-        SELECT user_id, full_name, score, total, pct, is_late, answers_json
-        FROM attempts
-        WHERE class_id=? AND assignment_id=?
-        """,
-        (class_id, assignment_id),
-    )
-    attempts = cur.fetchall()
-    conn.close()
-
     done_map = {
-        uid: (name, score, total, pct, is_late, answers_json)
-        for (uid, name, score, total, pct, is_late, answers_json) in attempts
+        uid: (name, score, total, pct, is_late)
+        for (uid, name, score, total, pct, is_late) in attempts
     }
 
     done, late, pending = [], [], []
@@ -354,7 +291,7 @@ async def do_status(message: Message):
             "O'quvchilar join link orqali qo'shilsa pending ham ko'rinadi."
         )
         for uid, name, *_rest in attempts:
-            is_late = int(done_map.get(uid, (None, None, None, None, 0, None))[4] or 0)
+            is_late = int(done_map.get(uid, (None, None, None, None, 0))[4] or 0)
             (late if is_late else done).append(name)
     else:
         for uid, name in members:
@@ -369,23 +306,8 @@ async def do_status(message: Message):
     if attempts:
         avg = sum((r[2] or 0) for r in attempts) / len(attempts)
 
-    # analytics: most missed questions (top 5)
-    miss_counter = Counter()
-    for r in attempts:
-        answers_json = r[6]
-        if not answers_json:
-            continue
-        try:
-            answers = json.loads(answers_json)
-        except Exception:
-            continue
-        for it in answers:
-            if int(it.get("ok", 0)) == 0:
-                en = str(it.get("en", "")).strip()
-                if en:
-                    miss_counter[en] += 1
-
-    top_missed = miss_counter.most_common(5)
+    # analytics: most missed questions (top 5) — attempt_answers agregati
+    top_missed = [(en, n_missed) for _qi, en, _answered, n_missed in missed if en]
 
     text = (
         f"📌 STATUS — Assignment #{assignment_id}\n"
@@ -443,47 +365,21 @@ async def do_get_cert(message: Message):
         await message.answer("Bu tugma faqat guruhda ishlaydi.")
         return
 
-    cls = get_class_by_group(message.chat.id)
+    cls = await get_class_by_group_async(message.chat.id)
     if not cls:
         await message.answer("Avval sinf yarating (🏫 Sinfni yaratish).", reply_markup=teacher_panel_kb())
         return
 
     class_id = cls[0]
 
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # oxirgi aktiv assignment
-    cur.execute(
-        """
-        SELECT id, n_questions
-        FROM assignments
-        WHERE class_id=? AND is_active=1
-        ORDER BY id DESC LIMIT 1
-        """,
-        (class_id,),
-    )
-    a = cur.fetchone()
+    # oxirgi aktiv assignment + sertifikat kimga? (hozircha teacher o'zi uchun test variant)
+    a, r = await get_user_last_attempt_async(class_id, message.from_user.id)
     if not a:
-        conn.close()
         await message.answer("Aktiv topshiriq yo‘q.", reply_markup=teacher_panel_kb())
         return
 
     assignment_id, total = a
 
-    # Sertifikat kimga? (hozircha teacher o'zi uchun test variant)
-    cur.execute(
-        """
-        SELECT score, total, pct
-        FROM attempts
-        WHERE class_id=? AND assignment_id=? AND user_id=?
-        ORDER BY id DESC LIMIT 1
-        """,
-        (class_id, assignment_id, message.from_user.id),
-    )
-    r = cur.fetchone()
-    conn.close()
-
     if not r:
         await message.answer(
             "Siz bu topshiriqni hali topshirmagansiz.\n"
@@ -552,6 +448,11 @@ async def weekly_top_cmd(message: Message):
     await do_weekly_top(message)
 
 
+@router.message(Command("my_rank"))
+async def my_rank_cmd(message: Message):
+    await do_my_rank(message)
+
+
 @router.message(Command("test_cert"))
 async def test_cert_cmd(message: Message):
     await do_cert_test(message)
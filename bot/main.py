@@ -4,18 +4,12 @@
 import asyncio
 from aiogram import Bot, Dispatcher
 
-from bot.storage.db import init_db
+from bot.storage.db import close_async_pool, init_db, open_async_pool
 from bot.handlers.teacher import router as teacher_router
 from bot.handlers.student import router as student_router
 from bot.services.announcer import announcer_loop
-
-# ✅ weekly job importlari
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
-
-from bot.services.classroom import (
-    list_classes, weekly_top3, week_start_date, mark_weekly_run_if_new
-)
+from bot.services.sender import get_scheduler
+from bot.services.weekly import weekly_job
 
 
 def _get_token() -> str:
@@ -30,46 +24,13 @@ def _get_token() -> str:
     return t
 
 
-async def weekly_job(bot: Bot):
-    tz = ZoneInfo("Asia/Samarkand")
-
-    while True:
-        now = datetime.now(tz)
-        print("weekly_job tick:", now)
-        # Yakshanba = 6 (Mon=0 ... Sun=6)
-        if now.weekday() == 6 and now.hour == 21 and now.minute in (0, 1):
-            week_start = week_start_date(now)
-            week_end = now.strftime("%Y-%m-%d")
-
-            classes = list_classes()
-            for class_id, class_name, group_id in classes:
-                # anti-duplicate (har hafta 1 marta)
-                if not mark_weekly_run_if_new(class_id, week_start):
-                    continue
-
-                top = weekly_top3(class_id, days=7)
-                if not top:
-                    await bot.send_message(group_id, "🏁 Haftalik yakun: bu hafta ball yig‘ilmagan.")
-                    continue
-
-                # Group post
-                lines = ["🏆 HAFTALIK TOP-3", f"📅 {week_start} — {week_end}", ""]
-                medals = ["🥇", "🥈", "🥉"]
-                for i, (_, name, xp) in enumerate(top):
-                    lines.append(f"{medals[i]} {name} — {int(xp)} XP")
-                await bot.send_message(group_id, "\n".join(lines))
-
-
-            # shu minutda qayta post bo‘lmasin
-            await asyncio.sleep(120)
-        else:
-            await asyncio.sleep(30)
-        
-
 async def main():
     init_db()
+    await open_async_pool()
 
     bot = Bot(_get_token())
+    # hamma chiquvchi xabarlar: per-chat / umumiy rate limit, 429 retry
+    bot.session.middleware(get_scheduler())
     dp = Dispatcher()
     from bot.handlers.common import router as common_router
     dp.include_router(common_router)
@@ -80,7 +41,10 @@ async def main():
     # ✅ MANASHU JOY: pollingdan oldin weekly jobni ishga tushiramiz
     asyncio.create_task(weekly_job(bot))
 
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await close_async_pool()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,11 +1,133 @@
+"""
+Announcements navbati -> guruhlarga "Yangi topshiriq" xabari.
+
+- uyg‘onish: Postgres LISTEN/NOTIFY (create_assignment_web enqueue tranzaksiyasida notify_in_tx() —
+  NOTIFY commit bilan yetkaziladi) yoki shu process’da notify_pending() (asyncio.Event);
+  interval_sec — faqat zaxira poll (masalan Streamlit SQLite’ga yozsa)
+- reclaim: yiqilgan worker’ning 'sending' qatorlari har CLAIM_TIMEOUT’da qaytariladi (nima uyg‘otganidan qat’i nazar)
+- claim: UPDATE ... status='sending' WHERE id IN (... FOR UPDATE SKIP LOCKED) RETURNING — bir nechta
+  worker bitta navbatni bo‘lishadi, bitta xabar ikki marta ketmaydi
+- yuborish: bir vaqtda CONCURRENCY tagacha, sender.broadcast() lane’ida (rate limit va
+  TelegramRetryAfter — bot/services/sender.py scheduler’ida)
+"""
+from __future__ import annotations
+
 import asyncio
+import logging
+import os
+import time
+
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from bot.storage.db import get_conn
+from bot.services.sender import broadcast
+from bot.storage.db import aconnection, alisten
+from core import sql
+
+CHANNEL = "bot_announcements"
+BATCH_SIZE = int(os.getenv("ANNOUNCER_BATCH", "50"))
+CONCURRENCY = int(os.getenv("ANNOUNCER_CONCURRENCY", "8"))
+CLAIM_TIMEOUT = 300  # 'sending'da shuncha soniyadan ko‘p qolgan (worker yiqilgan) claim qaytariladi
+
+
+# =========================
+# SQL
+# =========================
+_CLAIM = sql.define(
+    "announcer.claim",
+    """
+    UPDATE announcements SET status='sending', claimed_at=?
+    WHERE id IN (
+        SELECT id FROM announcements WHERE status='pending' ORDER BY id ASC LIMIT ?
+    )
+    RETURNING id, assignment_id,
+        (SELECT c.group_id FROM classes c WHERE c.id = announcements.class_id),
+        (SELECT c.name FROM classes c WHERE c.id = announcements.class_id)
+    """,
+    postgres="""
+    UPDATE announcements SET status='sending', claimed_at=?
+    WHERE id IN (
+        SELECT id FROM announcements WHERE status='pending' ORDER BY id ASC LIMIT ?
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, assignment_id,
+        (SELECT c.group_id FROM classes c WHERE c.id = announcements.class_id),
+        (SELECT c.name FROM classes c WHERE c.id = announcements.class_id)
+    """,
+)
+_RECLAIM = sql.define(
+    "announcer.reclaim",
+    "UPDATE announcements SET status='pending', claimed_at=NULL WHERE status='sending' AND claimed_at < ?",
+)
+_MARK_SENT = sql.define(
+    "announcer.mark_sent",
+    "UPDATE announcements SET status='sent', sent_at=CURRENT_TIMESTAMP, error=NULL WHERE id=?",
+)
+_MARK_ERROR = sql.define("announcer.mark_error", "UPDATE announcements SET status='error', error=? WHERE id=?")
+_NOTIFY = sql.define("announcer.notify", f"SELECT pg_notify('{CHANNEL}', '')")
+
+
+# =========================
+# WAKE-UP
+# =========================
+_WAKE: asyncio.Event | None = None
+_LOOP: asyncio.AbstractEventLoop | None = None
+
+
+def notify_in_tx(conn) -> None:
+    """
+    Enqueue qilgan tranzaksiya ichida, commit’dan OLDIN (sync conn). Postgres NOTIFY’ni commit’da
+    yetkazadi (rollback bo‘lsa — yo‘q); alohida commit yo‘q. SQLite’da hech narsa qilmaydi.
+    """
+    if sql.dialect_of(conn) == sql.POSTGRES:
+        sql.execute(conn, _NOTIFY)
+
+
+def notify_pending() -> None:
+    """
+    Commit’dan keyin, shu process’dagi announcer’ni uyg‘otadi (har qanday thread’dan).
+    Best-effort: xato chaqiruvchiga chiqmaydi — zaxira poll baribir oladi.
+    """
+    loop, wake = _LOOP, _WAKE
+    if loop is None or wake is None or loop.is_closed():
+        return
+    try:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wake.set()
+        else:
+            loop.call_soon_threadsafe(wake.set)
+    except Exception:
+        logging.exception("announcer wake xatosi")
+
+
+async def _listen(wake: asyncio.Event) -> None:
+    """Postgres NOTIFY -> wake; uzilsa qayta ulanadi. SQLite’da darhol qaytadi."""
+    delay = 1.0
+    while True:
+        try:
+            async with alisten(CHANNEL) as conn:
+                if conn is None:
+                    return
+                delay = 1.0
+                wake.set()  # ulanmagan paytda kelgan NOTIFY’lar yo‘qolgan bo‘lishi mumkin
+                async for _ in conn.notifies():
+                    wake.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.exception("announcer LISTEN uzildi, %.0fs dan keyin qayta ulanamiz", delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60.0)
 
 
+# =========================
+# DISPATCH
+# =========================
 def _build_start_button(bot_username: str, assignment_id: int) -> InlineKeyboardMarkup:
     # Sizning student.py da payload: /start hw_<id> ishlaydi ✅
     url = f"https://t.me/{bot_username}?start=hw_{assignment_id}"
@@ -14,60 +136,95 @@ def _build_start_button(bot_username: str, assignment_id: int) -> InlineKeyboard
     return kb.as_markup()
 
 
+async def _send_one(bot: Bot, bot_username: str, row, sem: asyncio.Semaphore) -> str | None:
+    """None — yuborildi, aks holda xato matni."""
+    _ann_id, assignment_id, group_id, class_name = row
+    if group_id is None:
+        return "class topilmadi"
+    text = (
+        f"📢 Yangi topshiriq!\n"
+        f"🏫 Sinf: {class_name}\n"
+        f"🆔 Assignment: {assignment_id}\n\n"
+        f"👇 Testni boshlash uchun tugmani bosing:"
+    )
+    async with sem:
+        try:
+            kb = _build_start_button(bot_username, int(assignment_id))
+            await bot.send_message(chat_id=int(group_id), text=text, reply_markup=kb)
+            return None
+        except Exception as e:
+            return str(e)[:500]
+
+
+async def dispatch_once(
+    bot: Bot,
+    bot_username: str,
+    *,
+    batch_size: int = BATCH_SIZE,
+    concurrency: int = CONCURRENCY,
+) -> int:
+    """Bitta batch: claim -> parallel yuborish -> natijalarni yozish. Claim qilingan qatorlar soni."""
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _CLAIM, (time.time(), batch_size))
+        rows = [tuple(r) for r in await cur.fetchall()]
+        await conn.commit()
+    if not rows:
+        return 0
+
+    sem = asyncio.Semaphore(concurrency)
+    with broadcast():
+        errors = await asyncio.gather(*(_send_one(bot, bot_username, r, sem) for r in rows))
+
+    sent = [(r[0],) for r, err in zip(rows, errors) if err is None]
+    failed = [(err, r[0]) for r, err in zip(rows, errors) if err is not None]
+    async with aconnection() as conn:
+        if sent:
+            await sql.aexecutemany(conn, _MARK_SENT, sent)
+        if failed:
+            await sql.aexecutemany(conn, _MARK_ERROR, failed)
+        await conn.commit()
+    return len(rows)
+
+
+async def _reclaim_stale() -> None:
+    async with aconnection() as conn:
+        await sql.aexecute(conn, _RECLAIM, (time.time() - CLAIM_TIMEOUT,))
+        await conn.commit()
+
+
 async def announcer_loop(bot: Bot, interval_sec: int = 10):
+    global _WAKE, _LOOP
+    _LOOP, _WAKE = asyncio.get_running_loop(), asyncio.Event()
+    wake = _WAKE
+    listener = asyncio.create_task(_listen(wake))
+
     me = await bot.get_me()
     bot_username = me.username  # masalan: LugatProBot
-    print("🔁 announcer tick")
     print("📌 announcer db =", __import__("bot.storage.db").storage.db.DB_PATH)
-    while True:
-        try:
-            conn = get_conn()
-            cur = conn.cursor()
-
-            # pending announcementlarni olamiz
-            cur.execute("""
-                SELECT a.id, a.class_id, a.assignment_id, c.group_id, c.name
-                FROM announcements a
-                JOIN classes c ON c.id = a.class_id
-                WHERE a.status='pending'
-                ORDER BY a.id ASC
-                LIMIT 5
-            """)
-            rows = cur.fetchall()
-
-            for r in rows:
-                ann_id = r["id"] if isinstance(r, dict) or hasattr(r, "keys") else r[0]
-                class_id = r["class_id"] if isinstance(r, dict) or hasattr(r, "keys") else r[1]
-                assignment_id = r["assignment_id"] if isinstance(r, dict) or hasattr(r, "keys") else r[2]
-                group_id = r["group_id"] if isinstance(r, dict) or hasattr(r, "keys") else r[3]
-                class_name = r["name"] if isinstance(r, dict) or hasattr(r, "keys") else r[4]
-
+    last_reclaim = -CLAIM_TIMEOUT  # startup’da darhol bir marta
+    try:
+        while True:
+            # notify oqimi yoki to‘la batch’lar uzluksiz kelsa ham, osilib qolgan claim’lar qaytadi
+            if time.monotonic() - last_reclaim >= CLAIM_TIMEOUT:
+                last_reclaim = time.monotonic()
                 try:
-                    kb = _build_start_button(bot_username, int(assignment_id))
-                    text = (
-                        f"📢 Yangi topshiriq!\n"
-                        f"🏫 Sinf: {class_name}\n"
-                        f"🆔 Assignment: {assignment_id}\n\n"
-                        f"👇 Testni boshlash uchun tugmani bosing:"
-                    )
-                    await bot.send_message(chat_id=int(group_id), text=text, reply_markup=kb)
-
-                    cur.execute(
-                        "UPDATE announcements SET status='sent', sent_at=CURRENT_TIMESTAMP, error=NULL WHERE id=?",
-                        (ann_id,),
-                    )
-                    conn.commit()
-                except Exception as e:
-                    cur.execute(
-                        "UPDATE announcements SET status='error', error=? WHERE id=?",
-                        (str(e)[:500], ann_id),
-                    )
-                    conn.commit()
-
-            conn.close()
+                    await _reclaim_stale()
+                except Exception:
+                    logging.exception("announcer reclaim xatosi")
 
-        except Exception:
-            # katta yiqilish bo‘lsa ham loop to‘xtamasin
-            pass
+            wake.clear()  # dispatch paytida kelgan notify keyingi aylanishda ko‘rinadi
+            try:
+                n = await dispatch_once(bot, bot_username)
+            except Exception:
+                # katta yiqilish bo‘lsa ham loop to‘xtamasin
+                logging.exception("announcer dispatch xatosi")
+                n = 0
+            if n >= BATCH_SIZE:
+                continue  # navbatda yana bor
 
-        await asyncio.sleep(interval_sec)
\ No newline at end of file
+            try:
+                await asyncio.wait_for(wake.wait(), interval_sec)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        listener.cancel()
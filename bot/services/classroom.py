@@ -2,16 +2,159 @@ from __future__ import annotations
 
 import json
 import re
+import time
 from datetime import datetime, timedelta
+from typing import Iterable
 from zoneinfo import ZoneInfo
 
-from bot.storage.db import get_conn
+from bot.services import leaderboard
+from bot.storage.db import aconnection, get_conn
+from core import sql
 
 TZ = ZoneInfo("Asia/Samarkand")
+GROUP_CACHE_TTL = 600  # class -> group_id (guruh supergroup’ga o‘tsa id o‘zgaradi, shuning uchun abadiy emas)
 
 
-def _is_psycopg_conn(conn) -> bool:
-    return conn.__class__.__module__.startswith("psycopg")
+# =========================
+# SQL (core.sql registri — SQLite/Postgres uchun bir marta compile qilinadi)
+# =========================
+_CLASS_BY_GROUP = sql.define(
+    "classroom.class_by_group",
+    "SELECT id, name, group_id, teacher_id FROM classes WHERE group_id=? ORDER BY id DESC LIMIT 1",
+)
+_GROUP_BY_CLASS = sql.define("classroom.group_by_class", "SELECT group_id FROM classes WHERE id=?")
+_CLASS_NAME = sql.define("classroom.class_name", "SELECT name FROM classes WHERE id=?")
+_LIST_CLASSES = sql.define("classroom.list_classes", "SELECT id, name, group_id FROM classes")
+_INSERT_CLASS = sql.define(
+    "classroom.insert_class",
+    "INSERT INTO classes (name, group_id, teacher_id) VALUES (?, ?, ?) RETURNING id",
+)
+_ENSURE_MEMBER = sql.define(
+    "classroom.ensure_member",
+    """
+    INSERT INTO members (class_id, user_id, full_name)
+    VALUES (?, ?, ?)
+    ON CONFLICT (class_id, user_id) DO NOTHING
+    """,
+)
+
+_INSERT_ASSIGNMENT = sql.define(
+    "classroom.insert_assignment",
+    """
+    INSERT INTO assignments (class_id, n_questions, deadline_hhmm, deadline_at)
+    VALUES (?, ?, ?, ?)
+    RETURNING id
+    """,
+)
+_ACTIVE_ASSIGNMENT = sql.define(
+    "classroom.active_assignment",
+    "SELECT id, n_questions, deadline_hhmm FROM assignments WHERE class_id=? AND is_active=1 ORDER BY id DESC LIMIT 1",
+)
+_ACTIVE_ASSIGNMENT_FULL = sql.define(
+    "classroom.active_assignment_full",
+    """
+    SELECT id, n_questions, deadline_hhmm, deadline_at
+    FROM assignments
+    WHERE class_id=? AND is_active=1
+    ORDER BY id DESC LIMIT 1
+    """,
+)
+_ASSIGNMENT_ROW = sql.define(
+    "classroom.assignment_row",
+    "SELECT id, class_id, n_questions, is_active FROM assignments WHERE id=?",
+)
+_SET_QUESTIONS = sql.define("classroom.set_questions", "UPDATE assignments SET questions_json=? WHERE id=?")
+_GET_QUESTIONS = sql.define("classroom.get_questions", "SELECT questions_json FROM assignments WHERE id=?")
+_DEADLINE_INFO = sql.define(
+    "classroom.deadline_info",
+    "SELECT created_at, deadline_hhmm, deadline_at FROM assignments WHERE id=?",
+)
+_ACTIVE_DEADLINE_INFO = sql.define(
+    "classroom.active_deadline_info",
+    "SELECT created_at, deadline_hhmm, deadline_at FROM assignments WHERE id=? AND is_active=1",
+)
+_SET_DEADLINE_AT = sql.define("classroom.set_deadline_at", "UPDATE assignments SET deadline_at=? WHERE id=?")
+
+_SAVE_ATTEMPT = sql.define(
+    "classroom.save_attempt",
+    """
+    INSERT INTO attempts
+    (assignment_id, class_id, user_id, full_name, score, total, pct, is_late, answers_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (assignment_id, user_id)
+    DO UPDATE SET
+        full_name=excluded.full_name,
+        score=excluded.score,
+        total=excluded.total,
+        pct=excluded.pct,
+        is_late=excluded.is_late,
+        answers_json=excluded.answers_json,
+        finished_at=CURRENT_TIMESTAMP
+    """,
+)
+_CLASS_MEMBERS = sql.define(
+    "classroom.class_members",
+    "SELECT user_id, full_name FROM members WHERE class_id=? ORDER BY joined_at ASC",
+)
+_ASSIGNMENT_ATTEMPTS = sql.define(
+    "classroom.assignment_attempts",
+    """
+    SELECT user_id, full_name, score, total, pct, is_late
+    FROM attempts
+    WHERE class_id=? AND assignment_id=?
+    """,
+)
+_DELETE_ANSWERS = sql.define(
+    "classroom.delete_answers",
+    "DELETE FROM attempt_answers WHERE assignment_id=? AND user_id=?",
+)
+# bitta statement bilan hamma javoblar: ? — [[question_idx, chosen_id, ok], ...] JSON (executemany — har qator alohida)
+_INSERT_ANSWERS = sql.define(
+    "classroom.insert_answers",
+    """
+    INSERT INTO attempt_answers (assignment_id, user_id, question_idx, chosen_id, ok)
+    SELECT ?, ?, json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]')
+    FROM json_each(?)
+    """,
+    postgres="""
+    INSERT INTO attempt_answers (assignment_id, user_id, question_idx, chosen_id, ok)
+    SELECT ?, ?, (e->>0)::int, (e->>1)::int, (e->>2)::int
+    FROM jsonb_array_elements(?::jsonb) AS e
+    """,
+)
+# idx_attempt_answers_item (assignment_id, question_idx, ok) — jadvalga tegmasdan agregat
+_QUESTION_STATS = sql.define(
+    "classroom.question_stats",
+    """
+    SELECT question_idx, COUNT(*) AS answered, SUM(1 - ok) AS missed
+    FROM attempt_answers
+    WHERE assignment_id=?
+    GROUP BY question_idx
+    ORDER BY missed DESC, question_idx
+    """,
+)
+_USER_ATTEMPT = sql.define(
+    "classroom.user_attempt",
+    """
+    SELECT score, total, pct
+    FROM attempts
+    WHERE class_id=? AND assignment_id=? AND user_id=?
+    ORDER BY id DESC LIMIT 1
+    """,
+)
+
+_ADD_XP = sql.define(
+    "classroom.add_xp",
+    "INSERT INTO xp_log (class_id, user_id, full_name, xp) VALUES (?, ?, ?, ?)",
+)
+_MARK_WEEKLY_RUN = sql.define(
+    "classroom.mark_weekly_run",
+    """
+    INSERT INTO weekly_runs (class_id, week_start)
+    VALUES (?, ?)
+    ON CONFLICT (class_id, week_start) DO NOTHING
+    """,
+)
 
 
 # =========================
@@ -20,61 +163,35 @@ def _is_psycopg_conn(conn) -> bool:
 
 def get_class_by_group(group_id: int):
     conn = get_conn()
-    cur = conn.cursor()
-
-    sql = (
-        "SELECT id, name, group_id, teacher_id FROM classes WHERE group_id=%s ORDER BY id DESC LIMIT 1"
-        if _is_psycopg_conn(conn)
-        else
-        "SELECT id, name, group_id, teacher_id FROM classes WHERE group_id=? ORDER BY id DESC LIMIT 1"
-    )
-
-    cur.execute(sql, (group_id,))
-    row = cur.fetchone()
+    row = sql.execute(conn, _CLASS_BY_GROUP, (group_id,)).fetchone()
     conn.close()
     return row
 
 
 def get_group_id_by_class(class_id: int) -> int | None:
     conn = get_conn()
-    cur = conn.cursor()
+    row = sql.execute(conn, _GROUP_BY_CLASS, (class_id,)).fetchone()
+    conn.close()
+    return int(row[0]) if row else None
 
-    sql = "SELECT group_id FROM classes WHERE id=%s" if _is_psycopg_conn(conn) else "SELECT group_id FROM classes WHERE id=?"
-    cur.execute(sql, (class_id,))
-    row = cur.fetchone()
 
+def get_class_name(class_id: int) -> str:
+    conn = get_conn()
+    row = sql.execute(conn, _CLASS_NAME, (class_id,)).fetchone()
     conn.close()
-    return int(row[0]) if row else None
+    return (row[0] if row and row[0] else "Class")
 
 
 def ensure_member(class_id: int, user_id: int, full_name: str) -> None:
     conn = get_conn()
-    cur = conn.cursor()
-
-    if _is_psycopg_conn(conn):
-        cur.execute(
-            """
-            INSERT INTO members (class_id, user_id, full_name)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (class_id, user_id) DO NOTHING
-            """,
-            (class_id, user_id, full_name),
-        )
-    else:
-        cur.execute(
-            "INSERT OR IGNORE INTO members (class_id, user_id, full_name) VALUES (?, ?, ?)",
-            (class_id, user_id, full_name),
-        )
-
+    sql.execute(conn, _ENSURE_MEMBER, (class_id, user_id, full_name))
     conn.commit()
     conn.close()
 
 
 def list_classes():
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, name, group_id FROM classes")
-    rows = cur.fetchall()
+    rows = sql.execute(conn, _LIST_CLASSES).fetchall()
     conn.close()
     return rows
 
@@ -106,43 +223,8 @@ def create_assignment(class_id: int, n_questions: int, deadline_hhmm: str | None
     dl_at = _deadline_at_for_today(deadline_hhmm)
 
     conn = get_conn()
-    cur = conn.cursor()
-
-    if _is_psycopg_conn(conn):
-        # Postgres
-        try:
-            cur.execute(
-                """
-                INSERT INTO assignments (class_id, n_questions, deadline_hhmm, deadline_at)
-                VALUES (%s, %s, %s, %s)
-                RETURNING id
-                """,
-                (class_id, n_questions, deadline_hhmm, dl_at),
-            )
-            aid = cur.fetchone()[0]
-        except Exception:
-            cur.execute(
-                """
-                INSERT INTO assignments (class_id, n_questions, deadline_hhmm)
-                VALUES (%s, %s, %s)
-                RETURNING id
-                """,
-                (class_id, n_questions, deadline_hhmm),
-            )
-            aid = cur.fetchone()[0]
-    else:
-        # SQLite
-        try:
-            cur.execute(
-                "INSERT INTO assignments (class_id, n_questions, deadline_hhmm, deadline_at) VALUES (?, ?, ?, ?)",
-                (class_id, n_questions, deadline_hhmm, dl_at),
-            )
-        except Exception:
-            cur.execute(
-                "INSERT INTO assignments (class_id, n_questions, deadline_hhmm) VALUES (?, ?, ?)",
-                (class_id, n_questions, deadline_hhmm),
-            )
-        aid = cur.lastrowid
+    cur = sql.execute(conn, _INSERT_ASSIGNMENT, (class_id, n_questions, deadline_hhmm, dl_at))
+    aid = cur.fetchone()[0]
 
     conn.commit()
     conn.close()
@@ -151,49 +233,26 @@ def create_assignment(class_id: int, n_questions: int, deadline_hhmm: str | None
 
 def get_active_assignment(class_id: int):
     conn = get_conn()
-    cur = conn.cursor()
-
-    sql = (
-        "SELECT id, n_questions, deadline_hhmm FROM assignments WHERE class_id=%s AND is_active=1 ORDER BY id DESC LIMIT 1"
-        if _is_psycopg_conn(conn)
-        else
-        "SELECT id, n_questions, deadline_hhmm FROM assignments WHERE class_id=? AND is_active=1 ORDER BY id DESC LIMIT 1"
-    )
-
-    cur.execute(sql, (class_id,))
-    row = cur.fetchone()
+    row = sql.execute(conn, _ACTIVE_ASSIGNMENT, (class_id,)).fetchone()
     conn.close()
     return row
 
 
 def set_assignment_questions(assignment_id: int, questions_payload: list) -> None:
     conn = get_conn()
-    cur = conn.cursor()
-    sql = (
-        "UPDATE assignments SET questions_json=%s WHERE id=%s"
-        if _is_psycopg_conn(conn)
-        else
-        "UPDATE assignments SET questions_json=? WHERE id=?"
-    )
-    cur.execute(sql, (json.dumps(questions_payload, ensure_ascii=False), assignment_id))
+    sql.execute(conn, _SET_QUESTIONS, (json.dumps(questions_payload, ensure_ascii=False), assignment_id))
     conn.commit()
     conn.close()
 
 
-import json
-from bot.storage.db import get_conn
-
 def get_assignment_questions(assignment_id: int):
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT questions_json FROM assignments WHERE id=?", (int(assignment_id),))
-    row = cur.fetchone()
+    row = sql.execute(conn, _GET_QUESTIONS, (int(assignment_id),)).fetchone()
     conn.close()
+    return _parse_questions_json(row[0] if row else None)
 
-    if not row:
-        return []
 
-    qj = row["questions_json"] if hasattr(row, "keys") else row[0]
+def _parse_questions_json(qj) -> list:
     if not qj:
         return []
 
@@ -206,7 +265,7 @@ def get_assignment_questions(assignment_id: int):
             return []
 
     # ✅ 2) Agar dict bo'lsa, ichidan "questions" ni olamiz
-    # Siz create_assignment_web() da shunaqa saqlayapsiz:
+    # create_assignment_web() shunaqa saqlaydi:
     # fixed = {"n_questions":..., "seed":..., "questions": []}
     if isinstance(qj, dict):
         qj = qj.get("questions") or []
@@ -216,54 +275,52 @@ def get_assignment_questions(assignment_id: int):
         return []
 
     # ✅ 4) elementlar dict bo'lishi kerak
-    out = []
-    for item in qj:
-        if isinstance(item, dict) and "en" in item and "uz" in item:
-            out.append(item)
+    return [item for item in qj if isinstance(item, dict) and "en" in item and "uz" in item]
 
-    return out
-
-def _ensure_deadline_at(assignment_id: int) -> None:
-    """If deadline_at is empty but deadline_hhmm exists, compute deadline_at from created_at date (SQLite side)."""
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # Bu helper asosan sqlite uchun kerak, postgresda deadline_at odatda bor bo‘ladi
-    try:
-        cur.execute("SELECT created_at, deadline_hhmm, deadline_at FROM assignments WHERE id=?", (assignment_id,))
-    except Exception:
-        conn.close()
-        return
 
-    row = cur.fetchone()
-    if not row:
-        conn.close()
-        return
+def _as_deadline(value) -> datetime | None:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dl = value
+    else:
+        try:
+            dl = datetime.fromisoformat(str(value))
+        except Exception:
+            return None
+    return dl if dl.tzinfo else dl.replace(tzinfo=TZ)
 
-    created_at, deadline_hhmm, deadline_at = row
-    if deadline_at or not deadline_hhmm:
-        conn.close()
-        return
 
+def _deadline_from_created(created_at, deadline_hhmm: str | None) -> datetime | None:
+    """deadline_at bo‘sh bo‘lsa: created_at sanasi + deadline_hhmm."""
     hhmm = _parse_deadline_hhmm(deadline_hhmm)
     if not hhmm:
-        conn.close()
-        return
-    hh, mm = hhmm
-
+        return None
     date_part = str(created_at).split(" ")[0].split("T")[0]
     try:
         y, mo, d = map(int, date_part.split("-"))
     except Exception:
-        conn.close()
-        return
+        return None
+    return datetime(y, mo, d, hhmm[0], hhmm[1], 0, tzinfo=TZ)
 
-    dl = datetime(y, mo, d, hh, mm, 0, tzinfo=TZ).isoformat()
+
+def _ensure_deadline_at(assignment_id: int) -> None:
+    """If deadline_at is empty but deadline_hhmm exists, compute deadline_at from created_at date (SQLite side)."""
+    conn = get_conn()
     try:
-        cur.execute("UPDATE assignments SET deadline_at=? WHERE id=?", (dl, assignment_id))
+        row = sql.execute(conn, _DEADLINE_INFO, (assignment_id,)).fetchone()
+        if not row:
+            return
+
+        created_at, deadline_hhmm, deadline_at = row[0], row[1], row[2]
+        if deadline_at or not deadline_hhmm:
+            return
+
+        dl = _deadline_from_created(created_at, deadline_hhmm)
+        if dl is None:
+            return
+        sql.execute(conn, _SET_DEADLINE_AT, (dl.isoformat(), assignment_id))
         conn.commit()
-    except Exception:
-        pass
     finally:
         conn.close()
 
@@ -272,30 +329,12 @@ def is_assignment_late(assignment_id: int) -> bool:
     _ensure_deadline_at(assignment_id)
 
     conn = get_conn()
-    cur = conn.cursor()
-
-    sql = (
-        "SELECT deadline_at FROM assignments WHERE id=%s AND is_active=1"
-        if _is_psycopg_conn(conn)
-        else
-        "SELECT deadline_at FROM assignments WHERE id=? AND is_active=1"
-    )
-    try:
-        cur.execute(sql, (assignment_id,))
-    except Exception:
-        conn.close()
-        return False
-
-    row = cur.fetchone()
+    row = sql.execute(conn, _ACTIVE_DEADLINE_INFO, (assignment_id,)).fetchone()
     conn.close()
-    if not row or not row[0]:
-        return False
 
-    try:
-        dl = datetime.fromisoformat(row[0])
-    except Exception:
+    dl = _as_deadline(row[2]) if row else None
+    if dl is None:
         return False
-
     return datetime.now(TZ) > dl
 
 
@@ -316,36 +355,11 @@ def save_attempt(
     answers_json: str | None = None,
 ) -> None:
     conn = get_conn()
-    cur = conn.cursor()
-
-    if _is_psycopg_conn(conn):
-        cur.execute(
-            """
-            INSERT INTO attempts
-            (assignment_id, class_id, user_id, full_name, score, total, pct, is_late, answers_json)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (assignment_id, user_id)
-            DO UPDATE SET
-                full_name=EXCLUDED.full_name,
-                score=EXCLUDED.score,
-                total=EXCLUDED.total,
-                pct=EXCLUDED.pct,
-                is_late=EXCLUDED.is_late,
-                answers_json=EXCLUDED.answers_json,
-                finished_at=NOW()
-            """,
-            (assignment_id, class_id, user_id, full_name, score, total, pct, int(is_late), answers_json),
-        )
-    else:
-        cur.execute(
-            """
-            INSERT OR REPLACE INTO attempts
-            (assignment_id, class_id, user_id, full_name, score, total, pct, is_late, answers_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (assignment_id, class_id, user_id, full_name, score, total, pct, int(is_late), answers_json),
-        )
-
+    sql.execute(
+        conn,
+        _SAVE_ATTEMPT,
+        (assignment_id, class_id, user_id, full_name, score, total, pct, int(is_late), answers_json),
+    )
     conn.commit()
     conn.close()
 
@@ -359,61 +373,220 @@ def week_start_date(dt: datetime) -> str:
     return monday.strftime("%Y-%m-%d")
 
 
-def weekly_top3(class_id: int, days: int = 7):
-    conn = get_conn()
-    cur = conn.cursor()
-    since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-
-    if _is_psycopg_conn(conn):
-        cur.execute(
-            """
-            SELECT user_id, full_name, SUM(xp) as total
-            FROM xp_log
-            WHERE class_id=%s AND created_at::date >= %s::date
-            GROUP BY user_id, full_name
-            ORDER BY total DESC
-            LIMIT 3
-            """,
-            (class_id, since),
-        )
-    else:
-        cur.execute(
-            """
-            SELECT user_id, full_name, SUM(xp) as total
-            FROM xp_log
-            WHERE class_id=? AND DATE(created_at) >= ?
-            GROUP BY user_id, full_name
-            ORDER BY total DESC
-            LIMIT 3
-            """,
-            (class_id, since),
-        )
-
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-
 def mark_weekly_run_if_new(class_id: int, week_start: str) -> bool:
     conn = get_conn()
-    cur = conn.cursor()
     try:
-        if _is_psycopg_conn(conn):
-            cur.execute(
-                """
-                INSERT INTO weekly_runs (class_id, week_start)
-                VALUES (%s, %s)
-                ON CONFLICT (class_id, week_start) DO NOTHING
-                """,
-                (class_id, week_start),
-            )
-            conn.commit()
-            return cur.rowcount == 1
-        else:
-            cur.execute("INSERT INTO weekly_runs (class_id, week_start) VALUES (?, ?)", (class_id, week_start))
-            conn.commit()
-            return True
+        cur = sql.execute(conn, _MARK_WEEKLY_RUN, (class_id, week_start))
+        conn.commit()
+        return cur.rowcount == 1
     except Exception:
         return False
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+# =========================
+# ASYNC API (aiogram handlerlar uchun)
+# =========================
+# Quyidagilar yuqoridagi sync funksiyalarning event loopni bloklamaydigan
+# nusxalari: Postgres’da psycopg AsyncConnectionPool, SQLite’da thread offload.
+
+async def get_class_by_group_async(group_id: int):
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _CLASS_BY_GROUP, (group_id,))
+        return await cur.fetchone()
+
+
+_GROUP_CACHE: dict[int, tuple[float, int | None]] = {}
+_MISS = object()
+
+
+def _cached_group_id(class_id: int):
+    hit = _GROUP_CACHE.get(class_id)
+    if hit is None or hit[0] < time.monotonic():
+        return _MISS
+    return hit[1]
+
+
+def _remember_group_id(class_id: int, row) -> int | None:
+    group_id = int(row[0]) if row and row[0] is not None else None
+    _GROUP_CACHE[class_id] = (time.monotonic() + GROUP_CACHE_TTL, group_id)
+    return group_id
+
+
+async def create_class_async(name: str, group_id: int, teacher_id: int) -> int:
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _INSERT_CLASS, (name, group_id, teacher_id))
+        cid = (await cur.fetchone())[0]
+        await conn.commit()
+    return int(cid)
+
+
+async def ensure_member_async(class_id: int, user_id: int, full_name: str) -> None:
+    async with aconnection() as conn:
+        await sql.aexecute(conn, _ENSURE_MEMBER, (class_id, user_id, full_name))
+        await conn.commit()
+
+
+async def list_classes_async():
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _LIST_CLASSES)
+        return await cur.fetchall()
+
+
+async def get_assignment_row_async(assignment_id: int):
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _ASSIGNMENT_ROW, (int(assignment_id),))
+        return await cur.fetchone()
+
+
+async def create_assignment_async(class_id: int, n_questions: int, deadline_hhmm: str | None):
+    dl_at = _deadline_at_for_today(deadline_hhmm)
+
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _INSERT_ASSIGNMENT, (class_id, n_questions, deadline_hhmm, dl_at))
+        aid = (await cur.fetchone())[0]
+        await conn.commit()
+    return aid
+
+
+async def set_assignment_questions_async(assignment_id: int, questions_payload: list) -> None:
+    payload = json.dumps(questions_payload, ensure_ascii=False)
+    async with aconnection() as conn:
+        await sql.aexecute(conn, _SET_QUESTIONS, (payload, assignment_id))
+        await conn.commit()
+
+
+async def get_assignment_questions_async(assignment_id: int):
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _GET_QUESTIONS, (int(assignment_id),))
+        row = await cur.fetchone()
+    return _parse_questions_json(row[0] if row else None)
+
+
+async def is_assignment_late_async(assignment_id: int) -> bool:
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _ACTIVE_DEADLINE_INFO, (assignment_id,))
+        row = await cur.fetchone()
+        if not row:
+            return False
+
+        dl = _as_deadline(row[2])
+        if dl is None:
+            dl = _deadline_from_created(row[0], row[1])
+            if dl is None:
+                return False
+            await sql.aexecute(conn, _SET_DEADLINE_AT, (dl.isoformat(), assignment_id))
+            await conn.commit()
+
+    return datetime.now(TZ) > dl
+
+
+async def _replace_answers(conn, assignment_id: int, user_id: int, answers: Iterable[tuple[int, int, int]]) -> None:
+    rows = [[int(qi), int(ch), 1 if ok else 0] for qi, ch, ok in answers]
+    await sql.aexecute(conn, _DELETE_ANSWERS, (assignment_id, user_id))
+    if rows:
+        await sql.aexecute(conn, _INSERT_ANSWERS, (assignment_id, user_id, json.dumps(rows)))
+
+
+async def complete_attempt_async(
+    assignment_id: int,
+    class_id: int,
+    user_id: int,
+    full_name: str,
+    score: int,
+    total: int,
+    pct: float,
+    *,
+    is_late: int = 0,
+    answers: Iterable[tuple[int, int, int]] = (),
+    xp: int = 0,
+) -> int | None:
+    """
+    Quiz yakuni — bitta unit of work: attempt upsert + attempt_answers + xp_log + leaderboard
+    bitta connection va tranzaksiyada (Postgres’da pipeline — bitta round trip).
+    Sinf guruhining id’sini qaytaradi (class cache’dan; bo‘lmasa shu pipeline ichida o‘qiladi).
+    """
+    group_id = _cached_group_id(class_id)
+    group_cur = None
+    async with aconnection() as conn:
+        async with conn.pipeline():
+            await sql.aexecute(
+                conn,
+                _SAVE_ATTEMPT,
+                (assignment_id, class_id, user_id, full_name, score, total, pct, int(is_late), None),
+            )
+            await _replace_answers(conn, assignment_id, user_id, answers)
+            if xp:
+                await sql.aexecute(conn, _ADD_XP, (class_id, user_id, full_name, xp))
+                await leaderboard.record_async(conn, class_id, user_id, full_name, xp)
+            if group_id is _MISS:
+                group_cur = await sql.aexecute(conn, _GROUP_BY_CLASS, (class_id,))
+            await conn.commit()
+        if group_cur is not None:
+            group_id = _remember_group_id(class_id, await group_cur.fetchone())
+    return group_id
+
+
+async def mark_weekly_run_if_new_async(class_id: int, week_start: str) -> bool:
+    async with aconnection() as conn:
+        try:
+            cur = await sql.aexecute(conn, _MARK_WEEKLY_RUN, (class_id, week_start))
+            await conn.commit()
+            return cur.rowcount == 1
+        except Exception:
+            return False
+
+
+async def _question_stats(conn, assignment_id: int, limit: int | None) -> list[tuple]:
+    """Savollar qiyinligi: [(question_idx, en, answered, missed), ...] — ko‘p xato qilinganidan boshlab."""
+    cur = await sql.aexecute(conn, _QUESTION_STATS, (assignment_id,))
+    stats = await cur.fetchall()
+    if limit is not None:
+        stats = stats[:limit]
+    if not stats:
+        return []
+    cur = await sql.aexecute(conn, _GET_QUESTIONS, (int(assignment_id),))
+    row = await cur.fetchone()
+    questions = _parse_questions_json(row[0] if row else None)
+    out = []
+    for qi, answered, missed in stats:
+        q = questions[qi] if qi < len(questions) and isinstance(questions[qi], dict) else {}
+        out.append((int(qi), str(q.get("en", "")).strip(), int(answered), int(missed or 0)))
+    return out
+
+
+async def class_status_async(class_id: int):
+    """
+    /status uchun bitta connection ichida:
+    (active assignment, members, attempts, eng ko‘p xato qilingan 5 savol).
+    Assignment bo‘lmasa (None, [], [], []).
+    """
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _ACTIVE_ASSIGNMENT_FULL, (class_id,))
+        a = await cur.fetchone()
+        if not a:
+            return None, [], [], []
+
+        cur = await sql.aexecute(conn, _CLASS_MEMBERS, (class_id,))
+        members = await cur.fetchall()
+
+        cur = await sql.aexecute(conn, _ASSIGNMENT_ATTEMPTS, (class_id, a[0]))
+        attempts = await cur.fetchall()
+
+        missed = [r for r in await _question_stats(conn, a[0], 5) if r[3] > 0]
+
+    return tuple(a), [tuple(m) for m in members], [tuple(r) for r in attempts], missed
+
+
+async def get_user_last_attempt_async(class_id: int, user_id: int):
+    """Oxirgi aktiv assignment va shu user natijasi: ((assignment_id, n_questions) | None, (score, total, pct) | None)."""
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _ACTIVE_ASSIGNMENT, (class_id,))
+        a = await cur.fetchone()
+        if not a:
+            return None, None
+
+        cur = await sql.aexecute(conn, _USER_ATTEMPT, (class_id, a[0], user_id))
+        r = await cur.fetchone()
+    return (a[0], a[1]), (tuple(r) if r else None)
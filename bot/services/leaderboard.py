@@ -0,0 +1,112 @@
+"""
+Sinf reytingi: xp_buckets jadvalidagi kunlik / haftalik XP yig‘indilari.
+
+- quiz yakuni (classroom.complete_attempt_async) xp_log’ga yozgan tranzaksiyaning o‘zida record_async() ikkala bucket’ni
+  oshiradi — top/rank uchun xp_log’ni SUM(...) GROUP BY bilan skanerlash shart emas
+- bucket kaliti: period ('day' | 'week') + sana (Asia/Samarkand): kun — YYYY-MM-DD, hafta — dushanba
+- top: (class_id, period, bucket, xp) index bo‘yicha birinchi N qator
+- rank: o‘z qatori (PK) + undan ko‘p XP’lilar soni (index range) => 1 + count
+- bot buyruqlari (async) va admin sahifa (sync) bir xil natijani oladi
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from bot.storage.db import aconnection, get_conn
+from core import sql
+
+TZ = ZoneInfo("Asia/Samarkand")
+DAY = "day"
+WEEK = "week"
+PERIODS = (DAY, WEEK)
+
+
+# =========================
+# SQL
+# =========================
+_BUMP = sql.define(
+    "leaderboard.bump",
+    """
+    INSERT INTO xp_buckets (class_id, period, bucket, user_id, full_name, xp)
+    VALUES (?, 'day', ?, ?, ?, ?), (?, 'week', ?, ?, ?, ?)
+    ON CONFLICT (class_id, period, bucket, user_id) DO UPDATE SET
+        xp = xp_buckets.xp + excluded.xp,
+        full_name = excluded.full_name
+    """,
+)
+_TOP = sql.define(
+    "leaderboard.top",
+    """
+    SELECT user_id, full_name, xp
+    FROM xp_buckets
+    WHERE class_id=? AND period=? AND bucket=?
+    ORDER BY xp DESC, user_id
+    LIMIT ?
+    """,
+)
+_USER_XP = sql.define(
+    "leaderboard.user_xp",
+    "SELECT xp FROM xp_buckets WHERE class_id=? AND period=? AND bucket=? AND user_id=?",
+)
+_ABOVE = sql.define(
+    "leaderboard.above",
+    "SELECT COUNT(*) FROM xp_buckets WHERE class_id=? AND period=? AND bucket=? AND xp > ?",
+)
+
+
+# =========================
+# BUCKETS
+# =========================
+def bucket_of(period: str, when: datetime | None = None) -> str:
+    """'day' -> shu kun, 'week' -> shu haftaning dushanbasi (YYYY-MM-DD, Asia/Samarkand)."""
+    d = (when.astimezone(TZ) if when and when.tzinfo else when or datetime.now(TZ)).date()
+    if period == WEEK:
+        d -= timedelta(days=d.weekday())
+    elif period != DAY:
+        raise ValueError(f"Noma’lum period: {period}")
+    return d.isoformat()
+
+
+def _bump_params(class_id: int, user_id: int, full_name: str, xp: int, when: datetime | None) -> tuple:
+    day, week = bucket_of(DAY, when), bucket_of(WEEK, when)
+    return (class_id, day, user_id, full_name, xp, class_id, week, user_id, full_name, xp)
+
+
+async def record_async(conn, class_id: int, user_id: int, full_name: str, xp: int, when: datetime | None = None) -> None:
+    """xp_log insert bilan bitta tranzaksiyada chaqiriladi (commit chaqiruvchida)."""
+    await sql.aexecute(conn, _BUMP, _bump_params(class_id, user_id, full_name, xp, when))
+
+
+# =========================
+# QUERIES
+# =========================
+async def top_async(class_id: int, period: str, limit: int = 10, when: datetime | None = None):
+    """[(user_id, full_name, xp), ...] — ko‘p XP’dan kamga."""
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _TOP, (class_id, period, bucket_of(period, when), int(limit)))
+        return await cur.fetchall()
+
+
+async def rank_async(class_id: int, user_id: int, period: str, when: datetime | None = None) -> tuple[int, int] | None:
+    """(o‘rin, xp) yoki shu davrda XP bo‘lmasa None. Teng XP’lilar bir xil o‘rinda."""
+    bucket = bucket_of(period, when)
+    async with aconnection() as conn:
+        cur = await sql.aexecute(conn, _USER_XP, (class_id, period, bucket, user_id))
+        row = await cur.fetchone()
+        if not row:
+            return None
+        xp = int(row[0])
+        cur = await sql.aexecute(conn, _ABOVE, (class_id, period, bucket, xp))
+        above = (await cur.fetchone())[0]
+    return int(above) + 1, xp
+
+
+def top(class_id: int, period: str, limit: int = 10, when: datetime | None = None) -> list[tuple]:
+    """top_async’ning sync varianti (Streamlit admin sahifa uchun)."""
+    conn = get_conn()
+    try:
+        rows = sql.execute(conn, _TOP, (class_id, period, bucket_of(period, when), int(limit))).fetchall()
+        return [tuple(r) for r in rows]
+    finally:
+        conn.close()
@@ -1,9 +1,11 @@
-import csv
 import json
 import random
 from pathlib import Path
 from typing import List, Tuple, Set
 
+from core.distractors import DistractorIndex, index_for, lexicon_index
+from core.lexicon import get_lexicon
+
 # =========================
 # PATHS (absolute from project root)
 # =========================
@@ -16,14 +18,6 @@ USER_DATA_FILE = PROJECT_ROOT / "user_words.json"
 # =========================
 # HELPERS
 # =========================
-def _strip_bom(s: str) -> str:
-    return s.replace("\ufeff", "").strip()
-
-
-def _norm_key(k: str) -> str:
-    return _strip_bom(str(k)).lower()
-
-
 def _split_translations(uz: str) -> List[str]:
     """"ta'til, bayram" -> ["ta'til", "bayram"]"""
     if not uz:
@@ -32,55 +26,12 @@ def _split_translations(uz: str) -> List[str]:
     return [p for p in parts if p]
 
 
-def _pick(d: dict, keys: List[str]) -> str:
-    for k in keys:
-        if k in d and d[k] is not None:
-            val = str(d[k]).strip()
-            if val:
-                return val
-    return ""
-
-
-def _detect_dialect(sample: str):
-    try:
-        return csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        return csv.excel
-
-
 # =========================
 # LOADERS
 # =========================
 def _load_base_words(limit: int = 5000) -> List[Tuple[str, str]]:
-    items: List[Tuple[str, str]] = []
-    if not BASE_CSV.exists():
-        return items
-
-    # utf-8-sig BOM bo'lsa ham tozalab beradi
-    with BASE_CSV.open("r", encoding="utf-8-sig", errors="ignore", newline="") as f:
-        sample = f.read(4096)
-        f.seek(0)
-        dialect = _detect_dialect(sample)
-
-        reader = csv.DictReader(f, dialect=dialect)
-        if not reader.fieldnames:
-            return items
-
-        for row in reader:
-            if not row:
-                continue
-            # keylarni normalize qilamiz (BOM, space, case)
-            norm = {_norm_key(k): v for k, v in row.items()}
-
-            en = _pick(norm, ["en", "english", "word", "eng"])
-            uz = _pick(norm, ["uz", "uzbek", "translation", "tarjima"])
-
-            if en and uz:
-                items.append((en, uz))
-            if len(items) >= limit:
-                break
-
-    return items
+    # CSV core.lexicon snapshot’idan (process bo‘yicha bitta marta; CSV o‘zgarsa qayta quriladi)
+    return list(get_lexicon(BASE_CSV).pairs[:limit])
 
 
 def _load_user_words() -> List[Tuple[str, str]]:
@@ -106,6 +57,30 @@ def _load_user_words() -> List[Tuple[str, str]]:
     return items
 
 
+# =========================
+# DISTRACTORS (lug‘at versiyasi + user_words.json mtime bo‘yicha bir marta)
+# =========================
+_USER_INDEX: tuple | None = None  # (Lexicon, (mtime_ns, size), DistractorIndex)
+
+
+def _distractor_index() -> DistractorIndex:
+    """CSV + user_words tarjimalari indeksi; user_words bo‘lmasa — lexicon_index keshi."""
+    global _USER_INDEX
+    lex = get_lexicon(BASE_CSV)
+    try:
+        stt = USER_DATA_FILE.stat()
+    except OSError:
+        return lexicon_index(lex)
+    key = (stt.st_mtime_ns, stt.st_size)
+    hit = _USER_INDEX
+    if hit is not None and hit[0] is lex and hit[1] == key:
+        return hit[2]
+    user = [uz for _, uz in _load_user_words() if uz]
+    idx = DistractorIndex((*lex.uz_pool, *user)) if user else lexicon_index(lex)
+    _USER_INDEX = (lex, key, idx)
+    return idx
+
+
 # =========================
 # PUBLIC API
 # =========================
@@ -116,22 +91,25 @@ def build_questions(n: int) -> List[Tuple[str, str]]:
 
     pool = base + user
     # duplicatesni olib tashlaymiz
-    pool = list({(en, uz) for en, uz in pool})
+    pool = list(dict.fromkeys(pool))
 
     random.shuffle(pool)
     return pool[: max(0, n)]
 
 
-def build_options(correct_uz: str, pool_all_uz: List[str], k: int = 4) -> List[str]:
-    """Correct tarjima ichida vergul bo'lsa, variantlardan bittasini correct qilamiz."""
+def build_options(correct_uz: str, pool_all_uz: List[str] | None = None, k: int = 4) -> List[str]:
+    """
+    Correct tarjima ichida vergul bo'lsa, variantlardan bittasini correct qilamiz.
+    pool_all_uz berilmasa — CSV + user_words indeksi (lug‘at/fayl versiyasi bo‘yicha keshda);
+    berilsa — o‘sha ro‘yxat obyekti bo‘yicha indeks (har savolga yangi ro‘yxat bermang).
+    """
     translations = _split_translations(correct_uz)
     correct = random.choice(translations) if translations else str(correct_uz).strip()
 
-    synonyms = set(translations)
-    wrong = list({u for u in pool_all_uz if u and (u not in synonyms) and (u != correct)})
-    random.shuffle(wrong)
+    distractors = _distractor_index() if pool_all_uz is None else index_for(pool_all_uz, lambda: pool_all_uz)
+    wrong = distractors.sample(max(0, k - 1), exclude=[correct_uz, *translations])
 
-    opts = [correct] + wrong[: max(0, k - 1)]
+    opts = [correct] + wrong
     random.shuffle(opts)
     return opts
 
@@ -143,17 +121,10 @@ def normalize_correct_for_check(original_uz: str) -> Set[str]:
 
 def get_all_uz_pool() -> List[str]:
     """Return a big pool of all Uzbek translations from CSV + user_words."""
-    base = _load_base_words(limit=500000)
-    user = _load_user_words()
-    pool = [uz for _, uz in (base + user) if uz]
+    base = get_lexicon(BASE_CSV).uz_pool  # allaqachon noyob, tartib saqlangan
+    user = [uz for _, uz in _load_user_words() if uz]
     # unique while preserving order
-    seen = set()
-    out = []
-    for u in pool:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
-    return out
+    return list(dict.fromkeys((*base, *user)))
 
 
 def build_fixed_quiz(n: int, seed: int | None = None, k_options: int = 4) -> List[dict]:
@@ -166,20 +137,18 @@ def build_fixed_quiz(n: int, seed: int | None = None, k_options: int = 4) -> Lis
     # build question set
     base = _load_base_words()
     user = _load_user_words()
-    pool_pairs = list({(en, uz) for en, uz in (base + user)})
-    rnd.shuffle(pool_pairs)
-    questions = pool_pairs[: max(0, n)]
+    # dict.fromkeys: tartib barqaror => bir xil seed har process’da bir xil quiz beradi
+    pool_pairs = list(dict.fromkeys(base + user))
+    questions = rnd.sample(pool_pairs, min(max(0, n), len(pool_pairs)))
 
-    # options pool from all uz (bigger, better)
-    all_uz = [uz for _, uz in pool_pairs if uz]
+    # options pool from all uz (bigger, better) — lug‘at/user_words versiyasi bo‘yicha keshdan
+    distractors = _distractor_index()
 
     def _options(correct_uz: str) -> List[str]:
         translations = _split_translations(correct_uz)
         correct = rnd.choice(translations) if translations else str(correct_uz).strip()
-        synonyms = set(translations)
-        wrong = list({u for u in all_uz if u and (u not in synonyms) and (u != correct)})
-        rnd.shuffle(wrong)
-        opts = [correct] + wrong[: max(0, k_options - 1)]
+        wrong = distractors.sample(max(0, k_options - 1), exclude=[correct_uz, *translations], rnd=rnd)
+        opts = [correct] + wrong
         rnd.shuffle(opts)
         return opts
 
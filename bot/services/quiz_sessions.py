@@ -0,0 +1,320 @@
+# bot/services/quiz_sessions.py
+"""
+Bot quiz sessiyalari (oldin student.QUIZ — process RAM’ida edi).
+
+- Holat ixcham: savollarning o‘zi emas, assignment ichidagi indeks (i), ball va javoblar
+  [(savol_indeksi, tanlangan, ok), ...]; savollar assignment’dan olinadi (process LRU’da keshlanadi)
+- DbStore: bot DB’dagi quiz_sessions jadvali (TTL bilan) + oldida in-memory LRU —
+  restart’dan keyin ham, bir nechta worker’da ham sessiya yo‘qolmaydi
+- Yozish compare-and-swap: WHERE sid=? AND version=? — boshqa worker’dagi eskirgan LRU nusxa
+  yangi holatni ustidan yozib yubora olmaydi (save() False qaytaradi, chaqiruvchi qayta o‘qiydi)
+- LRU yozuvi expires_at bilan saqlanadi — muddati o‘tgan sessiya LRU’dan ham qaytmaydi, CAS ham
+  muddati o‘tgan qatorni yangilamaydi
+- sessiyasi yo‘q user’lar (oddiy chat) uchun NEGATIVE_TTL soniyalik manfiy kesh — har xabar DB’ga bormaydi
+  (boshqa worker’da boshlangan quiz shu process’da ko‘pi bilan NEGATIVE_TTL kechikib ko‘rinadi)
+- QUIZ_SESSION_STORE=memory — faqat LRU (bitta process, lokal ishlab chiqish uchun)
+"""
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterable
+
+from bot.storage.db import aconnection
+from core import sql
+
+TTL = float(os.getenv("QUIZ_SESSION_TTL_HOURS", "24")) * 3600  # oxirgi javobdan keyin
+LRU_SIZE = int(os.getenv("QUIZ_SESSION_LRU", "2048"))
+QUESTIONS_LRU_SIZE = 128
+PURGE_EVERY = 50  # har N ta yangi sessiyadan keyin muddati o‘tganlar o‘chiriladi
+NEGATIVE_TTL = 5.0  # "sessiya yo‘q" javobi shuncha soniya eslab qolinadi
+NEGATIVE_SIZE = 10_000
+
+
+# =========================
+# SQL
+# =========================
+_GET = sql.define(
+    "quiz_sessions.get",
+    "SELECT assignment_id, class_id, sid, version, state, expires_at FROM quiz_sessions WHERE user_id=?",
+)
+_UPSERT = sql.define(
+    "quiz_sessions.upsert",
+    """
+    INSERT INTO quiz_sessions (user_id, assignment_id, class_id, sid, version, state, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        assignment_id = excluded.assignment_id,
+        class_id = excluded.class_id,
+        sid = excluded.sid,
+        version = excluded.version,
+        state = excluded.state,
+        expires_at = excluded.expires_at
+    """,
+)
+_CAS_UPDATE = sql.define(
+    "quiz_sessions.cas_update",
+    """
+    UPDATE quiz_sessions SET version=?, state=?, expires_at=?
+    WHERE user_id=? AND sid=? AND version=? AND expires_at >= ?
+    """,
+)
+_CAS_DELETE = sql.define(
+    "quiz_sessions.cas_delete",
+    "DELETE FROM quiz_sessions WHERE user_id=? AND sid=? AND version=? AND expires_at >= ?",
+)
+_PURGE = sql.define("quiz_sessions.purge", "DELETE FROM quiz_sessions WHERE expires_at < ?")
+
+
+# =========================
+# SESSION
+# =========================
+def questions_hash(questions: Iterable) -> str:
+    """Savollar ro‘yxati barmoq izi — o‘qituvchi testni qayta yaratsa, eski indekslar ishlatilmaydi."""
+    data = json.dumps(list(questions), ensure_ascii=False, sort_keys=True, default=list)
+    return format(zlib.crc32(data.encode("utf-8")), "08x")
+
+
+class QuizSession:
+    """O‘zgarmas snapshot; answered() yangi versiyani qaytaradi."""
+
+    __slots__ = ("user_id", "assignment_id", "class_id", "sid", "version", "i", "score", "answers", "is_late", "qhash")
+
+    def __init__(
+        self,
+        user_id: int,
+        assignment_id: int,
+        class_id: int,
+        *,
+        sid: str,
+        version: int = 1,
+        i: int = 0,
+        score: int = 0,
+        answers: tuple = (),
+        is_late: int = 0,
+        qhash: str = "",
+    ):
+        self.user_id = int(user_id)
+        self.assignment_id = int(assignment_id)
+        self.class_id = int(class_id)
+        self.sid = sid
+        self.version = int(version)
+        self.i = int(i)
+        self.score = int(score)
+        self.answers = tuple(tuple(a) for a in answers)
+        self.is_late = int(is_late)
+        self.qhash = qhash
+
+    @classmethod
+    def new(cls, user_id: int, assignment_id: int, class_id: int, *, is_late: int, qhash: str) -> "QuizSession":
+        return cls(user_id, assignment_id, class_id, sid=secrets.token_hex(8), is_late=is_late, qhash=qhash)
+
+    def answered(self, chosen: str, ok: bool) -> "QuizSession":
+        return QuizSession(
+            self.user_id,
+            self.assignment_id,
+            self.class_id,
+            sid=self.sid,
+            version=self.version + 1,
+            i=self.i + 1,
+            score=self.score + (1 if ok else 0),
+            answers=(*self.answers, (self.i, chosen, 1 if ok else 0)),
+            is_late=self.is_late,
+            qhash=self.qhash,
+        )
+
+    def state_json(self) -> str:
+        return json.dumps(
+            {"i": self.i, "score": self.score, "answers": self.answers, "is_late": self.is_late, "qhash": self.qhash},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_row(cls, user_id: int, row) -> "QuizSession":
+        st = json.loads(row[4])
+        return cls(
+            user_id, row[0], row[1], sid=row[2], version=row[3],
+            i=st["i"], score=st["score"], answers=st["answers"], is_late=st.get("is_late", 0), qhash=st.get("qhash", ""),
+        )
+
+    def answer_rows(self, questions: list) -> list[tuple[int, int, int]]:
+        """attempt_answers uchun: (savol_indeksi, tanlangan variant indeksi yoki -1, ok)."""
+        out = []
+        for qi, chosen, ok in self.answers:
+            opts = questions[qi][2]
+            out.append((qi, opts.index(chosen) if chosen in opts else -1, ok))
+        return out
+
+    def __repr__(self) -> str:
+        return f"QuizSession(user={self.user_id}, assignment={self.assignment_id}, i={self.i}, v={self.version})"
+
+
+# =========================
+# STORES
+# =========================
+class MemoryStore:
+    """Faqat process xotirasi (LRU, yozuv: (sessiya, expires_at)). DbStore’ning old qatlami ham shu."""
+
+    def __init__(self, max_size: int = LRU_SIZE, ttl: float = TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[int, tuple[QuizSession, float]] = OrderedDict()
+
+    def peek(self, user_id: int) -> QuizSession | None:
+        """Muddati o‘tgan yozuv — miss (va tashlanadi)."""
+        hit = self._items.get(user_id)
+        if hit is None:
+            return None
+        if hit[1] < time.time():
+            del self._items[user_id]
+            return None
+        self._items.move_to_end(user_id)
+        return hit[0]
+
+    def put(self, s: QuizSession, expires_at: float | None = None) -> None:
+        self._items[s.user_id] = (s, time.time() + self.ttl if expires_at is None else expires_at)
+        self._items.move_to_end(s.user_id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def drop(self, user_id: int) -> None:
+        self._items.pop(user_id, None)
+
+    # --- store API ---
+    async def get(self, user_id: int) -> QuizSession | None:
+        return self.peek(user_id)
+
+    async def create(self, s: QuizSession) -> None:
+        self.put(s)
+
+    async def save(self, s: QuizSession) -> bool:
+        cur = self.peek(s.user_id)
+        if cur is None or cur.sid != s.sid or cur.version != s.version - 1:
+            return False
+        self.put(s)
+        return True
+
+    async def finish(self, s: QuizSession) -> bool:
+        cur = self.peek(s.user_id)
+        if cur is None or cur.sid != s.sid or cur.version != s.version:
+            return False
+        self.drop(s.user_id)
+        return True
+
+
+class DbStore:
+    """quiz_sessions jadvali + LRU. LRU eskirgan bo‘lsa CAS muvaffaqiyatsiz bo‘ladi va u tashlanadi."""
+
+    def __init__(self, ttl: float = TTL, lru_size: int = LRU_SIZE, negative_ttl: float = NEGATIVE_TTL):
+        self.ttl = ttl
+        self.front = MemoryStore(lru_size, ttl)
+        self.negative_ttl = negative_ttl
+        self._absent: dict[int, float] = {}  # user_id -> "sessiya yo‘q" muddati (monotonic)
+        self._creates = 0
+
+    def _remember_absent(self, user_id: int) -> None:
+        now = time.monotonic()
+        if len(self._absent) >= NEGATIVE_SIZE:
+            self._absent = {u: t for u, t in self._absent.items() if t > now}
+            if len(self._absent) >= NEGATIVE_SIZE:
+                self._absent.clear()
+        self._absent[user_id] = now + self.negative_ttl
+
+    async def get(self, user_id: int) -> QuizSession | None:
+        s = self.front.peek(user_id)
+        if s is not None:
+            return s
+        absent = self._absent.get(user_id)
+        if absent is not None:
+            if absent > time.monotonic():
+                return None
+            del self._absent[user_id]
+        async with aconnection() as conn:
+            cur = await sql.aexecute(conn, _GET, (user_id,))
+            row = await cur.fetchone()
+        if not row or float(row[5]) < time.time():
+            self._remember_absent(user_id)
+            return None
+        s = QuizSession.from_row(user_id, row)
+        self.front.put(s, float(row[5]))
+        return s
+
+    async def create(self, s: QuizSession) -> None:
+        """Foydalanuvchining eski sessiyasi (bo‘lsa) almashtiriladi."""
+        now = time.time()
+        self._creates += 1
+        async with aconnection() as conn:
+            await sql.aexecute(
+                conn, _UPSERT,
+                (s.user_id, s.assignment_id, s.class_id, s.sid, s.version, s.state_json(), now + self.ttl),
+            )
+            if self._creates % PURGE_EVERY == 0:
+                await sql.aexecute(conn, _PURGE, (now,))
+            await conn.commit()
+        self._absent.pop(s.user_id, None)
+        self.front.put(s, now + self.ttl)
+
+    async def save(self, s: QuizSession) -> bool:
+        """s.version - 1 DB’dagi versiya bo‘lsagina (va muddati o‘tmagan bo‘lsa) yozadi."""
+        now = time.time()
+        async with aconnection() as conn:
+            cur = await sql.aexecute(
+                conn, _CAS_UPDATE,
+                (s.version, s.state_json(), now + self.ttl, s.user_id, s.sid, s.version - 1, now),
+            )
+            ok = cur.rowcount == 1
+            await conn.commit()
+        if ok:
+            self.front.put(s, now + self.ttl)
+        else:
+            self.front.drop(s.user_id)
+        return ok
+
+    async def finish(self, s: QuizSession) -> bool:
+        """Sessiyani o‘chiradi; True faqat bitta chaqiruvchiga (natija ikki marta saqlanmasin)."""
+        async with aconnection() as conn:
+            cur = await sql.aexecute(conn, _CAS_DELETE, (s.user_id, s.sid, s.version, time.time()))
+            ok = cur.rowcount == 1
+            await conn.commit()
+        self.front.drop(s.user_id)
+        return ok
+
+
+_STORE: MemoryStore | DbStore | None = None
+
+
+def get_store() -> MemoryStore | DbStore:
+    global _STORE
+    if _STORE is None:
+        _STORE = MemoryStore() if os.getenv("QUIZ_SESSION_STORE", "db").strip().lower() == "memory" else DbStore()
+    return _STORE
+
+
+# =========================
+# QUESTIONS (assignment -> [(en, uz, options)], process LRU)
+# =========================
+_QUESTIONS: OrderedDict[int, tuple[str, list]] = OrderedDict()
+
+
+def remember_questions(assignment_id: int, questions: list) -> str:
+    qhash = questions_hash(questions)
+    _QUESTIONS[assignment_id] = (qhash, questions)
+    _QUESTIONS.move_to_end(assignment_id)
+    while len(_QUESTIONS) > QUESTIONS_LRU_SIZE:
+        _QUESTIONS.popitem(last=False)
+    return qhash
+
+
+async def questions_for(s: QuizSession, loader) -> list | None:
+    """Sessiya boshlangandagi savollar; assignment o‘shandan beri o‘zgargan bo‘lsa None."""
+    hit = _QUESTIONS.get(s.assignment_id)
+    if hit is not None and hit[0] == s.qhash:
+        _QUESTIONS.move_to_end(s.assignment_id)
+        return hit[1]
+    questions = await loader(s.assignment_id)
+    return questions if remember_questions(s.assignment_id, questions) == s.qhash else None
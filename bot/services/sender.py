@@ -0,0 +1,184 @@
+"""
+Chiquvchi xabarlar scheduleri (aiogram request middleware): hamma bot.send_* / message.answer shu orqali o‘tadi.
+
+- token bucket: har chat uchun (shaxsiy ~1/s, guruh 20/min) va umumiy (GLOBAL_RATE/s)
+- ikki navbat (lane): interactive (handler javoblari — default) va broadcast (`with broadcast():`
+  ichidagi announcer / haftalik yakun); umumiy token bo‘shaganda avval interactive navbat oladi
+- 429 (TelegramRetryAfter): chat bucket retry_after’ga to‘xtatiladi va so‘rov qayta yuboriladi
+- stats(): lane bo‘yicha sent / retried / failed / kutish vaqti, navbat uzunligi
+
+Ulash: bot.session.middleware(get_scheduler())
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+INTERACTIVE = "interactive"
+BROADCAST = "broadcast"
+_PRIORITY = {INTERACTIVE: 0, BROADCAST: 1}
+
+GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", "28"))  # Telegram: ~30 xabar/s
+PRIVATE_RATE, PRIVATE_BURST = 1.0, 3  # ✅ To‘g‘ri! + keyingi savol kabi juftliklar kutmasin
+GROUP_RATE, GROUP_BURST = 20 / 60, 3
+MAX_RETRIES = 3
+MAX_CHATS = 10_000  # bucket’lar soni chegarasi (to‘la va bo‘sh turganlari tashlanadi)
+
+_LANE: ContextVar[str] = ContextVar("send_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def broadcast():
+    """Shu blok ichida (va undan yaratilgan task’larda) yuboriladigan xabarlar — past prioritet."""
+    token = _LANE.set(BROADCAST)
+    try:
+        yield
+    finally:
+        _LANE.reset(token)
+
+
+class TokenBucket:
+    """rate token/s, capacity gacha yig‘iladi. reserve() tokenni band qiladi va kutish vaqtini qaytaradi."""
+
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.stamp:
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self, now: float) -> float:
+        """Token oladi (manfiyga ketishi mumkin — navbat); shuncha soniya kutish kerak."""
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def block(self, now: float, seconds: float) -> None:
+        """429’dan keyin: keyingi reserve() kamida seconds kutadi."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1.0) - seconds * self.rate
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+def _chat_id(method) -> int | None:
+    name = type(method).__name__
+    if not name.startswith(("Send", "Copy", "Forward")):
+        return None
+    chat_id = getattr(method, "chat_id", None)
+    return chat_id if isinstance(chat_id, int) else None
+
+
+class SendScheduler(BaseRequestMiddleware):
+    def __init__(self, global_rate: float = GLOBAL_RATE, *, max_retries: int = MAX_RETRIES):
+        self.global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self.max_retries = max_retries
+        self._chats: dict[int, TokenBucket] = {}
+        self._heap: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump: asyncio.Task | None = None
+        self._stats = {lane: {"sent": 0, "retried": 0, "failed": 0, "wait_s": 0.0, "max_wait_s": 0.0} for lane in _PRIORITY}
+
+    # ---------- BUCKETS ----------
+    def _chat_bucket(self, chat_id: int, now: float) -> TokenBucket:
+        b = self._chats.get(chat_id)
+        if b is None:
+            if len(self._chats) >= MAX_CHATS:
+                for cid in [c for c, x in self._chats.items() if x.idle(now)]:
+                    del self._chats[cid]
+            # manfiy id — guruh/kanal
+            b = TokenBucket(GROUP_RATE, GROUP_BURST) if chat_id < 0 else TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+            self._chats[chat_id] = b
+        return b
+
+    async def _global_slot(self, lane: str) -> None:
+        """Umumiy token: prioritet navbati (heap), tokenlarni bitta pump task tarqatadi."""
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (_PRIORITY[lane], next(self._seq), fut))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump())
+        await fut
+
+    async def _run_pump(self) -> None:
+        while self._heap:
+            delay = self.global_bucket.wait_time(time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():  # bekor qilingan kutuvchi token olmaydi
+                self.global_bucket.reserve(time.monotonic())
+                fut.set_result(None)
+
+    async def _acquire(self, chat_id: int, lane: str) -> None:
+        t0 = time.monotonic()
+        delay = self._chat_bucket(chat_id, t0).reserve(t0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._global_slot(lane)
+        waited = time.monotonic() - t0
+        st = self._stats[lane]
+        st["wait_s"] += waited
+        st["max_wait_s"] = max(st["max_wait_s"], waited)
+
+    # ---------- MIDDLEWARE ----------
+    async def __call__(self, make_request, bot, method):
+        chat_id = _chat_id(method)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        lane = _LANE.get()
+        st = self._stats[lane]
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(chat_id, lane)
+            try:
+                result = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self._chat_bucket(chat_id, time.monotonic()).block(time.monotonic(), e.retry_after)
+                if attempt == self.max_retries:
+                    st["failed"] += 1
+                    raise
+                st["retried"] += 1
+            except Exception:
+                st["failed"] += 1
+                raise
+            else:
+                st["sent"] += 1
+                return result
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._heap),
+            "chats": len(self._chats),
+            **{lane: {k: round(v, 3) if isinstance(v, float) else v for k, v in s.items()} for lane, s in self._stats.items()},
+        }
+
+
+_SCHEDULER: SendScheduler | None = None
+
+
+def get_scheduler() -> SendScheduler:
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = SendScheduler()
+    return _SCHEDULER
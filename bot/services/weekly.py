@@ -0,0 +1,67 @@
+"""
+Haftalik yakun: yakshanba 21:00 (Asia/Samarkand) har sinf guruhiga haftalik TOP-3.
+
+- polling (bot/main.py) va webhook (bot/webhook_app.py) ikkalasi shu weekly_job’ni ishga tushiradi
+- sinflar parallel, sender.broadcast() lane’ida (guruh/umumiy limit va 429 — sender scheduler’ida)
+- mark_weekly_run_if_new_async: har sinf uchun haftada bir marta (bir nechta worker bo‘lsa ham)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+
+from aiogram import Bot
+
+from bot.services import leaderboard
+from bot.services.classroom import TZ, list_classes_async, mark_weekly_run_if_new_async, week_start_date
+from bot.services.sender import broadcast
+
+MEDALS = ["🥇", "🥈", "🥉"]
+
+
+async def _post_class(bot: Bot, class_id: int, group_id: int, now: datetime, week_start: str) -> None:
+    # anti-duplicate (har hafta 1 marta)
+    if not await mark_weekly_run_if_new_async(class_id, week_start):
+        return
+
+    top = await leaderboard.top_async(class_id, leaderboard.WEEK, limit=3, when=now)
+    if not top:
+        await bot.send_message(group_id, "🏁 Haftalik yakun: bu hafta ball yig‘ilmagan.")
+        return
+
+    lines = ["🏆 HAFTALIK TOP-3", f"📅 {week_start} — {now.strftime('%Y-%m-%d')}", ""]
+    for i, (_, name, xp) in enumerate(top):
+        lines.append(f"{MEDALS[i]} {name} — {int(xp)} XP")
+    await bot.send_message(group_id, "\n".join(lines))
+
+
+async def post_weekly(bot: Bot, now: datetime) -> None:
+    """Hamma sinf parallel; bitta sinfdagi xato boshqalarini to‘xtatmaydi (traceback bilan log’ga)."""
+    week_start = week_start_date(now)
+    classes = await list_classes_async()
+    # broadcast lane — o‘quvchilarning quiz javoblarini sekinlashtirmaydi
+    with broadcast():
+        results = await asyncio.gather(
+            *(_post_class(bot, class_id, group_id, now, week_start) for class_id, _name, group_id in classes),
+            return_exceptions=True,
+        )
+    for (class_id, _name, _group_id), err in zip(classes, results):
+        if isinstance(err, BaseException):
+            logging.error("weekly_job xatosi (class_id=%s)", class_id, exc_info=err)
+
+
+async def weekly_job(bot: Bot) -> None:
+    while True:
+        now = datetime.now(TZ)
+        logging.debug("weekly_job tick: %s", now)
+        # Yakshanba = 6 (Mon=0 ... Sun=6)
+        if now.weekday() == 6 and now.hour == 21 and now.minute in (0, 1):
+            try:
+                await post_weekly(bot, now)
+            except Exception:
+                logging.exception("weekly_job xatosi")
+            # shu minutda qayta post bo‘lmasin
+            await asyncio.sleep(120)
+        else:
+            await asyncio.sleep(30)
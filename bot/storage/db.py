@@ -1,9 +1,17 @@
+import asyncio
+import json
 import os
 import sqlite3
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Union
 from typing import TYPE_CHECKING, Any
 
+from core import migrations, sql
+from core.migrations import Migration
+from core.pool import ConnectionPool, PoolTimeout
+
 if TYPE_CHECKING:
     import psycopg
 
@@ -18,12 +26,17 @@ def _is_postgres() -> bool:
     return DATABASE_URL.startswith("postgres://") or DATABASE_URL.startswith("postgresql://")
 
 
-def get_conn() -> Any:
-    """
-    Bot DB connection.
-    - If DATABASE_URL set => Postgres (schema: bot)
-    - Else => SQLite (data/classroom.db)
-    """
+# =========================
+# SYNC POOL
+# =========================
+POOL_SIZE = int(os.getenv("BOT_DB_POOL_SIZE", os.getenv("DB_POOL_SIZE", "5")))
+POOL_TIMEOUT = float(os.getenv("BOT_DB_POOL_TIMEOUT", os.getenv("DB_POOL_TIMEOUT", "10")))
+
+_POOL: ConnectionPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _connect() -> Any:
     if _is_postgres():
         import psycopg
         conn = psycopg.connect(DATABASE_URL)
@@ -32,13 +45,407 @@ def get_conn() -> Any:
         conn.commit()
         return conn
 
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=sql.SQLITE_STATEMENT_CACHE)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL;")
     return conn
 
 
+def _check(conn) -> None:
+    cur = conn.cursor()
+    cur.execute("SELECT 1")
+    cur.fetchone()
+    conn.rollback()
+
+
+def _reset(conn) -> None:
+    if getattr(conn, "closed", False):
+        raise RuntimeError("connection closed")
+    if _is_postgres() or conn.in_transaction:
+        conn.rollback()
+
+
+def get_pool() -> ConnectionPool:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ConnectionPool(
+                    _connect,
+                    max_size=POOL_SIZE,
+                    timeout=POOL_TIMEOUT,
+                    check=_check,
+                    reset=_reset,
+                )
+    return _POOL
+
+
+def get_conn() -> Any:
+    """
+    Bot DB connection (pooldan, sync).
+    - If DATABASE_URL set => Postgres (schema: bot)
+    - Else => SQLite (data/classroom.db)
+    Event loop ichida (aiogram handlerlar) buni emas, aconnection() ni ishlating.
+    """
+    return get_pool().getconn()
+
+
+# =========================
+# ASYNC POOL
+# =========================
+class AsyncSqliteCursor:
+    """sqlite3.Cursor ni psycopg AsyncCursor ko‘rinishida beradi (fetch’lar threadda)."""
+
+    __slots__ = ("_cur",)
+
+    def __init__(self, cur: sqlite3.Cursor):
+        self._cur = cur
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    async def fetchone(self):
+        return await asyncio.to_thread(self._cur.fetchone)
+
+    async def fetchall(self):
+        return await asyncio.to_thread(self._cur.fetchall)
+
+
+class AsyncSqliteConnection:
+    """
+    aiosqlite uslubida: sqlite3 connection ustidagi har bir chaqiruv
+    asyncio.to_thread orqali bajariladi, event loop bloklanmaydi.
+    Bitta connectionni bir vaqtda faqat bitta coroutine ishlatadi (pool kafolatlaydi).
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: sqlite3.Connection):
+        self.raw = raw
+
+    async def execute(self, sql: str, params=()) -> AsyncSqliteCursor:
+        cur = await asyncio.to_thread(self.raw.execute, sql, params)
+        return AsyncSqliteCursor(cur)
+
+    async def executemany(self, sql: str, seq) -> AsyncSqliteCursor:
+        cur = await asyncio.to_thread(self.raw.executemany, sql, list(seq))
+        return AsyncSqliteCursor(cur)
+
+    async def commit(self) -> None:
+        await asyncio.to_thread(self.raw.commit)
+
+    async def rollback(self) -> None:
+        await asyncio.to_thread(self.raw.rollback)
+
+    @asynccontextmanager
+    async def pipeline(self):
+        """psycopg AsyncConnection.pipeline() bilan bir xil API; SQLite’da tarmoq round trip’i yo‘q — no-op."""
+        yield self
+
+
+class _AsyncSqlitePool:
+    """
+    Alohida sync pool + asyncio.Semaphore: slot kutish event loopda bo‘ladi,
+    shuning uchun executor threadlari hech qachon bo‘sh connection kutib bloklanmaydi.
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self._pool = ConnectionPool(
+            _connect,
+            max_size=max_size,
+            timeout=timeout,
+            check=_check,
+            reset=_reset,
+        )
+        self._sem = asyncio.Semaphore(self._pool.max_size)
+        self._timeout = timeout
+
+    @asynccontextmanager
+    async def connection(self):
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self._timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"{self._timeout:.1f}s ichida bo‘sh connection topilmadi") from None
+        try:
+            pc = await asyncio.to_thread(self._pool.getconn)
+            conn = AsyncSqliteConnection(pc.raw)
+            try:
+                yield conn
+                if pc.raw.in_transaction:
+                    await conn.commit()
+            finally:
+                # xato bo‘lsa reset() rollback qiladi; buzilgan connection pooldan chiqariladi
+                pc.close()
+        finally:
+            self._sem.release()
+
+    async def open(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        self._pool.close()
+
+    def get_stats(self) -> dict:
+        return self._pool.stats()
+
+
+_APOOL: Any = None
+
+
+async def _aconfigure(conn) -> None:
+    await conn.execute("SET search_path TO bot;")
+    await conn.commit()
+
+
+def get_async_pool() -> Any:
+    """
+    Postgres => psycopg_pool.AsyncConnectionPool
+    SQLite   => sync pool + thread offload (AsyncSqliteConnection)
+    Ikkalasida ham: `async with get_async_pool().connection() as conn: ...`
+    """
+    global _APOOL
+    if _APOOL is None:
+        if _is_postgres():
+            from psycopg_pool import AsyncConnectionPool
+            _APOOL = AsyncConnectionPool(
+                DATABASE_URL,
+                min_size=1,
+                max_size=POOL_SIZE,
+                timeout=POOL_TIMEOUT,
+                configure=_aconfigure,
+                check=AsyncConnectionPool.check_connection,
+                open=False,
+            )
+        else:
+            _APOOL = _AsyncSqlitePool(POOL_SIZE, POOL_TIMEOUT)
+    return _APOOL
+
+
+async def open_async_pool() -> None:
+    """Startup’da chaqiriladi (FastAPI on_startup / polling main)."""
+    pool = get_async_pool()
+    if _is_postgres():
+        await pool.open(wait=True)
+
+
+async def close_async_pool() -> None:
+    global _APOOL
+    if _APOOL is not None:
+        await _APOOL.close()
+        _APOOL = None
+
+
+@asynccontextmanager
+async def aconnection():
+    """Handlerlar uchun: event loopni bloklamaydigan connection."""
+    pool = get_async_pool()
+    if _is_postgres() and pool.closed:
+        await pool.open(wait=True)
+    async with pool.connection() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def alisten(channel: str):
+    """
+    Postgres: `LISTEN channel` qilingan alohida autocommit connection (pooldan emas —
+    conn.notifies() uni butunlay band qiladi). SQLite’da NOTIFY yo‘q => None.
+    """
+    if not _is_postgres():
+        yield None
+        return
+    import psycopg
+
+    conn = await psycopg.AsyncConnection.connect(DATABASE_URL, autocommit=True)
+    try:
+        await conn.execute(f'LISTEN "{channel}"')
+        yield conn
+    finally:
+        await conn.close()
+
+
+def pool_stats() -> dict:
+    out = {"sync": get_pool().stats()}
+    if _APOOL is not None:
+        out["async"] = dict(_APOOL.get_stats())
+    return out
+
+
+# =========================
+# MIGRATIONS (schema_version)
+# =========================
+def _backfill_xp_buckets(conn, dialect: str) -> None:
+    """Mavjud xp_log’dan kunlik/haftalik bucket’lar (Asia/Samarkand sanasi, hafta — dushanbadan)."""
+    if dialect == sql.POSTGRES:
+        local = "(created_at AT TIME ZONE 'Asia/Samarkand')"
+        buckets = {
+            "day": f"to_char({local}, 'YYYY-MM-DD')",
+            "week": f"to_char(date_trunc('week', {local}), 'YYYY-MM-DD')",
+        }
+    else:
+        # SQLite CURRENT_TIMESTAMP — UTC; Samarkand UTC+5 (DST yo‘q)
+        buckets = {
+            "day": "date(created_at, '+5 hours')",
+            "week": "date(created_at, '+5 hours', 'weekday 0', '-6 days')",
+        }
+    cur = conn.cursor()
+    for period, expr in buckets.items():
+        cur.execute(f"""
+        INSERT INTO xp_buckets (class_id, period, bucket, user_id, full_name, xp)
+        SELECT class_id, '{period}', {expr}, user_id, MAX(full_name), SUM(xp)
+        FROM xp_log
+        GROUP BY class_id, {expr}, user_id
+        ON CONFLICT (class_id, period, bucket, user_id) DO NOTHING
+        """)
+
+
+def _backfill_attempt_answers(conn, dialect: str) -> None:
+    """attempts.answers_json -> attempt_answers (question_idx — javoblar tartibi, chosen_id — variant indeksi)."""
+    from bot.services.classroom import _parse_questions_json
+
+    cur = conn.cursor()
+    cur.execute("SELECT id, questions_json FROM assignments")
+    options = {
+        int(aid): [q["options"] if isinstance(q.get("options"), list) else [] for q in _parse_questions_json(qj) if isinstance(q, dict)]
+        for aid, qj in cur.fetchall()
+    }
+    cur.execute("SELECT assignment_id, user_id, answers_json FROM attempts WHERE answers_json IS NOT NULL")
+    rows = []
+    for aid, uid, aj in cur.fetchall():
+        try:
+            answers = json.loads(aj)
+        except Exception:
+            continue
+        opts = options.get(int(aid), [])
+        for qi, it in enumerate(answers if isinstance(answers, list) else []):
+            # eski/buzuq format (skalyar, ro‘yxat) — o‘tkazib yuboriladi, migratsiya to‘xtamasin
+            if not isinstance(it, dict):
+                continue
+            chosen = it.get("chosen")
+            try:
+                ok = 1 if int(it.get("ok", 0) or 0) else 0
+            except (TypeError, ValueError):
+                ok = 0
+            o = opts[qi] if qi < len(opts) else []
+            rows.append((aid, uid, qi, o.index(chosen) if chosen in o else -1, ok))
+    if rows:
+        ph = "%s" if dialect == sql.POSTGRES else "?"
+        cur.executemany(
+            "INSERT INTO attempt_answers (assignment_id, user_id, question_idx, chosen_id, ok) "
+            f"VALUES ({ph}, {ph}, {ph}, {ph}, {ph}) ON CONFLICT DO NOTHING",
+            rows,
+        )
+
+
+MIGRATIONS = [
+    Migration(
+        1,
+        "sqlite_schema_drift",
+        # eski SQLite bazalarda bu ustunlar yo‘q edi (Postgres’da boshidan bor)
+        migrations.add_column("assignments", "deadline_at", "TEXT", "TIMESTAMPTZ"),
+        migrations.add_column("attempts", "is_late", "INTEGER DEFAULT 0", "INT DEFAULT 0"),
+        migrations.add_column("attempts", "answers_json", "TEXT"),
+    ),
+    Migration(
+        2,
+        "hot_path_indexes",
+        # /status: WHERE class_id=? AND assignment_id=?
+        migrations.index("idx_attempts_class_assignment", "attempts", ("class_id", "assignment_id")),
+        # weekly_top3 / daily top: WHERE class_id=? AND created_at >= ?
+        migrations.index(
+            "idx_xp_log_class_created",
+            "xp_log",
+            ("class_id", "created_at"),
+            include=("user_id", "full_name", "xp"),
+        ),
+        # /status a'zolar ro‘yxati: WHERE class_id=? ORDER BY joined_at
+        migrations.index("idx_members_class_joined", "members", ("class_id", "joined_at"), include=("user_id", "full_name")),
+        # announcer: faqat pending navbat (partial index)
+        migrations.index("idx_announcements_pending", "announcements", ("id",), where="status='pending'"),
+        # aktiv assignment: WHERE class_id=? AND is_active=1 ORDER BY id DESC
+        migrations.index("idx_assignments_class_active", "assignments", ("class_id", "is_active", "id")),
+    ),
+    Migration(
+        3,
+        "quiz_sessions",
+        # bot/services/quiz_sessions.py: student.QUIZ (RAM) o‘rniga; state — ixcham JSON, expires_at — unix vaqt
+        """
+        CREATE TABLE IF NOT EXISTS quiz_sessions (
+            user_id BIGINT PRIMARY KEY,
+            assignment_id BIGINT NOT NULL,
+            class_id BIGINT NOT NULL,
+            sid TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            expires_at DOUBLE PRECISION NOT NULL
+        )
+        """,
+        migrations.index("idx_quiz_sessions_expires", "quiz_sessions", ("expires_at",)),
+    ),
+    Migration(
+        4,
+        "announcements_claim",
+        # announcer: 'sending' holatiga o‘tgan vaqt (unix); worker yiqilsa eskirgan claim qaytariladi
+        migrations.add_column("announcements", "claimed_at", "REAL", "DOUBLE PRECISION"),
+    ),
+    Migration(
+        5,
+        "xp_buckets",
+        # bot/services/leaderboard.py: sinf bo‘yicha kunlik/haftalik XP yig‘indilari (add_xp’da oshiriladi)
+        """
+        CREATE TABLE IF NOT EXISTS xp_buckets (
+            class_id BIGINT NOT NULL,
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            user_id BIGINT NOT NULL,
+            full_name TEXT,
+            xp BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (class_id, period, bucket, user_id)
+        )
+        """,
+        # top-N: WHERE class_id=? AND period=? AND bucket=? ORDER BY xp DESC; rank: ... AND xp > ?
+        migrations.index(
+            "idx_xp_buckets_top",
+            "xp_buckets",
+            ("class_id", "period", "bucket", "xp DESC"),
+            include=("user_id", "full_name"),
+        ),
+        _backfill_xp_buckets,
+    ),
+    Migration(
+        6,
+        "attempt_answers",
+        # har javob alohida qator (attempts.answers_json blob o‘rniga); chosen_id — options indeksi, -1 => boshqa matn
+        """
+        CREATE TABLE IF NOT EXISTS attempt_answers (
+            assignment_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            question_idx INTEGER NOT NULL,
+            chosen_id INTEGER NOT NULL,
+            ok INTEGER NOT NULL,
+            PRIMARY KEY (assignment_id, user_id, question_idx)
+        )
+        """,
+        # savol bo‘yicha xato ulushi: WHERE assignment_id=? GROUP BY question_idx (faqat index’dan)
+        migrations.index("idx_attempt_answers_item", "attempt_answers", ("assignment_id", "question_idx", "ok")),
+        _backfill_attempt_answers,
+    ),
+]
+
+
 def init_db() -> None:
+    # ro‘yxatdagi nomlangan statementlarni ikkala dialect uchun oldindan tayyorlab qo‘yamiz
+    sql.compile_all()
+
     conn = get_conn()
 
     # --------- POSTGRES ----------
@@ -132,6 +539,7 @@ def init_db() -> None:
             """)
 
         conn.commit()
+        migrations.migrate(conn, MIGRATIONS)
         conn.close()
         return
 
@@ -165,6 +573,7 @@ def init_db() -> None:
         class_id INTEGER NOT NULL,
         n_questions INTEGER NOT NULL,
         deadline_hhmm TEXT,
+        deadline_at TEXT,
         is_active INTEGER DEFAULT 1,
         questions_json TEXT,
         created_at TEXT DEFAULT CURRENT_TIMESTAMP
@@ -182,6 +591,8 @@ def init_db() -> None:
         total INTEGER NOT NULL,
         pct REAL NOT NULL,
         finished_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        is_late INTEGER DEFAULT 0,
+        answers_json TEXT,
         UNIQUE(assignment_id, user_id)
     )
     """)
@@ -220,4 +631,5 @@ def init_db() -> None:
     """)
 
     conn.commit()
-    conn.close()
\ No newline at end of file
+    migrations.migrate(conn, MIGRATIONS)
+    conn.close()
@@ -3,7 +3,78 @@ from __future__ import annotations
 import json
 from typing import Any
 
-from bot.storage.db import get_conn, _is_postgres
+from bot.services.announcer import notify_in_tx, notify_pending
+from bot.services.classroom import _deadline_at_for_today
+from bot.storage.db import get_conn
+from core import sql
+
+_COUNT_CLASSES = sql.define("db_admin.count_classes", "SELECT COUNT(*) FROM classes")
+_COUNT_STUDENTS = sql.define("db_admin.count_students", "SELECT COUNT(DISTINCT user_id) FROM members")
+_COUNT_ASSIGNMENTS = sql.define("db_admin.count_assignments", "SELECT COUNT(*) FROM assignments")
+_COUNT_ATTEMPTS = sql.define("db_admin.count_attempts", "SELECT COUNT(*) FROM attempts")
+_AVG_PCT = sql.define("db_admin.avg_pct", "SELECT AVG(pct) FROM attempts")
+
+_DEACTIVATE_CLASS = sql.define("db_admin.deactivate_class", "UPDATE assignments SET is_active=0 WHERE class_id=?")
+_INSERT_ASSIGNMENT = sql.define(
+    "db_admin.insert_assignment",
+    """
+    INSERT INTO assignments (class_id, n_questions, deadline_hhmm, deadline_at, is_active)
+    VALUES (?, ?, ?, ?, 1)
+    RETURNING id
+    """,
+)
+_SET_QUESTIONS = sql.define("db_admin.set_questions", "UPDATE assignments SET questions_json=? WHERE id=?")
+_ENQUEUE_ANNOUNCEMENT = sql.define(
+    "db_admin.enqueue_announcement",
+    "INSERT INTO announcements (class_id, assignment_id, status) VALUES (?, ?, 'pending')",
+)
+
+# class_id bo‘yicha bir marta GROUP BY qilingan CTE’lar (har class uchun subquery emas)
+_LIST_CLASSES = sql.define(
+    "db_admin.list_classes",
+    """
+    WITH mem AS (
+        SELECT class_id, COUNT(DISTINCT user_id) AS members_count FROM members GROUP BY class_id
+    ),
+    asg AS (
+        SELECT class_id, COUNT(*) AS assignments_count FROM assignments GROUP BY class_id
+    ),
+    att AS (
+        SELECT class_id, COUNT(*) AS attempts_count FROM attempts GROUP BY class_id
+    ),
+    xp AS (
+        SELECT class_id, SUM(xp) AS xp_sum FROM xp_log GROUP BY class_id
+    )
+    SELECT
+        c.id,
+        c.name,
+        c.group_id,
+        c.teacher_id,
+        c.created_at,
+        COALESCE(mem.members_count, 0) AS members_count,
+        COALESCE(asg.assignments_count, 0) AS assignments_count,
+        COALESCE(att.attempts_count, 0) AS attempts_count,
+        COALESCE(xp.xp_sum, 0) AS xp_sum
+    FROM classes c
+    LEFT JOIN mem ON mem.class_id = c.id
+    LEFT JOIN asg ON asg.class_id = c.id
+    LEFT JOIN att ON att.class_id = c.id
+    LEFT JOIN xp ON xp.class_id = c.id
+    ORDER BY c.id DESC
+    """,
+)
+_INSERT_CLASS = sql.define(
+    "db_admin.insert_class",
+    """
+    INSERT INTO classes (name, group_id, teacher_id)
+    VALUES (?, ?, ?)
+    RETURNING id
+    """,
+)
+_ACTIVE_ASSIGNMENT_BY_ID = sql.define(
+    "db_admin.active_assignment_by_id",
+    "SELECT * FROM assignments WHERE id=? AND is_active=1",
+)
 
 def _fetchall_dict(cur) -> list[dict]:
     rows = cur.fetchall()
@@ -21,22 +92,11 @@ def _fetchall_dict(cur) -> list[dict]:
 def bot_kpis() -> dict:
     conn = get_conn()
     try:
-        cur = conn.cursor()
-
-        cur.execute("SELECT COUNT(*) FROM classes")
-        classes_n = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT COUNT(DISTINCT user_id) FROM members")
-        students_n = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT COUNT(*) FROM assignments")
-        assignments_n = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT COUNT(*) FROM attempts")
-        attempts_n = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT AVG(pct) FROM attempts")
-        avg_pct = cur.fetchone()[0] or 0.0
+        classes_n = sql.execute(conn, _COUNT_CLASSES).fetchone()[0] or 0
+        students_n = sql.execute(conn, _COUNT_STUDENTS).fetchone()[0] or 0
+        assignments_n = sql.execute(conn, _COUNT_ASSIGNMENTS).fetchone()[0] or 0
+        attempts_n = sql.execute(conn, _COUNT_ATTEMPTS).fetchone()[0] or 0
+        avg_pct = sql.execute(conn, _AVG_PCT).fetchone()[0] or 0.0
 
         return {
             "classes": int(classes_n),
@@ -53,34 +113,16 @@ def bot_kpis() -> dict:
 def create_assignment_web(class_id: int, n_questions: int, deadline_hhmm: str | None, deactivate_prev: bool = True) -> int:
     conn = get_conn()
     try:
-        cur = conn.cursor()
-
         # oldingilarni o‘chirish
         if deactivate_prev:
-            cur.execute("UPDATE assignments SET is_active=0 WHERE class_id=%s" if _is_postgres() else "UPDATE assignments SET is_active=0 WHERE class_id=?",
-                        (int(class_id),))
-
-        # sqlite schema’da deadline_at yo‘q (sizning db.py da sqlite uchun yo‘q)
-        # shuning uchun faqat mavjud ustunlar bilan insert qilamiz
-        if _is_postgres():
-            cur.execute(
-                """
-                INSERT INTO assignments (class_id, n_questions, deadline_hhmm, is_active)
-                VALUES (%s, %s, %s, 1)
-                RETURNING id
-                """,
-                (int(class_id), int(n_questions), deadline_hhmm),
-            )
-            aid = int(cur.fetchone()[0])
-        else:
-            cur.execute(
-                """
-                INSERT INTO assignments (class_id, n_questions, deadline_hhmm, is_active)
-                VALUES (?, ?, ?, 1)
-                """,
-                (int(class_id), int(n_questions), deadline_hhmm),
-            )
-            aid = int(cur.lastrowid)
+            sql.execute(conn, _DEACTIVATE_CLASS, (int(class_id),))
+
+        cur = sql.execute(
+            conn,
+            _INSERT_ASSIGNMENT,
+            (int(class_id), int(n_questions), deadline_hhmm, _deadline_at_for_today(deadline_hhmm)),
+        )
+        aid = int(cur.fetchone()[0])
 
         # Savollar JSON — sizda web tarafda build_fixed_quiz_web bo'lsa o'shani import qiling,
         # hozircha placeholder (keyin chiroyli qilamiz)
@@ -93,19 +135,15 @@ def create_assignment_web(class_id: int, n_questions: int, deadline_hhmm: str |
                 {"en": "water", "uz": "suv", "options": ["suv", "non", "go'sht", "choy"]},
             ]
         }
-        cur.execute(
-            "UPDATE assignments SET questions_json=%s WHERE id=%s" if _is_postgres() else "UPDATE assignments SET questions_json=? WHERE id=?",
-            (json.dumps(fixed, ensure_ascii=False), aid),
-        )
+        sql.execute(conn, _SET_QUESTIONS, (json.dumps(fixed, ensure_ascii=False), aid))
 
         # announcements jadvali bor sizda — queuega qo'shamiz
-        cur.execute(
-            "INSERT INTO announcements (class_id, assignment_id, status) VALUES (%s, %s, 'pending')" if _is_postgres()
-            else "INSERT INTO announcements (class_id, assignment_id, status) VALUES (?, ?, 'pending')",
-            (int(class_id), aid),
-        )
+        sql.execute(conn, _ENQUEUE_ANNOUNCEMENT, (int(class_id), aid))
+        # announcer 10s poll’ni kutmasin: NOTIFY shu tranzaksiya bilan commit’da yetkaziladi
+        notify_in_tx(conn)
 
         conn.commit()
+        notify_pending()
         return aid
     finally:
         conn.close()
@@ -113,50 +151,7 @@ def create_assignment_web(class_id: int, n_questions: int, deadline_hhmm: str |
 def list_classes_admin() -> list[dict]:
     conn = get_conn()
     try:
-        cur = conn.cursor()
-
-        # 1) xp_sum ni hisoblashga harakat qilamiz
-        # 2) Agar attempts jadvalida xp ustuni bo'lmasa — fallback: 0
-        sql_with_xp = """
-            SELECT
-                c.id,
-                c.name,
-                c.group_id,
-                c.teacher_id,
-                c.created_at,
-
-                (SELECT COUNT(DISTINCT m.user_id) FROM members m WHERE m.class_id = c.id) AS members_count,
-                (SELECT COUNT(*) FROM assignments a WHERE a.class_id = c.id) AS assignments_count,
-                (SELECT COUNT(*) FROM attempts t WHERE t.class_id = c.id) AS attempts_count,
-                (SELECT COALESCE(SUM(t.xp), 0) FROM attempts t WHERE t.class_id = c.id) AS xp_sum
-
-            FROM classes c
-            ORDER BY c.id DESC
-        """
-
-        sql_no_xp = """
-            SELECT
-                c.id,
-                c.name,
-                c.group_id,
-                c.teacher_id,
-                c.created_at,
-
-                (SELECT COUNT(DISTINCT m.user_id) FROM members m WHERE m.class_id = c.id) AS members_count,
-                (SELECT COUNT(*) FROM assignments a WHERE a.class_id = c.id) AS assignments_count,
-                (SELECT COUNT(*) FROM attempts t WHERE t.class_id = c.id) AS attempts_count,
-                0 AS xp_sum
-
-            FROM classes c
-            ORDER BY c.id DESC
-        """
-
-        try:
-            cur.execute(sql_with_xp)
-        except Exception:
-            # xp ustuni yo'q bo'lsa shu yerga tushadi
-            cur.execute(sql_no_xp)
-
+        cur = sql.execute(conn, _LIST_CLASSES)
         return _fetchall_dict(cur)
     finally:
         conn.close() 
@@ -164,27 +159,8 @@ def list_classes_admin() -> list[dict]:
 def create_class_web(name: str, group_id: int, teacher_id: int) -> int:
     conn = get_conn()
     try:
-        cur = conn.cursor()
-
-        if _is_postgres():
-            cur.execute(
-                """
-                INSERT INTO classes (name, group_id, teacher_id)
-                VALUES (%s, %s, %s)
-                RETURNING id
-                """,
-                (name, int(group_id), int(teacher_id)),
-            )
-            cid = int(cur.fetchone()[0])
-        else:
-            cur.execute(
-                """
-                INSERT INTO classes (name, group_id, teacher_id)
-                VALUES (?, ?, ?)
-                """,
-                (name, int(group_id), int(teacher_id)),
-            )
-            cid = int(cur.lastrowid)
+        cur = sql.execute(conn, _INSERT_CLASS, (name, int(group_id), int(teacher_id)))
+        cid = int(cur.fetchone()[0])
 
         conn.commit()
         return cid
@@ -194,12 +170,7 @@ def create_class_web(name: str, group_id: int, teacher_id: int) -> int:
 def get_active_assignment_by_id(aid: int) -> dict | None:
     conn = get_conn()
     try:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT * FROM assignments WHERE id=%s AND is_active=1" if _is_postgres()
-            else "SELECT * FROM assignments WHERE id=? AND is_active=1",
-            (int(aid),),
-        )
+        cur = sql.execute(conn, _ACTIVE_ASSIGNMENT_BY_ID, (int(aid),))
         row = cur.fetchone()
         if not row:
             return None
@@ -4,16 +4,12 @@ from fastapi import FastAPI, Request, HTTPException, Header
 from aiogram import Bot, Dispatcher
 from aiogram.types import Update
 
-from bot.storage.db import init_db
+from bot.storage.db import close_async_pool, init_db, open_async_pool
 from bot.handlers.teacher import router as teacher_router
 from bot.handlers.student import router as student_router
 from bot.services.announcer import announcer_loop
-
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from bot.services.classroom import (
-    list_classes, weekly_top3, week_start_date, mark_weekly_run_if_new
-)
+from bot.services.sender import get_scheduler
+from bot.services.weekly import weekly_job
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 if not BOT_TOKEN:
@@ -30,6 +26,8 @@ def check_admin(x_api_key: str | None):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 bot = Bot(BOT_TOKEN)
+# hamma chiquvchi xabarlar: per-chat / umumiy rate limit, 429 retry
+bot.session.middleware(get_scheduler())
 dp = Dispatcher()
 from bot.handlers.common import router as common_router
 
@@ -40,38 +38,10 @@ dp.include_router(student_router)
 app = FastAPI()
 
 
-async def weekly_job(bot: Bot):
-    tz = ZoneInfo("Asia/Samarkand")
-    while True:
-        now = datetime.now(tz)
-        if now.weekday() == 6 and now.hour == 21 and now.minute in (0, 1):
-            week_start = week_start_date(now)
-            week_end = now.strftime("%Y-%m-%d")
-
-            classes = list_classes()
-            for class_id, class_name, group_id in classes:
-                if not mark_weekly_run_if_new(class_id, week_start):
-                    continue
-
-                top = weekly_top3(class_id, days=7)
-                if not top:
-                    await bot.send_message(group_id, "🏁 Haftalik yakun: bu hafta ball yig‘ilmagan.")
-                    continue
-
-                lines = ["🏆 HAFTALIK TOP-3", f"📅 {week_start} — {week_end}", ""]
-                medals = ["🥇", "🥈", "🥉"]
-                for i, (_, name, xp) in enumerate(top):
-                    lines.append(f"{medals[i]} {name} — {int(xp)} XP")
-                await bot.send_message(group_id, "\n".join(lines))
-
-            await asyncio.sleep(120)
-        else:
-            await asyncio.sleep(30)
-
-
 @app.on_event("startup")
 async def on_startup():
     init_db()
+    await open_async_pool()
     asyncio.create_task(announcer_loop(bot, interval_sec=10))
     asyncio.create_task(weekly_job(bot))
 
@@ -79,6 +49,11 @@ async def on_startup():
         await bot.set_webhook(url=BASE_URL.rstrip("/") + WEBHOOK_PATH)
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await close_async_pool()
+
+
 @app.post(WEBHOOK_PATH)
 async def telegram_webhook(req: Request):
     try:
@@ -93,7 +68,7 @@ async def telegram_webhook(req: Request):
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "sender": get_scheduler().stats()}
 
 
 # -------------------------
@@ -1,14 +1,33 @@
+from core import sql
 from core.db import get_conn
-
-
-def list_users_with_metrics(q: str = "", sort: str = "last_login_desc") -> list[dict]:
-    q = (q or "").strip().lower()
-
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # NOTE: attempts va words join qilib aggregate qilamiz
-    sql = """
+from core.stats_repo_db import get_rollup_groups
+
+
+# =========================
+# USERS LIST (CTE + keyset pagination)
+# =========================
+# sort nomi -> tartiblash ustuni (hammasi DESC, tie-break: id DESC)
+USER_SORTS = {
+    "last_login_desc": "last_login_at",
+    "avg_pct_desc": "avg_pct",
+    "attempts_desc": "attempts_count",
+    "words_desc": "words_count",
+}
+
+# Har user uchun korrelyatsiyalangan subquery o‘rniga: bir marta GROUP BY qilingan CTE’lar + LEFT JOIN.
+# attempts soni / o‘rtacha foiz user_stats_rollup’dan (attempts jadvalini scan qilmaydi).
+_USERS_BASE = """
+WITH w AS (
+    SELECT user_id, COUNT(*) AS words_count
+    FROM words
+    GROUP BY user_id
+),
+s AS (
+    SELECT user_id, SUM(attempts) AS attempts_count, SUM(pct_sum) AS pct_sum
+    FROM user_stats_rollup
+    GROUP BY user_id
+),
+m AS (
     SELECT
         u.id,
         u.phone,
@@ -16,38 +35,73 @@ def list_users_with_metrics(q: str = "", sort: str = "last_login_desc") -> list[
         u.last_name,
         u.created_at,
         u.last_login_at,
-
-        (SELECT COUNT(*) FROM words w WHERE w.user_id = u.id) AS words_count,
-
-        (SELECT COUNT(*) FROM attempts a WHERE a.user_id = u.id) AS attempts_count,
-
-        (SELECT COALESCE(AVG(a.pct), 0) FROM attempts a WHERE a.user_id = u.id) AS avg_pct
+        COALESCE(w.words_count, 0) AS words_count,
+        COALESCE(s.attempts_count, 0) AS attempts_count,
+        CASE WHEN s.attempts_count > 0 THEN s.pct_sum / s.attempts_count ELSE 0 END AS avg_pct
     FROM users u
+    LEFT JOIN w ON w.user_id = u.id
+    LEFT JOIN s ON s.user_id = u.id
+    WHERE (? = ''
+           OR LOWER(u.phone) LIKE ? ESCAPE '\\'
+           OR LOWER(u.first_name) LIKE ? ESCAPE '\\'
+           OR LOWER(u.last_name) LIKE ? ESCAPE '\\')
+)
+SELECT * FROM m
+{keyset}
+ORDER BY {col} DESC, id DESC
+LIMIT ? OFFSET ?
+"""
+
+_USERS_PAGE = {
+    (sort, keyset): sql.define(
+        f"admin.users_page.{sort}{'.after' if keyset else ''}",
+        _USERS_BASE.format(col=col, keyset=f"WHERE ({col}, id) < (?, ?)" if keyset else ""),
+    )
+    for sort, col in USER_SORTS.items()
+    for keyset in (False, True)
+}
+
+
+def _like_pattern(q: str) -> str:
+    q = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{q}%"
+
+
+def _fetchall_dicts(cur) -> list[dict]:
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+
+def list_users_with_metrics(
+    q: str = "",
+    sort: str = "last_login_desc",
+    limit: int | None = None,
+    offset: int = 0,
+    after: tuple | None = None,
+) -> list[dict]:
     """
+    Userlar + metrikalar; qidiruv, tartib va LIMIT/OFFSET SQL ichida.
+    after: keyset cursor — oldingi sahifa oxirgi qatori uchun users_cursor(row, sort).
+    """
+    q = (q or "").strip().lower()
+    sort = sort if sort in USER_SORTS else "last_login_desc"
+    pattern = _like_pattern(q)
 
-    rows = [dict(r) for r in cur.execute(sql).fetchall()]
+    params: list = [q, pattern, pattern, pattern]
+    if after is not None:
+        params += [after[0], int(after[1])]
+    params += [2**31 - 1 if limit is None else int(limit), int(offset)]
+
+    conn = get_conn()
+    cur = sql.execute(conn, _USERS_PAGE[(sort, after is not None)], params)
+    rows = _fetchall_dicts(cur)
     conn.close()
+    return rows
 
-    # filter
-    if q:
-        rows = [
-            r for r in rows
-            if q in (r["phone"] or "").lower()
-            or q in (r["first_name"] or "").lower()
-            or q in (r["last_name"] or "").lower()
-        ]
-
-    # sort
-    if sort == "last_login_desc":
-        rows.sort(key=lambda x: (x["last_login_at"] or ""), reverse=True)
-    elif sort == "avg_pct_desc":
-        rows.sort(key=lambda x: float(x["avg_pct"] or 0), reverse=True)
-    elif sort == "attempts_desc":
-        rows.sort(key=lambda x: int(x["attempts_count"] or 0), reverse=True)
-    elif sort == "words_desc":
-        rows.sort(key=lambda x: int(x["words_count"] or 0), reverse=True)
 
-    return rows
+def users_cursor(row: dict, sort: str = "last_login_desc") -> tuple:
+    """Keyingi sahifa uchun keyset cursor: (tartiblash ustuni qiymati, id)."""
+    return (row[USER_SORTS.get(sort, "last_login_at")], int(row["id"]))
 
 
 def get_user_attempts(user_id: int, limit: int = 100) -> list[dict]:
@@ -68,39 +122,20 @@ def get_user_attempts(user_id: int, limit: int = 100) -> list[dict]:
 
 
 def get_user_attempts_summary(user_id: int) -> dict:
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # overall
-    overall = cur.execute(
-        """
-        SELECT
-            COUNT(*) attempts,
-            COALESCE(SUM(total),0) total_q,
-            COALESCE(SUM(score),0) correct_q,
-            COALESCE(AVG(pct),0) avg_pct
-        FROM attempts
-        WHERE user_id=?
-        """,
-        (int(user_id),),
-    ).fetchone()
-
-    # by mode
-    by_mode_rows = cur.execute(
-        """
-        SELECT mode,
-               COUNT(*) attempts,
-               COALESCE(SUM(total),0) total_q,
-               COALESCE(SUM(score),0) correct_q,
-               COALESCE(AVG(pct),0) avg_pct
-        FROM attempts
-        WHERE user_id=?
-        GROUP BY mode
-        """,
-        (int(user_id),),
-    ).fetchall()
-
-    conn.close()
-
-    by_mode = {r["mode"]: dict(r) for r in by_mode_rows}
-    return {"overall": dict(overall), "by_mode": by_mode}
\ No newline at end of file
+    # attempts’ni qayta aggregate qilmaymiz — user_stats_rollup’dan (O(guruhlar soni))
+    overall = {"attempts": 0, "total_q": 0, "correct_q": 0, "pct_sum": 0.0}
+    by_mode: dict = {}
+
+    for mode, _bucket, n, total_q, correct_q, pct_sum in get_rollup_groups(int(user_id)):
+        m = by_mode.setdefault(mode, {"mode": mode, "attempts": 0, "total_q": 0, "correct_q": 0, "pct_sum": 0.0})
+        for agg in (m, overall):
+            agg["attempts"] += int(n)
+            agg["total_q"] += int(total_q)
+            agg["correct_q"] += int(correct_q)
+            agg["pct_sum"] += float(pct_sum)
+
+    for agg in (overall, *by_mode.values()):
+        pct_sum = agg.pop("pct_sum")
+        agg["avg_pct"] = (pct_sum / agg["attempts"]) if agg["attempts"] else 0.0
+
+    return {"overall": overall, "by_mode": by_mode}
@@ -1,7 +1,6 @@
 # core/bot_admin_repo_db.py
 from __future__ import annotations
 
-import csv
 import json
 import random
 import sqlite3
@@ -11,7 +10,10 @@ from zoneinfo import ZoneInfo
 
 import pandas as pd
 
+from bot.services import leaderboard
 from bot.storage.db import init_db as bot_init_db
+from core.distractors import lexicon_index
+from core.lexicon import get_lexicon
 
 
 # =========================
@@ -90,40 +92,8 @@ def ensure_announcements_table(cur: sqlite3.Cursor) -> None:
 # CSV → QUIZ BUILDER
 # =========================
 def _load_pairs(limit: int = 5000) -> list[tuple[str, str]]:
-    path = _base_csv_path()
-    items: list[tuple[str, str]] = []
-    if not path.exists():
-        return items
-
-    with path.open("r", encoding="utf-8-sig", errors="ignore", newline="") as f:
-        reader = csv.DictReader(f)
-        if not reader.fieldnames:
-            return items
-
-        raw_fields = list(reader.fieldnames)
-        norm_fields = [x.strip().lower().replace("\ufeff", "") for x in raw_fields]
-
-        def pick(candidates: list[str]) -> str | None:
-            for c in candidates:
-                if c in norm_fields:
-                    return raw_fields[norm_fields.index(c)]
-            return None
-
-        en_col = pick(["en", "english", "word", "eng"])
-        uz_col = pick(["uz", "uzbek", "translation", "meaning", "tr", "uzb"])
-
-        if not en_col or not uz_col:
-            return items
-
-        for row in reader:
-            en = (row.get(en_col) or "").strip()
-            uz = (row.get(uz_col) or "").strip()
-            if en and uz:
-                items.append((en, uz))
-            if len(items) >= limit:
-                break
-
-    return items
+    # bot va web bilan umumiy core.lexicon snapshot’i (CSV har safar parse qilinmaydi)
+    return list(get_lexicon(_base_csv_path()).unique_pairs[:limit])
 
 
 def _split_uz(uz: str) -> list[str]:
@@ -139,11 +109,9 @@ def build_fixed_quiz_web(n: int, seed: int, k_options: int = 4) -> list[dict]:
     """
     rnd = random.Random(seed)
 
-    pairs = list({(en, uz) for en, uz in _load_pairs(limit=5000)})
-    rnd.shuffle(pairs)
-
-    questions = pairs[: max(0, int(n))]
-    all_uz = [uz for _, uz in pairs if uz]
+    pairs = _load_pairs(limit=5000)
+    questions = rnd.sample(pairs, min(max(0, int(n)), len(pairs)))
+    distractors = lexicon_index(get_lexicon(_base_csv_path()))
 
     payload: list[dict] = []
 
@@ -151,11 +119,8 @@ def build_fixed_quiz_web(n: int, seed: int, k_options: int = 4) -> list[dict]:
         translations = _split_uz(uz)
         correct = rnd.choice(translations) if translations else uz.strip()
 
-        synonyms = set(translations) if translations else {correct}
-        wrong_pool = list({u for u in all_uz if u and (u not in synonyms) and (u != correct)})
-
-        rnd.shuffle(wrong_pool)
-        opts = [correct] + wrong_pool[: max(0, int(k_options) - 1)]
+        wrong = distractors.sample(max(0, int(k_options) - 1), exclude=[uz, correct, *translations], rnd=rnd)
+        opts = [correct] + wrong
         rnd.shuffle(opts)
 
         payload.append({"en": en, "uz": uz, "options": opts})
@@ -206,18 +171,38 @@ def bot_kpis() -> dict:
 
 
 def list_classes() -> pd.DataFrame:
+    """
+    Classlar + hisoblagichlar. Har class uchun subquery o‘rniga: class_id bo‘yicha
+    bir marta GROUP BY qilingan CTE’lar + LEFT JOIN.
+    """
     q = """
+    WITH mem AS (
+        SELECT class_id, COUNT(*) AS members_count FROM members GROUP BY class_id
+    ),
+    asg AS (
+        SELECT class_id, COUNT(*) AS assignments_count FROM assignments GROUP BY class_id
+    ),
+    att AS (
+        SELECT class_id, COUNT(*) AS attempts_count FROM attempts GROUP BY class_id
+    ),
+    xp AS (
+        SELECT class_id, SUM(xp) AS xp_sum FROM xp_log GROUP BY class_id
+    )
     SELECT
         c.id,
         c.name,
         c.group_id,
         c.teacher_id,
         c.created_at,
-        (SELECT COUNT(*) FROM members m WHERE m.class_id = c.id) AS members_count,
-        (SELECT COUNT(*) FROM assignments a WHERE a.class_id = c.id) AS assignments_count,
-        (SELECT COUNT(*) FROM attempts t WHERE t.class_id = c.id) AS attempts_count,
-        (SELECT COALESCE(SUM(xp),0) FROM xp_log x WHERE x.class_id = c.id) AS xp_sum
+        COALESCE(mem.members_count, 0) AS members_count,
+        COALESCE(asg.assignments_count, 0) AS assignments_count,
+        COALESCE(att.attempts_count, 0) AS attempts_count,
+        COALESCE(xp.xp_sum, 0) AS xp_sum
     FROM classes c
+    LEFT JOIN mem ON mem.class_id = c.id
+    LEFT JOIN asg ON asg.class_id = c.id
+    LEFT JOIN att ON att.class_id = c.id
+    LEFT JOIN xp ON xp.class_id = c.id
     ORDER BY c.id DESC
     """
     conn = get_bot_conn()
@@ -228,6 +213,12 @@ def list_classes() -> pd.DataFrame:
 
 def list_assignments(class_id: int) -> pd.DataFrame:
     q = """
+    WITH t AS (
+        SELECT assignment_id, COUNT(*) AS attempts_count, AVG(pct) AS avg_pct
+        FROM attempts
+        WHERE class_id = ?
+        GROUP BY assignment_id
+    )
     SELECT
         a.id,
         a.class_id,
@@ -236,14 +227,15 @@ def list_assignments(class_id: int) -> pd.DataFrame:
         a.deadline_at,
         a.is_active,
         a.created_at,
-        (SELECT COUNT(*) FROM attempts t WHERE t.assignment_id = a.id) AS attempts_count,
-        (SELECT AVG(pct) FROM attempts t WHERE t.assignment_id = a.id) AS avg_pct
+        COALESCE(t.attempts_count, 0) AS attempts_count,
+        t.avg_pct
     FROM assignments a
+    LEFT JOIN t ON t.assignment_id = a.id
     WHERE a.class_id = ?
     ORDER BY a.id DESC
     """
     conn = get_bot_conn()
-    df = pd.read_sql_query(q, conn, params=(int(class_id),))
+    df = pd.read_sql_query(q, conn, params=(int(class_id), int(class_id)))
     conn.close()
     return df
 
@@ -270,42 +262,17 @@ def list_attempts(assignment_id: int) -> pd.DataFrame:
 
 
 def daily_top(class_id: int, limit: int = 10) -> pd.DataFrame:
-    q = """
-    SELECT
-        user_id,
-        full_name,
-        SUM(xp) AS xp
-    FROM xp_log
-    WHERE class_id = ?
-      AND date(created_at) = date('now','localtime')
-    GROUP BY user_id, full_name
-    ORDER BY xp DESC
-    LIMIT ?
-    """
-    conn = get_bot_conn()
-    df = pd.read_sql_query(q, conn, params=(int(class_id), int(limit)))
-    conn.close()
-    return df
+    # bot bilan bir xil manba: leaderboard.xp_buckets (bugungi bucket)
+    ensure_bot_db()
+    rows = leaderboard.top(int(class_id), leaderboard.DAY, limit=int(limit))
+    return pd.DataFrame(rows, columns=["user_id", "full_name", "xp"])
 
 
 def weekly_top(class_id: int, limit: int = 10) -> pd.DataFrame:
-    # haftani dushanbadan boshlab hisoblaymiz (SQLite trick)
-    q = """
-    SELECT
-        user_id,
-        full_name,
-        SUM(xp) AS xp
-    FROM xp_log
-    WHERE class_id = ?
-      AND date(created_at) >= date('now','weekday 1','-7 days','localtime')
-    GROUP BY user_id, full_name
-    ORDER BY xp DESC
-    LIMIT ?
-    """
-    conn = get_bot_conn()
-    df = pd.read_sql_query(q, conn, params=(int(class_id), int(limit)))
-    conn.close()
-    return df
+    # hafta dushanbadan (Asia/Samarkand)
+    ensure_bot_db()
+    rows = leaderboard.top(int(class_id), leaderboard.WEEK, limit=int(limit))
+    return pd.DataFrame(rows, columns=["user_id", "full_name", "xp"])
 
 
 # =========================
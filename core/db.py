@@ -1,9 +1,14 @@
 import os
 import sqlite3
+import threading
 from pathlib import Path
 from typing import Union
 from typing import TYPE_CHECKING, Any
 
+from core import migrations, sql
+from core.migrations import Migration
+from core.pool import ConnectionPool
+
 if TYPE_CHECKING:
     import psycopg
 
@@ -17,12 +22,18 @@ def _is_postgres() -> bool:
     return DATABASE_URL.startswith("postgres://") or DATABASE_URL.startswith("postgresql://")
 
 
-def get_conn() -> Any: 
-    """
-    Web DB connection.
-    - If DATABASE_URL set => Postgres (schema: web)
-    - Else => SQLite (data/app.db)
-    """
+# =========================
+# CONNECTION POOL
+# =========================
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+_POOL: ConnectionPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _connect() -> Any:
+    """Poolga yangi connection ochish (search_path / PRAGMA faqat shu yerda, bir marta)."""
     if _is_postgres():
         import psycopg
         conn = psycopg.connect(DATABASE_URL)
@@ -32,14 +43,112 @@ def get_conn() -> Any:
         conn.commit()
         return conn
 
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=sql.SQLITE_STATEMENT_CACHE)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 
+def _check(conn) -> None:
+    cur = conn.cursor()
+    cur.execute("SELECT 1")
+    cur.fetchone()
+    conn.rollback()
+
+
+def _reset(conn) -> None:
+    # poolga qaytayotganda commit qilinmagan ishlar keyingi userga o‘tmasin
+    if getattr(conn, "closed", False):
+        raise RuntimeError("connection closed")
+    if _is_postgres() or conn.in_transaction:
+        conn.rollback()
+
+
+def get_pool() -> ConnectionPool:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ConnectionPool(
+                    _connect,
+                    max_size=POOL_SIZE,
+                    timeout=POOL_TIMEOUT,
+                    check=_check,
+                    reset=_reset,
+                )
+    return _POOL
+
+
+def get_conn() -> Any:
+    """
+    Web DB connection (pooldan).
+    - If DATABASE_URL set => Postgres (schema: web)
+    - Else => SQLite (data/app.db)
+    conn.close() connectionni yopmaydi, poolga qaytaradi.
+    """
+    return get_pool().getconn()
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+# =========================
+# MIGRATIONS (schema_version)
+# =========================
+# user_stats_rollup kaliti: csv -> test_id, level -> level, qolganlari -> ''
+# (core.stats_repo_db._bucket Python’da aynan shuni hisoblaydi)
+ROLLUP_BUCKET_SQL = (
+    "CASE mode WHEN 'csv' THEN COALESCE(CAST(test_id AS TEXT), '') "
+    "WHEN 'level' THEN COALESCE(level, '') ELSE '' END"
+)
+
+# words: UNIQUE(user_id, en, uz) indexi "WHERE user_id=? ORDER BY en" ni o‘zi qoplaydi —
+# alohida index qo‘shilmaydi.
+MIGRATIONS = [
+    Migration(
+        1,
+        "attempts_user_mode_ts",
+        # get_stats_obj: WHERE user_id=? AND mode=? ORDER BY ts — jadvalga tegmasdan, faqat index’dan
+        migrations.index(
+            "idx_attempts_user_mode_ts",
+            "attempts",
+            ("user_id", "mode", "ts"),
+            include=("test_id", "level", "score", "total", "pct"),
+        ),
+    ),
+    Migration(
+        2,
+        "user_stats_rollup",
+        """
+        CREATE TABLE IF NOT EXISTS user_stats_rollup (
+            user_id BIGINT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            mode TEXT NOT NULL,
+            bucket TEXT NOT NULL DEFAULT '',
+            attempts BIGINT NOT NULL DEFAULT 0,
+            total_q BIGINT NOT NULL DEFAULT 0,
+            correct_q BIGINT NOT NULL DEFAULT 0,
+            pct_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, mode, bucket)
+        )
+        """,
+        # mavjud attempts’dan bir martalik to‘ldirish
+        "DELETE FROM user_stats_rollup",
+        "INSERT INTO user_stats_rollup (user_id, mode, bucket, attempts, total_q, correct_q, pct_sum) "
+        "SELECT user_id, mode, " + ROLLUP_BUCKET_SQL + ", COUNT(*), COALESCE(SUM(total),0), "
+        "COALESCE(SUM(score),0), COALESCE(SUM(pct),0) FROM attempts GROUP BY user_id, mode, 3",
+    ),
+    # words.level: CEFR darajasi upsert_word paytida yoziladi; eski qatorlar NULL qoladi
+    # va levels sahifasi ochilganda core.word_repo_db.fill_missing_levels bilan to‘ldiriladi
+    Migration(3, "words_level", migrations.add_column("words", "level", "TEXT")),
+]
+
+
 def init_db() -> None:
+    # ro‘yxatdagi nomlangan statementlarni ikkala dialect uchun oldindan tayyorlab qo‘yamiz
+    sql.compile_all()
+
     conn = get_conn()
 
     # --------- POSTGRES ----------
@@ -84,6 +193,7 @@ def init_db() -> None:
             """)
 
         conn.commit()
+        migrations.migrate(conn, MIGRATIONS)
         conn.close()
         return
 
@@ -128,4 +238,5 @@ def init_db() -> None:
     """)
 
     conn.commit()
-    conn.close()
\ No newline at end of file
+    migrations.migrate(conn, MIGRATIONS)
+    conn.close()
@@ -0,0 +1,105 @@
+# core/distractors.py
+"""
+Quiz uchun noto‘g‘ri variantlar (distractor) indeksi.
+
+Tarjimalar bir marta norm_uz bo‘yicha noyob massivga yig‘iladi (+ norm -> id map).
+Har savolda faqat k ta tasodifiy id tanlanadi (correct va uning sinonimlari
+chiqarib tashlanadi) — butun pool’ni filter/shuffle qilish shart emas.
+Indeks lug‘at versiyasi (Lexicon obyekti) yoki map obyekti bo‘yicha keshlanadi.
+"""
+from __future__ import annotations
+
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List
+
+from core.text import norm_uz
+
+
+class DistractorIndex:
+    __slots__ = ("items", "ids")
+
+    def __init__(self, strings: Iterable[str]):
+        items: List[str] = []
+        ids: dict[str, int] = {}
+        for s in strings:
+            s = str(s or "").strip()
+            if not s:
+                continue
+            key = norm_uz(s)
+            if key not in ids:
+                ids[key] = len(items)
+                items.append(s)
+        self.items = tuple(items)
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, k: int, exclude: Iterable[str] = (), rnd: Any = random) -> List[str]:
+        """
+        exclude’dagi (norm_uz bo‘yicha) tarjimalardan boshqa k ta noyob variant.
+        Kutilgan narx O(k + len(exclude)); pool kichik bo‘lsa — oddiy filter + sample.
+        """
+        n = len(self.items)
+        banned = {self.ids[key] for key in map(norm_uz, exclude) if key in self.ids}
+        k = min(int(k), n - len(banned))
+        if k <= 0:
+            return []
+
+        if 4 * k >= n - len(banned):
+            pool = [i for i in range(n) if i not in banned]
+            return [self.items[i] for i in rnd.sample(pool, k)]
+
+        # rejection sampling: banned + tanlanganlar pool’ning < 1/4 qismi => o‘rtacha < 1.34 urinish
+        seen = set(banned)
+        out: List[str] = []
+        while len(out) < k:
+            i = rnd.randrange(n)
+            if i not in seen:
+                seen.add(i)
+                out.append(self.items[i])
+        return out
+
+
+# =========================
+# CACHE
+# =========================
+_CACHE_SIZE = 8
+_CACHE: "OrderedDict[tuple, tuple[Any, DistractorIndex]]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def index_for(source: Any, strings: Callable[[], Iterable[str]]) -> DistractorIndex:
+    """
+    source obyekti uchun keshlangan indeks (kalit: id + len; obyektning o‘zi ham
+    saqlanadi, shuning uchun id qayta ishlatilmaydi). Lexicon o‘zgarmas — CSV
+    o‘zgarsa yangi Lexicon => yangi indeks.
+    Cheklov: joyida o‘zgartirilgan map (masalan uz_list’ga tarjima qo‘shilgan, len o‘sha)
+    aniqlanmaydi — o‘zgartirgandan keyin yangi dict bering (web sahifalar get_user_words_map()
+    bilan user_map’ni almashtiradi).
+    """
+    key = (id(source), len(source))
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None and hit[0] is source:
+            _CACHE.move_to_end(key)
+            return hit[1]
+    idx = DistractorIndex(strings())
+    with _LOCK:
+        _CACHE[key] = (source, idx)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return idx
+
+
+def lexicon_index(lex: Any) -> DistractorIndex:
+    """core.lexicon.Lexicon’ning barcha noyob uz tarjimalari bo‘yicha indeks."""
+    return index_for(lex, lambda: lex.uz_pool)
+
+
+def map_index(map_: dict) -> DistractorIndex:
+    """Web base_map/user_map ({key: {"en", "uz_list"}}) bo‘yicha indeks."""
+    return index_for(map_, lambda: (u for v in map_.values() for u in (v.get("uz_list") or [])))
@@ -0,0 +1,286 @@
+# core/lexicon.py
+"""
+5000_lugat_en_uz.csv lug‘atining yagona, o‘zgarmas (immutable) ko‘rinishi.
+
+CSV bir marta parse qilinib data/<csv nomi>.lexicon.pickle snapshot’iga yoziladi
+(kalit: snapshot versiyasi + fayl mtime/size + sha256). Keyingi ishga
+tushishlarda CSV qayta o‘qilmaydi; CSV o‘zgarsa snapshot avtomatik qayta
+quriladi. Process ichida bitta Lexicon obyekti web (core/csv_repo), bot
+(bot/services/quiz) va admin (core/bot_admin_repo_db) uchun umumiy.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from types import MappingProxyType
+
+from core.text import clean_header, norm_en, norm_uz
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BASE_CSV = PROJECT_ROOT / "5000_lugat_en_uz.csv"
+SNAPSHOT_DIR = PROJECT_ROOT / "data"
+
+# Lexicon tuzilishi yoki parse qoidalari o‘zgarsa — oshiring (eski snapshot’lar e’tiborsiz qoladi)
+SNAPSHOT_VERSION = 1
+
+EN_COLUMNS = ["en", "english", "word", "eng"]
+UZ_COLUMNS = ["uz", "uzbek", "translation", "meaning", "tr", "uzb", "tarjima"]
+
+
+class Lexicon:
+    """
+    Parse qilingan CSV (faqat o‘qish uchun). Lexicon.build() bilan yaratiladi.
+    pairs:        (en, uz) — en va uz bo‘sh bo‘lmagan qatorlar, fayl tartibida
+    unique_pairs: pairs’dan takrorlar olib tashlangan (tartib saqlanadi)
+    uz_pool:      noyob uz tarjimalar (tartib saqlanadi)
+    entries:      norm_en(en) -> (en, (uz, ...)) — web base_map uchun
+    """
+
+    __slots__ = ("signature", "en_col", "uz_col", "rows", "error", "pairs", "unique_pairs", "uz_pool", "entries")
+
+    def __init__(self, signature, en_col, uz_col, rows, error, pairs, unique_pairs, uz_pool, entries):
+        for name, value in zip(self.__slots__, (signature, en_col, uz_col, rows, error, pairs, unique_pairs, uz_pool)):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "entries", MappingProxyType(dict(entries)))
+
+    @classmethod
+    def build(
+        cls,
+        signature: tuple,
+        pairs: tuple[tuple[str, str], ...] = (),
+        *,
+        en_col: str | None = None,
+        uz_col: str | None = None,
+        rows: int = 0,
+        error: str | None = None,
+    ) -> "Lexicon":
+        entries: dict[str, tuple[str, list[str]]] = {}
+        for en, uz in pairs:
+            _, uz_list = entries.setdefault(norm_en(en), (en, []))
+            if all(norm_uz(uz) != norm_uz(x) for x in uz_list):
+                uz_list.append(uz)
+        return cls(
+            signature,
+            en_col,
+            uz_col,
+            int(rows),
+            error,
+            tuple(pairs),
+            tuple(dict.fromkeys(pairs)),
+            tuple(dict.fromkeys(uz for _, uz in pairs)),
+            {k: (en, tuple(uz)) for k, (en, uz) in entries.items()},
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Lexicon o‘zgarmas")
+
+    def __reduce__(self):
+        # hosilalar ham snapshot’da — yuklashda qayta hisoblanmaydi
+        fields = [getattr(self, n) for n in self.__slots__]
+        fields[-1] = dict(self.entries)
+        return Lexicon, tuple(fields)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def __repr__(self) -> str:
+        return f"Lexicon(pairs={len(self.pairs)}, entries={len(self.entries)}, ok={self.ok})"
+
+    def base_map(self) -> dict:
+        """Web uchun {norm_en: {"en": ..., "uz_list": [...]}} — har chaqiruvda yangi (o‘zgartirsa bo‘ladigan) nusxa."""
+        return {k: {"en": en, "uz_list": list(uz)} for k, (en, uz) in self.entries.items()}
+
+    def meta(self) -> dict:
+        return {"ok": self.ok, "rows": self.rows, "en_col": self.en_col, "uz_col": self.uz_col, "error": self.error}
+
+
+# =========================
+# CSV PARSE
+# =========================
+def _pick_column(fieldnames: list[str], candidates: list[str]) -> str | None:
+    cleaned = [clean_header(f) for f in fieldnames]
+    for c in candidates:
+        if c in cleaned:
+            return fieldnames[cleaned.index(c)]
+    return None
+
+
+def _detect_delimiter(sample: str) -> str:
+    # Sniffer’dan faqat delimiter olinadi: uning quoting taxmini iflos qatorlarni buzadi
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;").delimiter
+    except Exception:
+        return ","
+
+
+def _parse_csv(path: Path, signature: tuple) -> Lexicon:
+    # utf-8-sig BOM bo‘lsa ham tozalab beradi; delimiter (",", ";") bir marta aniqlanadi
+    with path.open("r", encoding="utf-8-sig", errors="ignore", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter=_detect_delimiter(sample))
+        fieldnames = list(reader.fieldnames or [])
+        en_col = _pick_column(fieldnames, EN_COLUMNS)
+        uz_col = _pick_column(fieldnames, UZ_COLUMNS)
+        if not en_col or not uz_col:
+            return Lexicon.build(signature, en_col=en_col, uz_col=uz_col, error=f"Ustun topilmadi. Fieldnames: {fieldnames}")
+
+        rows = 0
+        pairs: list[tuple[str, str]] = []
+        for row in reader:
+            rows += 1
+            en = (row.get(en_col) or "").strip()
+            uz = (row.get(uz_col) or "").strip()
+            if en and uz:
+                pairs.append((en, uz))
+
+    return Lexicon.build(signature, tuple(pairs), en_col=en_col, uz_col=uz_col, rows=rows)
+
+
+# =========================
+# SNAPSHOT
+# =========================
+# file_sha256 / read_snapshot / write_snapshot — boshqa pickle snapshot’lar uchun ham (ai/cefr/levels)
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def snapshot_path(csv_path: Path) -> Path:
+    return SNAPSHOT_DIR / f"{csv_path.stem}.lexicon.pickle"
+
+
+def read_snapshot(snap: Path) -> dict | None:
+    """Yaroqli snapshot dict’i; fayl yo‘q / buzuq / SNAPSHOT_VERSION boshqa bo‘lsa None."""
+    try:
+        with snap.open("rb") as f:
+            obj = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(obj, dict) or obj.get("version") != SNAPSHOT_VERSION:
+        return None
+    return obj
+
+
+def write_snapshot(snap: Path, obj: dict) -> None:
+    """Atomik yozish; read-only FS’da jimgina o‘tkazib yuboriladi."""
+    # atomik: tmp faylga yozib, keyin os.replace (parallel o‘quvchi yarim faylni ko‘rmaydi)
+    tmp = None
+    try:
+        snap.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=snap.parent, prefix=snap.name, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.chmod(tmp, 0o644)  # mkstemp 0600 beradi; bot va web boshqa user’da ishlashi mumkin
+        os.replace(tmp, snap)
+    except OSError:
+        # read-only FS (masalan, cloud) — snapshot’siz ham ishlayveradi
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def compile_lexicon(csv_path: Path, *, force: bool = False) -> Lexicon:
+    """
+    Snapshot yangi bo‘lsa — undan yuklaydi, aks holda CSV’ni parse qilib snapshot yozadi.
+    Tezkor tekshiruv mtime+size bo‘yicha; ular farq qilsa sha256 solishtiriladi
+    (fayl faqat "touch" qilingan bo‘lsa qayta parse qilinmaydi).
+    """
+    csv_path = Path(csv_path)
+    try:
+        stt = csv_path.stat()
+    except OSError:
+        return Lexicon.build(("missing", str(csv_path)), error=f"CSV topilmadi: {csv_path.resolve()}")
+
+    stat_key = (stt.st_mtime_ns, stt.st_size)
+    snap = snapshot_path(csv_path)
+    cached = None if force else read_snapshot(snap)
+    if cached is not None and cached.get("path") == str(csv_path.resolve()):
+        if cached["stat"] == stat_key:
+            return cached["lexicon"]
+        digest = file_sha256(csv_path)
+        if cached["sha256"] == digest:
+            write_snapshot(snap, {**cached, "stat": stat_key})
+            return cached["lexicon"]
+    else:
+        digest = file_sha256(csv_path)
+
+    try:
+        lex = _parse_csv(csv_path, (str(csv_path), digest))
+    except Exception as e:
+        return Lexicon.build((str(csv_path), digest), error=str(e))
+    if lex.ok:
+        write_snapshot(
+            snap,
+            {"version": SNAPSHOT_VERSION, "path": str(csv_path.resolve()), "stat": stat_key, "sha256": digest, "lexicon": lex},
+        )
+    return lex
+
+
+# =========================
+# PROCESS-WIDE INSTANCE
+# =========================
+_LOCK = threading.Lock()
+_LOADED: dict[str, tuple[tuple, Lexicon]] = {}
+_RESOLVED: dict[str, str] = {}  # nisbiy/absolut yo‘l -> bitta kalit (resolve() har chaqiruvda qimmat)
+
+
+def _stat_key(path: str):
+    try:
+        stt = os.stat(path)
+    except OSError:
+        return None
+    return (stt.st_mtime_ns, stt.st_size)
+
+
+def get_lexicon(csv_path: str | Path | None = None) -> Lexicon:
+    """
+    Process bo‘yicha umumiy Lexicon. Har chaqiruvda faqat os.stat() —
+    CSV o‘zgargan bo‘lsa snapshot qayta quriladi.
+    """
+    raw = os.fspath(csv_path if csv_path is not None else BASE_CSV)
+    key = _RESOLVED.get(raw)
+    if key is None:
+        key = _RESOLVED.setdefault(raw, str(Path(raw).resolve()))
+    stat_key = _stat_key(key)
+    hit = _LOADED.get(key)
+    if hit is not None and hit[0] == stat_key:
+        return hit[1]
+    with _LOCK:
+        hit = _LOADED.get(key)
+        if hit is not None and hit[0] == stat_key:
+            return hit[1]
+        lex = compile_lexicon(Path(key))
+        _LOADED[key] = (stat_key, lex)
+        return lex
+
+
+if __name__ == "__main__":
+    # python -m core.lexicon [--csv PATH] [--force]
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="Lug‘at CSV’ini snapshot’ga compile qilish")
+    ap.add_argument("--csv", default=str(BASE_CSV))
+    ap.add_argument("--force", action="store_true", help="snapshot yangi bo‘lsa ham qayta qurish")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    lex = compile_lexicon(Path(args.csv), force=args.force)
+    dt = (time.perf_counter() - t0) * 1000
+    print(f"{lex!r} rows={lex.rows} error={lex.error} ({dt:.1f} ms) -> {snapshot_path(Path(args.csv))}")
+    raise SystemExit(0 if lex.ok else 1)
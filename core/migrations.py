@@ -0,0 +1,154 @@
+# core/migrations.py
+"""
+Versiyalangan schema migratsiyalari (web va bot DB uchun umumiy runner).
+
+init_db() bazaviy jadvallarni yaratadi, keyin migrate(conn, MIGRATIONS) ni chaqiradi.
+Qo‘llangan versiyalar o‘sha bazaning (Postgres’da — o‘sha schema’ning)
+schema_version jadvalida turadi; har migratsiya alohida tranzaksiyada bajariladi.
+Steplar idempotent (IF NOT EXISTS, ustun faqat yo‘q bo‘lsa qo‘shiladi) —
+qo‘lda o‘zgartirilgan eski bazada ham qayta ishga tushirish xavfsiz.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, Union
+
+from core import sql
+
+Step = Union[str, Callable[[Any, str], None]]
+
+
+class Migration:
+    __slots__ = ("version", "name", "steps")
+
+    def __init__(self, version: int, name: str, *steps: Step):
+        self.version = int(version)
+        self.name = name
+        self.steps = steps
+
+    def __repr__(self) -> str:
+        return f"Migration({self.version}, {self.name!r})"
+
+
+# =========================
+# STEP HELPERS
+# =========================
+def index(
+    name: str,
+    table: str,
+    columns: Iterable[str],
+    *,
+    include: Iterable[str] = (),
+    where: str | None = None,
+) -> Step:
+    """
+    CREATE INDEX IF NOT EXISTS.
+    include: Postgres’da INCLUDE (...), SQLite’da kalit oxiriga qo‘shiladi — ikkalasida ham covering index.
+    """
+    columns, include = list(columns), list(include)
+
+    def step(conn: Any, dialect: str) -> None:
+        cols, tail = list(columns), ""
+        if include:
+            if dialect == sql.POSTGRES:
+                tail = f" INCLUDE ({', '.join(include)})"
+            else:
+                cols += include
+        q = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(cols)}){tail}"
+        if where:
+            q += f" WHERE {where}"
+        _exec(conn, q)
+
+    return step
+
+
+def add_column(table: str, column: str, sqlite_type: str, postgres_type: str | None = None) -> Step:
+    """Ustun yo‘q bo‘lsagina qo‘shadi (SQLite’da ADD COLUMN IF NOT EXISTS yo‘q)."""
+
+    def step(conn: Any, dialect: str) -> None:
+        if dialect == sql.POSTGRES:
+            _exec(conn, f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {postgres_type or sqlite_type}")
+            return
+        cur = conn.cursor()
+        cur.execute(f"PRAGMA table_info({table})")
+        if column not in {r[1] for r in cur.fetchall()}:
+            _exec(conn, f"ALTER TABLE {table} ADD COLUMN {column} {sqlite_type}")
+
+    return step
+
+
+# =========================
+# RUNNER
+# =========================
+_SCHEMA_VERSION_DDL = {
+    sql.SQLITE: """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    sql.POSTGRES: """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ DEFAULT NOW()
+    )
+    """,
+}
+
+_APPLIED = sql.define("migrations.applied", "SELECT version FROM schema_version ORDER BY version")
+_MARK_APPLIED = sql.define("migrations.mark_applied", "INSERT INTO schema_version (version, name) VALUES (?, ?)")
+
+
+def _exec(conn: Any, q: str) -> None:
+    cur = conn.cursor()
+    cur.execute(q)
+
+
+def _lock(conn: Any, dialect: str) -> None:
+    """
+    Tranzaksiya ochib, migratsiya lock’ini olish: bot va web (yoki bir nechta worker)
+    bir vaqtda init_db() qilsa, bitta versiyani faqat bittasi qo‘llaydi.
+    """
+    if dialect == sql.POSTGRES:
+        _exec(conn, "SELECT pg_advisory_xact_lock(hashtext(current_schema() || '.schema_version'))")
+    elif not conn.in_transaction:
+        _exec(conn, "BEGIN IMMEDIATE")
+
+
+def applied_versions(conn: Any) -> list[int]:
+    return [int(r[0]) for r in sql.execute(conn, _APPLIED).fetchall()]
+
+
+def migrate(conn: Any, migrations: Iterable[Migration]) -> list[int]:
+    """Hali qo‘llanmagan migratsiyalarni versiya tartibida bajaradi; qo‘llanganlar ro‘yxatini qaytaradi."""
+    dialect = sql.dialect_of(conn)
+    migrations = sorted(migrations, key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Migratsiya versiyalari takrorlangan: {versions}")
+
+    _lock(conn, dialect)
+    _exec(conn, _SCHEMA_VERSION_DDL[dialect])
+    conn.commit()
+
+    done: list[int] = []
+    for m in migrations:
+        _lock(conn, dialect)
+        # lock ichida qayta o‘qiymiz — boshqa process ulgurgan bo‘lishi mumkin
+        if m.version in applied_versions(conn):
+            conn.commit()
+            continue
+        try:
+            for step in m.steps:
+                if isinstance(step, str):
+                    _exec(conn, step)
+                else:
+                    step(conn, dialect)
+            sql.execute(conn, _MARK_APPLIED, (m.version, m.name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        done.append(m.version)
+    return done
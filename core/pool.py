@@ -0,0 +1,220 @@
+# core/pool.py
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+
+class PoolTimeout(RuntimeError):
+    """Pool to‘la va timeout ichida bo‘sh connection chiqmadi."""
+
+
+class PooledConnection:
+    """
+    Haqiqiy connection ustidagi yupqa o‘rovchi.
+    Repo kodi odatdagidek conn.cursor()/commit()/close() chaqiradi,
+    faqat close() connectionni yopmaydi — poolga qaytaradi.
+    """
+
+    __slots__ = ("raw", "_pool", "_released")
+
+    def __init__(self, raw: Any, pool: "ConnectionPool"):
+        self.raw = raw
+        self._pool = pool
+        self._released = False
+
+    def __getattr__(self, name: str) -> Any:
+        if name in PooledConnection.__slots__:
+            raise AttributeError(name)
+        return getattr(self.raw, name)
+
+    def close(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._pool.putconn(self.raw)
+
+    def discard(self) -> None:
+        """Buzilgan connectionni poolga qaytarmasdan yopish."""
+        if self._released:
+            return
+        self._released = True
+        self._pool.putconn(self.raw, discard=True)
+
+    def __del__(self):
+        # close() unutilgan bo‘lsa ham slot bo‘shab qolsin
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Oddiy, thread-safe, chegaralangan connection pool (SQLite va Postgres uchun bir xil).
+
+    - connect():  yangi tayyor connection qaytaradi (search_path / PRAGMA shu yerda, bir marta)
+    - check(conn): health-check; uzoq turgan connection qayta berilishidan oldin chaqiriladi
+    - reset(conn): poolga qaytishda yopilmagan tranzaksiyani tozalash
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        max_size: int = 5,
+        timeout: float = 10.0,
+        check: Callable[[Any], None] | None = None,
+        reset: Callable[[Any], None] | None = None,
+        check_after: float = 30.0,
+        max_idle: float = 600.0,
+    ):
+        self._connect = connect
+        self._check = check
+        self._reset = reset
+        self.max_size = max(1, int(max_size))
+        self.timeout = float(timeout)
+        self.check_after = float(check_after)
+        self.max_idle = float(max_idle)
+
+        self._cond = threading.Condition()
+        self._idle: list[tuple[Any, float]] = []  # (conn, qaytarilgan vaqt) — LIFO
+        self._size = 0
+        self._closed = False
+
+        self._stats = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "reused": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "health_failures": 0,
+        }
+
+    # -------------------------
+    # checkout / return
+    # -------------------------
+    def getconn(self) -> PooledConnection:
+        deadline = time.monotonic() + self.timeout
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool yopilgan")
+
+            while True:
+                if self._idle:
+                    raw, since = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    raw, since = None, 0.0
+                    break
+
+                self._stats["waits"] += 1
+                left = deadline - time.monotonic()
+                if left <= 0 or not self._cond.wait(left):
+                    if not self._idle and self._size >= self.max_size:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"{self.timeout:.1f}s ichida bo‘sh connection topilmadi (max_size={self.max_size})"
+                        )
+
+            self._stats["checkouts"] += 1
+
+        # tarmoq ishlari lock’dan tashqarida
+        if raw is not None:
+            raw = self._revalidate(raw, since)
+        if raw is None:
+            raw = self._open()
+        else:
+            with self._cond:
+                self._stats["reused"] += 1
+
+        return PooledConnection(raw, self)
+
+    def putconn(self, raw: Any, discard: bool = False) -> None:
+        if not discard and self._reset is not None:
+            try:
+                self._reset(raw)
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                self._stats["connections_closed"] += 1
+            else:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            self._cond.notify()
+
+        if raw is not None:
+            _safe_close(raw)
+
+    # -------------------------
+    # internals
+    # -------------------------
+    def _open(self) -> Any:
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return raw
+
+    def _revalidate(self, raw: Any, since: float) -> Any | None:
+        idle = time.monotonic() - since
+
+        if idle > self.max_idle:
+            _safe_close(raw)
+            with self._cond:
+                self._stats["connections_closed"] += 1
+            return None
+
+        if self._check is not None and idle > self.check_after:
+            try:
+                self._check(raw)
+            except Exception:
+                _safe_close(raw)
+                with self._cond:
+                    self._stats["health_failures"] += 1
+                    self._stats["connections_closed"] += 1
+                return None
+
+        return raw
+
+    # -------------------------
+    # public helpers
+    # -------------------------
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out["size"] = self._size
+            out["idle"] = len(self._idle)
+            out["in_use"] = self._size - len(self._idle)
+            out["max_size"] = self.max_size
+        return out
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._stats["connections_closed"] += len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            _safe_close(raw)
+
+
+def _safe_close(raw: Any) -> None:
+    try:
+        raw.close()
+    except Exception:
+        pass
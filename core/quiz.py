@@ -1,6 +1,7 @@
 import random
 from typing import Optional, List, Dict
 
+from core.distractors import map_index
 from core.text import norm_uz
 
 
@@ -22,10 +23,8 @@ def build_question_from_map(map_: dict, en_key: str) -> Dict:
     uz_list = item.get("uz_list") or []
     correct = random.choice(uz_list) if uz_list else "(tarjima yo‘q)"
 
-    pool = unique_all_uz(map_)
-    pool = [u for u in pool if norm_uz(u) != norm_uz(correct)]
-    random.shuffle(pool)
-    wrongs = pool[:3]
+    # indeks map uchun bir marta quriladi; savol boshiga faqat 3 ta tasodifiy tanlov
+    wrongs = map_index(map_).sample(3, exclude=[correct, *uz_list])
 
     fillers = ["velosiped", "samolyot", "poyezd", "telefon", "kitob", "daraxt", "stol", "qalam"]
     for f in fillers:
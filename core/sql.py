@@ -0,0 +1,132 @@
+# core/sql.py
+"""
+Nomlangan SQL statementlar registri (web va bot uchun umumiy).
+
+SQL bir marta "?" placeholder bilan yoziladi; kerak bo‘lsa dialect uchun
+alohida variant beriladi. Har statement har dialect uchun bir marta
+compile qilinadi va keshlanadi:
+- Postgres: "%s" placeholder + server-side prepared statement (prepare=True)
+- SQLite:   o‘zgarmas SQL matni => sqlite3 statement cache’dan foydalanadi
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Iterable
+
+SQLITE = "sqlite"
+POSTGRES = "postgres"
+DIALECTS = (SQLITE, POSTGRES)
+
+# pgbouncer (transaction mode) prepared statementlarni ko‘tarmaydi — DB_PREPARE=0 bilan o‘chiriladi
+PREPARE = os.getenv("DB_PREPARE", "1").strip() != "0"
+
+# sqlite3.connect(cached_statements=...) uchun
+SQLITE_STATEMENT_CACHE = 256
+
+
+class Statement:
+    __slots__ = ("name", "_src", "_compiled")
+
+    def __init__(self, name: str, sql: str, *, sqlite: str | None = None, postgres: str | None = None):
+        self.name = name
+        self._src = {SQLITE: sqlite or sql, POSTGRES: postgres or sql}
+        self._compiled: dict[str, str] = {}
+
+    def sql(self, dialect: str) -> str:
+        try:
+            return self._compiled[dialect]
+        except KeyError:
+            out = _compile(self._src[dialect], dialect)
+            self._compiled[dialect] = out
+            return out
+
+    def __repr__(self) -> str:
+        return f"Statement({self.name!r})"
+
+
+_REGISTRY: dict[str, Statement] = {}
+
+
+def define(name: str, sql: str, *, sqlite: str | None = None, postgres: str | None = None) -> Statement:
+    if name in _REGISTRY:
+        raise ValueError(f"SQL statement allaqachon bor: {name}")
+    st = Statement(name, sql, sqlite=sqlite, postgres=postgres)
+    _REGISTRY[name] = st
+    return st
+
+
+def get(name: str) -> Statement:
+    return _REGISTRY[name]
+
+
+def compile_all(dialects: Iterable[str] = DIALECTS) -> int:
+    """Startup’da: ro‘yxatdagi hamma statementlarni oldindan compile qilish."""
+    n = 0
+    for st in _REGISTRY.values():
+        for d in dialects:
+            st.sql(d)
+            n += 1
+    return n
+
+
+def _compile(sql: str, dialect: str) -> str:
+    sql = sql.strip()
+    if dialect != POSTGRES:
+        return sql
+
+    # "?" -> "%s", literal "%" -> "%%" (string literal ichidagi "?" ga tegmaymiz)
+    out = []
+    in_str = False
+    for ch in sql:
+        if ch == "'":
+            in_str = not in_str
+            out.append(ch)
+        elif ch == "%":
+            out.append("%%")
+        elif ch == "?" and not in_str:
+            out.append("%s")
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def dialect_of(conn: Any) -> str:
+    raw = getattr(conn, "raw", conn)  # pool wrapperlar haqiqiy connectionni .raw da saqlaydi
+    return POSTGRES if raw.__class__.__module__.startswith("psycopg") else SQLITE
+
+
+# =========================
+# EXECUTE
+# =========================
+def execute(conn: Any, stmt: Statement, params: Iterable[Any] = ()) -> Any:
+    d = dialect_of(conn)
+    cur = conn.cursor()
+    if d == POSTGRES:
+        cur.execute(stmt.sql(d), tuple(params), prepare=PREPARE)
+    else:
+        cur.execute(stmt.sql(d), tuple(params))
+    return cur
+
+
+def executemany(conn: Any, stmt: Statement, seq: Iterable[Iterable[Any]]) -> Any:
+    d = dialect_of(conn)
+    cur = conn.cursor()
+    cur.executemany(stmt.sql(d), [tuple(p) for p in seq])
+    return cur
+
+
+async def aexecute(conn: Any, stmt: Statement, params: Iterable[Any] = ()) -> Any:
+    d = dialect_of(conn)
+    if d == POSTGRES:
+        return await conn.execute(stmt.sql(d), tuple(params), prepare=PREPARE)
+    return await conn.execute(stmt.sql(d), tuple(params))
+
+
+async def aexecutemany(conn: Any, stmt: Statement, seq: Iterable[Iterable[Any]]) -> None:
+    d = dialect_of(conn)
+    rows = [tuple(p) for p in seq]
+    if d == POSTGRES:
+        async with conn.cursor() as cur:
+            await cur.executemany(stmt.sql(d), rows)
+        return
+    await conn.executemany(stmt.sql(d), rows)
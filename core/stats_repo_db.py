@@ -1,5 +1,104 @@
 from datetime import datetime
-from core.db import get_conn
+
+from core import sql
+from core.db import ROLLUP_BUCKET_SQL, get_conn
+
+_INSERT_ATTEMPT = sql.define(
+    "stats.insert_attempt",
+    """
+    INSERT INTO attempts (user_id, mode, test_id, level, score, total, pct, ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+)
+
+# =========================
+# ROLLUP (user_stats_rollup)
+# =========================
+# user × mode × bucket uchun bitta qator (bucket: core.db.ROLLUP_BUCKET_SQL).
+# add_attempt bilan bitta tranzaksiyada yangilanadi => aggregate o‘qish O(guruhlar soni).
+_ROLLUP_ADD = sql.define(
+    "stats.rollup_add",
+    """
+    INSERT INTO user_stats_rollup (user_id, mode, bucket, attempts, total_q, correct_q, pct_sum)
+    VALUES (?, ?, ?, 1, ?, ?, ?)
+    ON CONFLICT (user_id, mode, bucket) DO UPDATE SET
+        attempts = user_stats_rollup.attempts + 1,
+        total_q = user_stats_rollup.total_q + excluded.total_q,
+        correct_q = user_stats_rollup.correct_q + excluded.correct_q,
+        pct_sum = user_stats_rollup.pct_sum + excluded.pct_sum
+    """,
+)
+_ROLLUP_BY_USER = sql.define(
+    "stats.rollup_by_user",
+    "SELECT mode, bucket, attempts, total_q, correct_q, pct_sum FROM user_stats_rollup WHERE user_id=?",
+)
+_ROLLUP_ALL = sql.define(
+    "stats.rollup_all",
+    "SELECT user_id, mode, bucket, attempts, total_q, correct_q, pct_sum FROM user_stats_rollup",
+)
+
+_EXPECTED = (
+    "SELECT user_id, mode, " + ROLLUP_BUCKET_SQL + " AS bucket,"
+    " COUNT(*), COALESCE(SUM(total),0), COALESCE(SUM(score),0), COALESCE(SUM(pct),0)"
+    " FROM attempts {where} GROUP BY user_id, mode, 3"
+)
+_INSERT_ROLLUP = "INSERT INTO user_stats_rollup (user_id, mode, bucket, attempts, total_q, correct_q, pct_sum) "
+
+_ROLLUP_EXPECTED_ALL = sql.define("stats.rollup_expected_all", _EXPECTED.format(where=""))
+_ROLLUP_EXPECTED_USER = sql.define("stats.rollup_expected_user", _EXPECTED.format(where="WHERE user_id=?"))
+_ROLLUP_REBUILD_ALL = sql.define("stats.rollup_rebuild_all", _INSERT_ROLLUP + _EXPECTED.format(where=""))
+_ROLLUP_REBUILD_USER = sql.define("stats.rollup_rebuild_user", _INSERT_ROLLUP + _EXPECTED.format(where="WHERE user_id=?"))
+_ROLLUP_DELETE_ALL = sql.define("stats.rollup_delete_all", "DELETE FROM user_stats_rollup")
+_ROLLUP_DELETE_USER = sql.define("stats.rollup_delete_user", "DELETE FROM user_stats_rollup WHERE user_id=?")
+
+# =========================
+# HISTORY
+# =========================
+# To‘liq history: bitta scan (idx_attempts_user_mode_ts, mode+ts tartibida)
+_STATS_ROWS = sql.define(
+    "stats.rows",
+    """
+    SELECT mode, test_id, level, ts, score, total, pct
+    FROM attempts
+    WHERE user_id=?
+      AND (mode='manual'
+           OR (mode='csv' AND test_id IS NOT NULL)
+           OR (mode='level' AND level IS NOT NULL))
+    ORDER BY mode, ts
+    """,
+)
+
+# Cheklangan history: har mode uchun since’dan keyingi oxirgi N ta (index’dan ORDER BY ts DESC LIMIT)
+_HISTORY_TAIL = """
+    SELECT * FROM (
+        SELECT mode, test_id, level, ts, score, total, pct
+        FROM attempts
+        WHERE user_id=? AND mode='{mode}'{extra} AND ts >= ?
+        ORDER BY ts DESC
+        LIMIT ?
+    ) h_{mode}
+"""
+_STATS_TAIL = sql.define(
+    "stats.tail",
+    _HISTORY_TAIL.format(mode="manual", extra="")
+    + "UNION ALL"
+    + _HISTORY_TAIL.format(mode="csv", extra=" AND test_id IS NOT NULL")
+    + "UNION ALL"
+    + _HISTORY_TAIL.format(mode="level", extra=" AND level IS NOT NULL")
+    + "ORDER BY 1, 4",
+)
+
+# since berilmasa — cheklovsiz (ISO string ham, TIMESTAMPTZ ham undan katta)
+_SINCE_MIN = "0001-01-01"
+
+
+def _bucket(mode: str, test_id, level) -> str:
+    # ROLLUP_BUCKET_SQL bilan aynan bir xil bo‘lishi shart (rebuild/check shunga tayanadi)
+    if mode == "csv":
+        return "" if test_id is None else str(int(test_id))
+    if mode == "level":
+        return level or ""
+    return ""
 
 
 def add_attempt(user_id: int, mode: str, score: int, total: int, test_id: int | None = None, level: str | None = None) -> None:
@@ -7,87 +106,174 @@ def add_attempt(user_id: int, mode: str, score: int, total: int, test_id: int |
     ts = datetime.utcnow().isoformat(timespec="seconds") + "Z"
 
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO attempts (user_id, mode, test_id, level, score, total, pct, ts)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (user_id, mode, test_id, level, int(score), int(total), float(pct), ts),
-    )
-    conn.commit()
-    conn.close()
+    try:
+        sql.execute(
+            conn,
+            _INSERT_ATTEMPT,
+            (user_id, mode, test_id, level, int(score), int(total), float(pct), ts),
+        )
+        sql.execute(
+            conn,
+            _ROLLUP_ADD,
+            (user_id, mode, _bucket(mode, test_id, level), int(total), int(score), float(pct)),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _ts_str(ts) -> str:
+    # Postgres datetime qaytaradi, SQLite — saqlangan ISO string
+    if isinstance(ts, datetime):
+        return ts.isoformat(timespec="seconds").replace("+00:00", "Z")
+    return ts
+
+
+def _empty_agg() -> dict:
+    return {"attempts": 0, "total_q": 0, "correct_q": 0}
 
 
-def get_stats_obj(user_id: int) -> dict:
+def get_stats_obj(user_id: int, history_limit: int | None = None, since: str | None = None) -> dict:
+    """
+    User statistikasi: aggregate’lar rollup’dan (O(guruhlar)), history attempts’dan.
+    history_limit: har mode uchun oxirgi N ta history yozuvi (aggregate’lar baribir to‘liq)
+    since: history faqat shu vaqtdan (ISO, masalan "2026-01-01") keyin
+    """
+    manual = {"attempts": 0, "total_q": 0, "correct_q": 0, "history": []}
+    tests: dict = {}
+    by_level: dict = {}
+    man_h: list = manual["history"]
+    csv_h: list = []
+    lvl_h: list = []
+
     conn = get_conn()
-    cur = conn.cursor()
-
-    # ---------- MANUAL ----------
-    cur.execute(
-        "SELECT COUNT(*) a, COALESCE(SUM(total),0) t, COALESCE(SUM(score),0) c FROM attempts WHERE user_id=? AND mode='manual'",
-        (user_id,),
-    )
-    m = cur.fetchone()
-    manual = {"attempts": int(m["a"]), "total_q": int(m["t"]), "correct_q": int(m["c"]), "history": []}
-
-    cur.execute(
-        "SELECT ts, score, total, pct FROM attempts WHERE user_id=? AND mode='manual' ORDER BY ts",
-        (user_id,),
-    )
-    manual["history"] = [{"ts": r["ts"], "correct": int(r["score"]), "total": int(r["total"]), "pct": float(r["pct"])} for r in cur.fetchall()]
-
-    # ---------- CSV (tests aggregate) ----------
-    cur.execute(
-        """
-        SELECT test_id,
-               COUNT(*) attempts,
-               COALESCE(SUM(total),0) total_q,
-               COALESCE(SUM(score),0) correct_q
-        FROM attempts
-        WHERE user_id=? AND mode='csv' AND test_id IS NOT NULL
-        GROUP BY test_id
-        """,
-        (user_id,),
-    )
-    tests = {}
-    for r in cur.fetchall():
-        tid = int(r["test_id"])
-        tests[str(tid)] = {"attempts": int(r["attempts"]), "total_q": int(r["total_q"]), "correct_q": int(r["correct_q"])}
-
-    cur.execute(
-        "SELECT ts, test_id, score, total, pct FROM attempts WHERE user_id=? AND mode='csv' AND test_id IS NOT NULL ORDER BY ts",
-        (user_id,),
-    )
-    csv_hist = [{"ts": r["ts"], "test_id": int(r["test_id"]), "correct": int(r["score"]), "total": int(r["total"]), "pct": float(r["pct"])} for r in cur.fetchall()]
-
-    csv = {"tests": tests, "history": csv_hist}
-
-    # ---------- LEVEL ----------
-    cur.execute(
-        """
-        SELECT level,
-               COUNT(*) attempts,
-               COALESCE(SUM(total),0) total_q,
-               COALESCE(SUM(score),0) correct_q
-        FROM attempts
-        WHERE user_id=? AND mode='level' AND level IS NOT NULL
-        GROUP BY level
-        """,
-        (user_id,),
-    )
-    by_level = {}
-    for r in cur.fetchall():
-        lv = str(r["level"]).upper()
-        by_level[lv] = {"attempts": int(r["attempts"]), "total_q": int(r["total_q"]), "correct_q": int(r["correct_q"])}
-
-    cur.execute(
-        "SELECT ts, level, score, total, pct FROM attempts WHERE user_id=? AND mode='level' AND level IS NOT NULL ORDER BY ts",
-        (user_id,),
-    )
-    lvl_hist = [{"ts": r["ts"], "level": str(r["level"]).upper(), "correct": int(r["score"]), "total": int(r["total"]), "pct": float(r["pct"])} for r in cur.fetchall()]
-
-    level = {"by_level": by_level, "history": lvl_hist}
+    groups = sql.execute(conn, _ROLLUP_BY_USER, (user_id,)).fetchall()
+    if history_limit is None and since is None:
+        rows = sql.execute(conn, _STATS_ROWS, (user_id,)).fetchall()
+    else:
+        tail = (user_id, since or _SINCE_MIN, 2**31 - 1 if history_limit is None else max(0, int(history_limit)))
+        rows = sql.execute(conn, _STATS_TAIL, (*tail, *tail, *tail)).fetchall()
+    conn.close()
+
+    for mode, bucket, n, total_q, correct_q, _pct_sum in groups:
+        if mode == "manual":
+            agg = manual
+        elif mode == "csv" and bucket:
+            agg = tests.setdefault(bucket, _empty_agg())
+        elif mode == "level" and bucket:
+            agg = by_level.setdefault(bucket.upper(), _empty_agg())
+        else:
+            continue
+        agg["attempts"] += int(n)
+        agg["total_q"] += int(total_q)
+        agg["correct_q"] += int(correct_q)
 
+    for mode, test_id, level, ts, score, total, pct in rows:
+        if mode == "manual":
+            man_h.append({"ts": ts, "correct": score, "total": total, "pct": pct})
+        elif mode == "csv":
+            csv_h.append({"ts": ts, "test_id": test_id, "correct": score, "total": total, "pct": pct})
+        else:
+            lvl_h.append({"ts": ts, "level": level.upper(), "correct": score, "total": total, "pct": pct})
+
+    # Postgres: TIMESTAMPTZ -> ISO string (session_state/JSON uchun SQLite bilan bir xil ko‘rinish)
+    for hist in (man_h, csv_h, lvl_h):
+        if hist and isinstance(hist[0]["ts"], datetime):
+            for it in hist:
+                it["ts"] = _ts_str(it["ts"])
+
+    return {
+        "manual": manual,
+        "csv": {"tests": tests, "history": csv_h},
+        "level": {"by_level": by_level, "history": lvl_h},
+    }
+
+
+def get_rollup_groups(user_id: int) -> list[tuple]:
+    """[(mode, bucket, attempts, total_q, correct_q, pct_sum), ...]"""
+    conn = get_conn()
+    rows = sql.execute(conn, _ROLLUP_BY_USER, (int(user_id),)).fetchall()
     conn.close()
-    return {"manual": manual, "csv": csv, "level": level}
\ No newline at end of file
+    return [tuple(r) for r in rows]
+
+
+# =========================
+# REBUILD / CHECK
+# =========================
+def rebuild_rollup_in(conn, user_id: int | None = None) -> None:
+    """Rollup’ni attempts’dan qayta hisoblash (commit qilmaydi — chaqiruvchining tranzaksiyasida)."""
+    if user_id is None:
+        sql.execute(conn, _ROLLUP_DELETE_ALL)
+        sql.execute(conn, _ROLLUP_REBUILD_ALL)
+    else:
+        sql.execute(conn, _ROLLUP_DELETE_USER, (int(user_id),))
+        sql.execute(conn, _ROLLUP_REBUILD_USER, (int(user_id),))
+
+
+def rebuild_rollup(user_id: int | None = None) -> None:
+    conn = get_conn()
+    try:
+        # rebuild paytida yangi attempt yozilmasin, aks holda rollup darhol farq qilib qoladi
+        cur = conn.cursor()
+        if sql.dialect_of(conn) == sql.POSTGRES:
+            cur.execute("LOCK TABLE attempts IN SHARE MODE")
+        elif not conn.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+        rebuild_rollup_in(conn, user_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def check_rollup(user_id: int | None = None) -> list[dict]:
+    """Rollup vs attempts’dan qayta hisoblangan qiymatlar. Farq qilgan guruhlar ro‘yxati (bo‘sh = mos)."""
+    conn = get_conn()
+    try:
+        if user_id is None:
+            expected_rows = sql.execute(conn, _ROLLUP_EXPECTED_ALL).fetchall()
+            actual_rows = sql.execute(conn, _ROLLUP_ALL).fetchall()
+        else:
+            expected_rows = sql.execute(conn, _ROLLUP_EXPECTED_USER, (int(user_id),)).fetchall()
+            actual_rows = [(int(user_id), *r) for r in sql.execute(conn, _ROLLUP_BY_USER, (int(user_id),)).fetchall()]
+    finally:
+        conn.close()
+
+    def _as_map(rows) -> dict:
+        return {(int(r[0]), r[1], r[2]): (int(r[3]), int(r[4]), int(r[5]), float(r[6])) for r in rows}
+
+    expected, actual = _as_map(expected_rows), _as_map(actual_rows)
+    diffs = []
+    for key in sorted(set(expected) | set(actual)):
+        e, a = expected.get(key), actual.get(key)
+        if e is not None and a is not None and e[:3] == a[:3] and abs(e[3] - a[3]) < 1e-6 * max(1.0, e[0]):
+            continue
+        diffs.append({"user_id": key[0], "mode": key[1], "bucket": key[2], "expected": e, "actual": a})
+    return diffs
+
+
+if __name__ == "__main__":
+    # python -m core.stats_repo_db check [--user-id N]
+    # python -m core.stats_repo_db rebuild [--user-id N]
+    import argparse
+
+    from core.db import init_db
+
+    ap = argparse.ArgumentParser(description="user_stats_rollup: attempts bilan solishtirish / qayta qurish")
+    ap.add_argument("command", choices=["check", "rebuild"])
+    ap.add_argument("--user-id", type=int, default=None)
+    args = ap.parse_args()
+
+    init_db()
+    if args.command == "rebuild":
+        rebuild_rollup(args.user_id)
+    diffs = check_rollup(args.user_id)
+    for d in diffs[:50]:
+        print(d)
+    print(f"{len(diffs)} ta farq" if diffs else "rollup OK")
+    raise SystemExit(1 if diffs else 0)
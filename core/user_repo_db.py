@@ -1,23 +1,31 @@
 from __future__ import annotations
 
 from datetime import datetime
+from core import sql
 from core.db import get_conn
 
 
 # -------------------------
-# Helpers
+# SQL
 # -------------------------
-def _is_postgres(conn) -> bool:
-    # psycopg connection: module name odatda "psycopg" bo‘ladi
-    mod = conn.__class__.__module__.lower()
-    return "psycopg" in mod or "psycopg2" in mod
-
-
-def _ph(conn) -> str:
-    # placeholder: postgres -> %s, sqlite -> ?
-    return "%s" if _is_postgres(conn) else "?"
+# Universal upsert (SQLite >= 3.24 va Postgres’da bor)
+_UPSERT_USER = sql.define(
+    "user_repo.upsert_user",
+    """
+    INSERT INTO users (phone, first_name, last_name, created_at, last_login_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(phone) DO UPDATE SET
+        first_name = excluded.first_name,
+        last_name = excluded.last_name,
+        last_login_at = excluded.last_login_at
+    """,
+)
+_USER_BY_PHONE = sql.define("user_repo.user_by_phone", "SELECT * FROM users WHERE phone = ?")
 
 
+# -------------------------
+# Helpers
+# -------------------------
 def _row_to_dict(cur, row):
     """
     sqlite: row_factory=sqlite3.Row bo‘lsa dict(row) ishlaydi
@@ -40,24 +48,11 @@ def upsert_user(first_name: str, last_name: str, phone: str) -> dict:
     now = datetime.utcnow().isoformat(timespec="seconds") + "Z"
 
     conn = get_conn()
-    cur = conn.cursor()
-    p = _ph(conn)
-
-    # Universal upsert (SQLite >= 3.24 va Postgres’da bor)
-    sql = f"""
-    INSERT INTO users (phone, first_name, last_name, created_at, last_login_at)
-    VALUES ({p}, {p}, {p}, {p}, {p})
-    ON CONFLICT(phone) DO UPDATE SET
-        first_name = excluded.first_name,
-        last_name = excluded.last_name,
-        last_login_at = excluded.last_login_at
-    """
-
-    cur.execute(sql, (phone, first_name, last_name, now, now))
+    sql.execute(conn, _UPSERT_USER, (phone, first_name, last_name, now, now))
     conn.commit()
 
     # Qayta o‘qib dict qilib qaytaramiz (ham sqlite, ham postgres)
-    cur.execute(f"SELECT * FROM users WHERE phone = {p}", (phone,))
+    cur = sql.execute(conn, _USER_BY_PHONE, (phone,))
     u = _row_to_dict(cur, cur.fetchone())
 
     conn.close()
@@ -66,10 +61,7 @@ def upsert_user(first_name: str, last_name: str, phone: str) -> dict:
 
 def get_user_by_phone(phone: str):
     conn = get_conn()
-    cur = conn.cursor()
-    p = _ph(conn)
-
-    cur.execute(f"SELECT * FROM users WHERE phone = {p}", (phone,))
+    cur = sql.execute(conn, _USER_BY_PHONE, (phone,))
     row = cur.fetchone()
 
     data = _row_to_dict(cur, row)
@@ -1,41 +1,87 @@
+from core import sql
 from core.db import get_conn
 from core.text import norm_en, norm_uz
 
 
+# -------------------------
+# SQL
+# -------------------------
+_USER_WORDS = sql.define(
+    "word_repo.user_words",
+    "SELECT en, uz, level FROM words WHERE user_id=? ORDER BY en",
+)
+# level faqat NULL bo‘lsa yoziladi (mavjud tarjima qayta qo‘shilganda ham daraja to‘ladi)
+_INSERT_WORD = sql.define(
+    "word_repo.insert_word",
+    """
+    INSERT INTO words (user_id, en, uz, level) VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id, en, uz) DO UPDATE SET level = excluded.level
+    WHERE words.level IS NULL AND excluded.level IS NOT NULL
+    """,
+)
+_MISSING_LEVELS = sql.define(
+    "word_repo.missing_levels",
+    "SELECT DISTINCT en FROM words WHERE user_id=? AND level IS NULL",
+)
+_SET_LEVEL = sql.define(
+    "word_repo.set_level",
+    "UPDATE words SET level=? WHERE user_id=? AND en=? AND level IS NULL",
+)
+
+
+def _predict(words: list[str]) -> list[str] | None:
+    """CEFR darajalari; model yuklanmasa None (so‘z baribir saqlanadi, daraja keyin to‘ldiriladi)."""
+    try:
+        from ai.cefr.levels import predict_levels
+
+        return predict_levels(words)
+    except Exception:
+        return None
+
+
 def get_user_words_map(user_id: int) -> dict:
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT en, uz FROM words WHERE user_id=? ORDER BY en", (user_id,))
-    rows = cur.fetchall()
+    rows = sql.execute(conn, _USER_WORDS, (user_id,)).fetchall()
     conn.close()
 
     mp = {}
-    for r in rows:
-        en = r["en"]
-        uz = r["uz"]
+    for en, uz, level in rows:
         k = norm_en(en)
-        mp.setdefault(k, {"en": en, "uz_list": []})
+        item = mp.setdefault(k, {"en": en, "uz_list": [], "level": level})
+        if item["level"] is None:
+            item["level"] = level
         # dedupe norm
-        if all(norm_uz(uz) != norm_uz(x) for x in mp[k]["uz_list"]):
-            mp[k]["uz_list"].append(uz)
+        if all(norm_uz(uz) != norm_uz(x) for x in item["uz_list"]):
+            item["uz_list"].append(uz)
     return mp
 
 
-
 def upsert_word(user_id: int, en: str, uz_list: list[str]) -> None:
-    """Berilgan en uchun uz_list ni DBda UNIQUE bilan saqlaydi."""
-    conn = get_conn()
-    cur = conn.cursor()
-
+    """Berilgan en uchun uz_list ni DBda UNIQUE bilan saqlaydi (CEFR darajasi bilan birga)."""
     en = en.strip()
-    for uz in uz_list:
-        uz = uz.strip()
-        if not en or not uz:
-            continue
-        cur.execute(
-            "INSERT OR IGNORE INTO words (user_id, en, uz) VALUES (?, ?, ?)",
-            (user_id, en, uz),
-        )
+    uz_list = [uz.strip() for uz in uz_list if uz.strip()]
+    if not en or not uz_list:
+        return
 
+    level = (_predict([en]) or [None])[0]
+    conn = get_conn()
+    sql.executemany(conn, _INSERT_WORD, [(user_id, en, uz, level) for uz in uz_list])
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+
+def fill_missing_levels(user_id: int) -> int:
+    """Darajasi yo‘q (migratsiyadan oldingi) so‘zlarga bitta batch predict; yangilangan so‘zlar soni."""
+    conn = get_conn()
+    try:
+        words = [r[0] for r in sql.execute(conn, _MISSING_LEVELS, (user_id,)).fetchall()]
+        if not words:
+            return 0
+        levels = _predict(words)
+        if levels is None:
+            return 0
+        sql.executemany(conn, _SET_LEVEL, [(lv, user_id, en) for en, lv in zip(words, levels)])
+        conn.commit()
+        return len(words)
+    finally:
+        conn.close()
@@ -10,10 +10,10 @@ from typing import Optional, List
 from datetime import datetime
 
 # ✅ NEW imports
-from gtts import gTTS
-import io
 import base64
 
+from services import tts_store
+
 # ✅ 3) SAVE PATCH: DB repo import
 from core.word_repo_db import upsert_word, get_user_words_map
 
@@ -48,16 +48,9 @@ if "pron_play" not in st.session_state:
     st.session_state.pron_play = False
 
 
-# ✅ NEW: cached TTS bytes
-@st.cache_data(show_spinner=False)
+# ✅ TTS bytes: diskdagi audio store (restartdan keyin ham saqlanadi), yo‘q bo‘lsa gTTS
 def tts_mp3_bytes(word: str) -> bytes:
-    word = (word or "").strip()
-    if not word:
-        return b""
-    tts = gTTS(text=word, lang="en")
-    fp = io.BytesIO()
-    tts.write_to_fp(fp)
-    return fp.getvalue()
+    return tts_store.get_mp3(word, lang="en")
 
 
 # ---------------------------
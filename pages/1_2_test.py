@@ -133,8 +133,15 @@ elif st.session_state.quiz_page == "run":
         elif lvl_src == "Faqat CSV":
             source_map = st.session_state.base_map
         else:
-            # Hammasi: ikkalasini birlashtiramiz
-            source_map = {**st.session_state.base_map, **st.session_state.user_map}
+            # Hammasi: ikkalasini birlashtiramiz (bir marta — distractor indeksi shu map bo‘yicha keshlanadi).
+            # Manba map’larning o‘zi saqlanadi: user_map get_user_words_map() bilan almashtirilsa
+            # (tarjima qo‘shilib len o‘zgarmasa ham) `is` taqqoslash buni ko‘radi, id qayta ishlatilmaydi.
+            base_m, user_m = st.session_state.base_map, st.session_state.user_map
+            src = st.session_state.get("level_all_map_src")
+            if src is None or src[0] is not base_m or src[1] is not user_m:
+                st.session_state.level_all_map_src = (base_m, user_m)
+                st.session_state.level_all_map = {**base_m, **user_m}
+            source_map = st.session_state.level_all_map
 
     else:
         source_map = st.session_state.base_map
@@ -5,12 +5,11 @@ import random
 from pages.student_core import (
     render_sidebar, ensure_state,
     inject_student_css, render_hero, render_top_nav,
-    QUESTIONS_PER_TEST, norm_en, start_quiz
+    QUESTIONS_PER_TEST, start_quiz
 )
 
-from ai.cefr.infer import load_model
-
-LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+from ai.cefr.levels import LEVELS, UNKNOWN, lexicon_levels, predict_levels
+from core.word_repo_db import fill_missing_levels, get_user_words_map
 from pages.student_core import require_login
 require_login()
 
@@ -25,17 +24,30 @@ st.markdown("### 📚 AI: So‘zlarni darajalarga ajratish (A1–C2)")
 st.caption("Eslatma: darajalar AI taxminiga asoslanadi (MVP).")
 
 # -------------------------
-# Model
+# Darajalar (oldindan hisoblangan — bu yerda model.predict yo‘q)
 # -------------------------
-@st.cache_resource
-def get_model():
-    return load_model()
-
-model = get_model()
-
-@st.cache_data(show_spinner=False)
-def predict_batch(words_norm: list[str]) -> list[str]:
-    return model.predict(words_norm).tolist()
+try:
+    base_levels = lexicon_levels()
+except Exception as e:
+    st.error(f"CEFR modelini yuklab bo‘lmadi: {e}")
+    st.stop()
+
+def ensure_user_levels() -> None:
+    """Migratsiyadan oldin qo‘shilgan so‘zlarning darajasini bir marta to‘ldiradi."""
+    user_map = st.session_state.user_map
+    if all(v.get("level") for v in user_map.values()):
+        return
+    if st.session_state.get("user"):
+        uid = int(st.session_state.user["id"])
+        if fill_missing_levels(uid):
+            st.session_state.user_map = get_user_words_map(uid)
+            return
+    # DB’siz (JSON) user_map — joyida bir batch
+    missing = [k for k, v in user_map.items() if not v.get("level")]
+    for k, lv in zip(missing, predict_levels([user_map[k]["en"] for k in missing])):
+        user_map[k]["level"] = lv
+
+ensure_user_levels()
 
 # -------------------------
 # 1) Source tanlash (tepada)
@@ -43,24 +55,25 @@ def predict_batch(words_norm: list[str]) -> list[str]:
 source = st.selectbox("Qaysi bazadan?", ["Hammasi", "Faqat CSV", "Faqat user"], index=0)
 
 def pick_words_map(src: str) -> dict:
-    if src == "Faqat CSV":
-        return {k: v["en"] for k, v in st.session_state.base_map.items()}
+    """{key: (English, Level)}"""
+    base = st.session_state.base_map
     if src == "Faqat user":
-        return {k: v["en"] for k, v in st.session_state.user_map.items()}
-    # Hammasi
-    m = {k: v["en"] for k, v in st.session_state.base_map.items()}
-    for k, v in st.session_state.user_map.items():
-        m[k] = v["en"]
+        m = {}
+    else:
+        m = {k: (v["en"], base_levels.get(k, UNKNOWN)) for k, v in base.items()}
+    if src != "Faqat CSV":
+        for k, v in st.session_state.user_map.items():
+            m[k] = (v["en"], v.get("level") or UNKNOWN)
     return m
 
 picked_map = pick_words_map(source)
 
 keys = list(picked_map.keys())
-words = [picked_map[k] for k in keys]
-words_norm = [norm_en(w) for w in words]
-
-levels = predict_batch(words_norm) if words_norm else []
-df = pd.DataFrame({"key": keys, "English": words, "Level": levels})
+df = pd.DataFrame({
+    "key": keys,
+    "English": [picked_map[k][0] for k in keys],
+    "Level": [picked_map[k][1] for k in keys],
+})
 # -------------------------
 # 2) Summary (A1..C2 count)
 # -------------------------
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from core.db import init_db
+from core.db import init_db, pool_stats
 init_db()
 
 from core.bot_admin_repo_db import ensure_bot_db
@@ -8,10 +8,13 @@ ensure_bot_db()
 
 from core.admin_repo_db import (
     list_users_with_metrics,
+    users_cursor,
     get_user_attempts,
     get_user_attempts_summary,
 )
 
+from services.translation_cache import stats as translation_cache_stats
+
 from core.bot_admin_repo_db import (
     bot_kpis,
     list_classes,
@@ -131,11 +134,32 @@ st.markdown("</div>", unsafe_allow_html=True)
 # ---------------------------
 # LOAD USERS
 # ---------------------------
-rows = list_users_with_metrics(q=q, sort=sort)[: int(limit)]
+# keyset pagination: har sahifa boshlanadigan cursor’lar stack’i (filter o‘zgarsa — 1-sahifaga qaytamiz)
+page_key = (q.strip().lower(), sort, int(limit))
+if st.session_state.get("admin_users_page_key") != page_key:
+    st.session_state.admin_users_page_key = page_key
+    st.session_state.admin_users_cursors = [None]
+cursors = st.session_state.admin_users_cursors
+
+rows = list_users_with_metrics(q=q, sort=sort, limit=int(limit) + 1, after=cursors[-1])
+has_next = len(rows) > int(limit)
+rows = rows[: int(limit)]
 if not rows:
     st.info("Hech qanday foydalanuvchi topilmadi.")
     st.stop()
 
+n1, n2, n3 = st.columns([1, 1, 4])
+with n1:
+    if st.button("⬅️ Oldingi", use_container_width=True, disabled=len(cursors) <= 1):
+        cursors.pop()
+        st.rerun()
+with n2:
+    if st.button("Keyingi ➡️", use_container_width=True, disabled=not has_next):
+        cursors.append(users_cursor(rows[-1], sort))
+        st.rerun()
+with n3:
+    st.caption(f"Sahifa: {len(cursors)}")
+
 df = pd.DataFrame(rows)
 df["full_name"] = (df["first_name"].fillna("") + " " + df["last_name"].fillna("")).str.strip()
 df["avg_pct"] = df["avg_pct"].astype(float)
@@ -274,4 +298,28 @@ with tab_detail:
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+# ---------------------------
+# DB POOL (monitoring)
+# ---------------------------
+st.write("")
+with st.expander("🔌 DB connection pool", expanded=False):
+    ps = pool_stats()
+    p1, p2, p3, p4 = st.columns(4)
+    p1.metric("Ochiq connection", f"{ps['size']}/{ps['max_size']}")
+    p2.metric("Band", ps["in_use"])
+    p3.metric("Checkout", ps["checkouts"])
+    p4.metric("Qayta ishlatilgan", ps["reused"])
+    st.json(ps)
+
+with st.expander("🌐 Tarjima keshi", expanded=False):
+    ts = translation_cache_stats()
+    if ts["error"]:
+        st.warning(f"Kesh ishlamayapti (tarjimalar keshsiz): {ts['error']}")
+    t1, t2, t3, t4 = st.columns(4)
+    t1.metric("Hit ratio", f"{ts['hit_ratio'] * 100:.1f}%")
+    t2.metric("Hit / Miss", f"{ts['hits']} / {ts['misses']}")
+    t3.metric("Seed yozuvlar", ts["seed_entries"])
+    t4.metric("API yozuvlar", f"{ts['api_entries']}/{ts['max_api_entries']}")
+    st.json(ts)
+
 st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
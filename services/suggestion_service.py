@@ -1,15 +1,274 @@
-from typing import List
+import heapq
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
 from core.text import norm_en
 
+# contains-qidiruv uchun 1..3 harfli n-gram’lar
+_NGRAM = 3
+
+
+# fuzzy (SymSpell) sozlamalari
+FUZZY_MAX_DISTANCE = 2
+FUZZY_PREFIX_LENGTH = 7
+FUZZY_MIN_QUERY = 3  # 1-2 harfli so‘rovga fuzzy natija — shovqin
+
+
+def fuzzy_distance_for(q: str) -> int:
+    """Qisqa so‘rovda 2 ta xato — juda ko‘p tasodifiy moslik (va sekinroq lookup)."""
+    return 1 if len(q) <= 4 else FUZZY_MAX_DISTANCE
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Damerau-Levenshtein (optimal string alignment) masofasi, max_distance’dan
+    oshsa max_distance + 1 qaytaradi (diagonal band + erta chiqish).
+    """
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if abs(la - lb) > max_distance:
+        return max_distance + 1
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    big = max_distance + 1
+    prev2: List[int] = []
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        cur = [big] * (lb + 1)
+        cur[0] = i
+        lo, hi = max(1, i - max_distance), min(lb, i + max_distance)
+        row_min = cur[0] if lo == 1 else big
+        for j in range(lo, hi + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > max_distance:
+            return big
+        prev2, prev = prev, cur
+    return min(prev[lb], big)
+
+
+def _delete_levels(word: str, max_distance: int) -> List[set]:
+    """[{word}, {1 ta harf o‘chirilgan}, {2 ta}, ...] — max_distance gacha."""
+    levels = [{word}]
+    seen = {word}
+    for _ in range(max_distance):
+        nxt = set()
+        for w in levels[-1]:
+            if len(w) <= 1:
+                continue
+            for i in range(len(w)):
+                d = w[:i] + w[i + 1 :]
+                if d not in seen:
+                    seen.add(d)
+                    nxt.add(d)
+        levels.append(nxt)
+    return levels
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """word’dan 0..max_distance ta harf o‘chirib hosil bo‘ladigan barcha satrlar."""
+    return set().union(*_delete_levels(word, max_distance))
+
+
+class FuzzyIndex:
+    """
+    SymSpell uslubidagi deletion index: har so‘z prefiksining (prefix_length)
+    max_distance gacha o‘chirmalari -> so‘z pozitsiyalari. So‘rovda faqat
+    so‘rovning o‘chirmalari qidiriladi, nomzodlar edit_distance bilan tekshiriladi —
+    narx lug‘at hajmiga deyarli bog‘liq emas.
+    """
+
+    __slots__ = ("lower", "max_distance", "prefix_length", "deletes")
+
+    def __init__(self, lower: Sequence[str], max_distance: int = FUZZY_MAX_DISTANCE, prefix_length: int = FUZZY_PREFIX_LENGTH):
+        self.lower = lower
+        self.max_distance = int(max_distance)
+        self.prefix_length = int(prefix_length)
+
+        # qiymat: bitta pozitsiya (int) yoki ro‘yxat — 200k so‘zda xotirani ancha tejaydi
+        deletes: dict = {}
+        first: Dict[str, int] = {}
+        for pos, w in enumerate(lower):
+            if w in first:  # bir xil lowercase so‘z — birinchisi yetarli
+                continue
+            first[w] = pos
+            for d in _deletes(w[: self.prefix_length], self.max_distance):
+                v = deletes.get(d)
+                if v is None:
+                    deletes[d] = pos
+                elif isinstance(v, int):
+                    deletes[d] = [v, pos]
+                else:
+                    v.append(pos)
+        self.deletes = deletes
+
+    def lookup(self, query: str, limit: int = 16, max_distance: int | None = None) -> List[Tuple[int, int]]:
+        """[(pos, distance), ...] — masofa, uzunlik farqi, ro‘yxat tartibi bo‘yicha saralangan."""
+        q = query.lower()
+        md = self.max_distance if max_distance is None else min(int(max_distance), self.max_distance)
+        plen = self.prefix_length
+        lower, deletes = self.lower, self.deletes
+        seen = set()
+        found: List[Tuple[int, int, int]] = []
+        # masofa <= k bo‘lgan so‘z bilan umumiy kalit har ikki tomondan <= k ta o‘chirishda chiqadi:
+        # shuning uchun so‘rov o‘chirmalari daraja bo‘yicha, limit to‘lsa md kichrayadi
+        for level, keys in enumerate(_delete_levels(q[:plen], md)):
+            if level > md:
+                break
+            for key in keys:
+                v = deletes.get(key)
+                if v is None:
+                    continue
+                klen = len(key)
+                for pos in (v,) if isinstance(v, int) else v:
+                    if pos in seen:
+                        continue
+                    w = lower[pos]
+                    # so‘z tomonidan ham <= md ta o‘chirish bo‘lishi kerak; uzunlik farqi ham <= md
+                    if min(len(w), plen) - klen > md or abs(len(w) - len(q)) > md:
+                        continue
+                    seen.add(pos)
+                    dist = edit_distance(q, w, md)
+                    if dist <= md:
+                        found.append((dist, abs(len(w) - len(q)), pos))
+            if len(found) >= limit:
+                found.sort()
+                del found[limit:]
+                md = min(md, found[-1][0])
+        found.sort()
+        return [(pos, dist) for dist, _, pos in found[:limit]]
 
-def suggestions(query: str, english_list: List[str], limit: int = 16):
-    q = norm_en(query)
-    if not q:
-        return []
 
-    starts = [w for w in english_list if w.lower().startswith(q)]
-    if len(starts) >= limit:
-        return starts[:limit]
+class SuggestionIndex:
+    """
+    english_list uchun bir marta quriladigan indeks:
+    - prefix: lowercase so‘zlar saralangan massivi + bisect
+    - contains: n-gram -> pozitsiyalar (ro‘yxat tartibida) inverted index
+    - fuzzy: FuzzyIndex (birinchi kerak bo‘lganda quriladi)
+    Tartib: avval startswith, keyin contains (ikkalasi english_list tartibida),
+    joy qolsa — xato yozilgan so‘z uchun eng yaqin tuzatishlar.
+    """
 
-    contains = [w for w in english_list if q in w.lower() and w not in starts]
-    return (starts + contains)[:limit]
\ No newline at end of file
+    __slots__ = ("words", "lower", "sorted_keys", "sorted_pos", "in_order", "grams", "_fuzzy", "_fuzzy_lock")
+
+    def __init__(self, english_list: Sequence[str]):
+        self.words: Tuple[str, ...] = tuple(english_list)
+        self.lower: Tuple[str, ...] = tuple(w.lower() for w in self.words)
+
+        order = sorted(range(len(self.lower)), key=self.lower.__getitem__)
+        self.sorted_keys: List[str] = [self.lower[i] for i in order]
+        self.sorted_pos: List[int] = order
+        # english_list_from_map allaqachon lower bo‘yicha saralangan => prefix diapazoni tayyor tartibda
+        self.in_order = order == list(range(len(order)))
+
+        grams: Dict[str, List[int]] = {}
+        for pos, w in enumerate(self.lower):
+            seen = set()
+            for n in range(1, _NGRAM + 1):
+                for i in range(len(w) - n + 1):
+                    g = w[i : i + n]
+                    if g not in seen:
+                        seen.add(g)
+                        grams.setdefault(g, []).append(pos)
+        self.grams = grams
+        self._fuzzy: FuzzyIndex | None = None
+        self._fuzzy_lock = threading.Lock()
+
+    @property
+    def fuzzy(self) -> FuzzyIndex:
+        if self._fuzzy is None:
+            with self._fuzzy_lock:
+                if self._fuzzy is None:
+                    self._fuzzy = FuzzyIndex(self.lower)
+        return self._fuzzy
+
+    def _prefix(self, q: str, limit: int) -> List[int]:
+        lo = bisect_left(self.sorted_keys, q)
+        hi = bisect_left(self.sorted_keys, q + "\uffff", lo)
+        if self.in_order:
+            return self.sorted_pos[lo : min(hi, lo + limit)]
+        return heapq.nsmallest(limit, self.sorted_pos[lo:hi])
+
+    def _contains(self, q: str, limit: int) -> List[int]:
+        if len(q) <= _NGRAM:
+            postings = [self.grams.get(q, [])]
+        else:
+            postings = [self.grams.get(q[i : i + _NGRAM], []) for i in range(len(q) - _NGRAM + 1)]
+        # eng qisqa posting ro‘yxati nomzodlar; "q in w" tekshiruvi qolgan n-gram’larni ham qamraydi
+        shortest = min(postings, key=len)
+
+        out: List[int] = []
+        for pos in shortest:
+            w = self.lower[pos]
+            if q in w and not w.startswith(q):
+                out.append(pos)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def suggest(self, query: str, limit: int = 16) -> List[str]:
+        q = norm_en(query)
+        if not q or limit <= 0:
+            return []
+
+        found = self._prefix(q, limit)
+        if len(found) < limit:
+            found = found + self._contains(q, limit - len(found))
+        if len(found) < limit and len(q) >= FUZZY_MIN_QUERY:
+            taken = set(found)
+            for pos, _ in self.fuzzy.lookup(q, limit, max_distance=fuzzy_distance_for(q)):
+                if pos not in taken:
+                    found.append(pos)
+                    if len(found) >= limit:
+                        break
+        return [self.words[i] for i in found]
+
+
+# =========================
+# CACHE (process bo‘yicha)
+# =========================
+_CACHE_SIZE = 8  # turli lug‘atlar
+_SESSIONS = 256  # id -> indeks (har session’ning o‘z list obyekti)
+_BY_ID: "OrderedDict[tuple, tuple[list, SuggestionIndex]]" = OrderedDict()
+_BY_CONTENT: "OrderedDict[tuple, SuggestionIndex]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def get_index(english_list: Sequence[str]) -> SuggestionIndex:
+    """
+    Har session’da english_list alohida obyekt — tezkor yo‘l id+len bo‘yicha,
+    yangi obyektda esa tarkib bo‘yicha (bir xil lug‘at => bitta umumiy indeks).
+    """
+    key = (id(english_list), len(english_list))
+    hit = _BY_ID.get(key)
+    if hit is not None and hit[0] is english_list:
+        return hit[1]
+
+    content = tuple(english_list)
+    with _LOCK:
+        idx = _BY_CONTENT.get(content)
+        if idx is not None:
+            _BY_CONTENT.move_to_end(content)
+    if idx is None:
+        idx = SuggestionIndex(content)
+    with _LOCK:
+        _BY_CONTENT[content] = idx
+        _BY_ID[key] = (english_list, idx)
+        while len(_BY_CONTENT) > _CACHE_SIZE:
+            _BY_CONTENT.popitem(last=False)
+        while len(_BY_ID) > _SESSIONS:
+            _BY_ID.popitem(last=False)
+    return idx
+
+
+def suggestions(query: str, english_list: List[str], limit: int = 16):
+    return get_index(english_list).suggest(query, limit)
@@ -0,0 +1,391 @@
+# services/translation_cache.py
+"""
+Tarjimalar uchun doimiy (diskdagi) kesh: translate_mymemory HTTP so‘rovidan oldin tekshiriladi.
+
+- Alohida SQLite fayl (data/translation_cache.db) — app DB Postgres bo‘lsa ham lokal
+- Kalit: norm_en(matn) + langpair; API natijalari TTL bilan, hajm chegarasi — LRU
+- 5000_lugat_en_uz.csv va en_uz_polysemy_starter.csv’dan oldindan to‘ldiriladi
+  (seed yozuvlar muddatsiz va LRU’dan chiqarilmaydi; CSV o‘zgarsa qayta seed qilinadi)
+- hit/miss hisoblagichlari shu faylda saqlanadi => hit ratio redeploy’dan keyin ham ko‘rinadi;
+  get() faqat o‘qiydi — hit/miss va accessed_at process’da yig‘ilib, put()/evict()/stats() bilan
+  (yoki har FLUSH_EVERY lookup’da) bitta tranzaksiyada yoziladi
+- kesh ixtiyoriy: fayl ochilmasa / SQLite xato bersa — miss (yozish o‘tkazib yuboriladi), log’ga yoziladi
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List
+
+from core import migrations, sql
+from core.lexicon import PROJECT_ROOT, get_lexicon
+from core.migrations import Migration
+from core.text import norm_en
+
+CACHE_DB = Path(os.getenv("TRANSLATION_CACHE_DB", str(PROJECT_ROOT / "data" / "translation_cache.db")))
+POLYSEMY_CSV = PROJECT_ROOT / "en_uz_polysemy_starter.csv"
+
+TTL = float(os.getenv("TRANSLATION_CACHE_TTL_DAYS", "30")) * 86400
+EMPTY_TTL = 86400.0  # bo‘sh natija (API hech narsa topmadi) — 1 kun
+MAX_ROWS = int(os.getenv("TRANSLATION_CACHE_MAX_ROWS", "50000"))  # faqat API yozuvlari sanaladi
+EVICT_EVERY = 100  # har N ta yozuvdan keyin hajm tekshiriladi
+FLUSH_EVERY = 200  # shuncha lookup yig‘ilsa hit/miss + accessed_at yoziladi
+RETRY_AFTER = 60.0  # fayl ochilmasa shuncha soniya kesh o‘chiq (har so‘rovda qayta urinmaymiz)
+MAX_RESULTS = 10
+
+DEFAULT_LANGPAIR = "en|uz"
+
+MIGRATIONS = [
+    Migration(
+        1,
+        "translation_cache",
+        """
+        CREATE TABLE IF NOT EXISTS translations (
+            key TEXT NOT NULL,
+            langpair TEXT NOT NULL,
+            result_json TEXT NOT NULL,
+            source TEXT NOT NULL,           -- seed / api
+            expires_at REAL,                -- NULL => muddatsiz (seed)
+            accessed_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (key, langpair)
+        ) WITHOUT ROWID
+        """,
+        migrations.index("idx_translations_lru", "translations", ["source", "accessed_at"]),
+        """
+        CREATE TABLE IF NOT EXISTS cache_meta (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """,
+    ),
+]
+
+_GET = sql.define(
+    "tcache.get",
+    "SELECT result_json, expires_at FROM translations WHERE key=? AND langpair=?",
+)
+_TOUCH = sql.define(
+    "tcache.touch",
+    "UPDATE translations SET accessed_at=MAX(accessed_at, ?), hits=hits+? WHERE key=? AND langpair=?",
+)
+_PUT = sql.define(
+    "tcache.put",
+    """
+    INSERT INTO translations (key, langpair, result_json, source, expires_at, accessed_at)
+    VALUES (?, ?, ?, 'api', ?, ?)
+    ON CONFLICT (key, langpair) DO UPDATE SET
+        result_json = excluded.result_json,
+        expires_at = excluded.expires_at,
+        accessed_at = excluded.accessed_at
+    WHERE translations.source = 'api'
+    """,
+)
+_PUT_SEED = sql.define(
+    "tcache.put_seed",
+    """
+    INSERT INTO translations (key, langpair, result_json, source, expires_at, accessed_at)
+    VALUES (?, ?, ?, 'seed', NULL, ?)
+    ON CONFLICT (key, langpair) DO UPDATE SET
+        result_json = excluded.result_json, source = 'seed', expires_at = NULL
+    """,
+)
+_DELETE_SEED = sql.define("tcache.delete_seed", "DELETE FROM translations WHERE source='seed'")
+_DELETE_EXPIRED = sql.define(
+    "tcache.delete_expired",
+    "DELETE FROM translations WHERE source='api' AND expires_at < ?",
+)
+_COUNT_API = sql.define("tcache.count_api", "SELECT COUNT(*) FROM translations WHERE source='api'")
+_EVICT_LRU = sql.define(
+    "tcache.evict_lru",
+    """
+    DELETE FROM translations WHERE (key, langpair) IN (
+        SELECT key, langpair FROM translations WHERE source='api' ORDER BY accessed_at LIMIT ?
+    )
+    """,
+)
+_COUNTS = sql.define(
+    "tcache.counts",
+    "SELECT source, COUNT(*), COALESCE(SUM(hits), 0) FROM translations GROUP BY source",
+)
+_META_GET = sql.define("tcache.meta_get", "SELECT value FROM cache_meta WHERE name=?")
+_META_SET = sql.define(
+    "tcache.meta_set",
+    "INSERT INTO cache_meta (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+)
+_META_INCR = sql.define(
+    "tcache.meta_incr",
+    """
+    INSERT INTO cache_meta (name, value) VALUES (?, CAST(? AS TEXT))
+    ON CONFLICT (name) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + CAST(excluded.value AS INTEGER) AS TEXT)
+    """,
+)
+
+_ERRORS = (OSError, sqlite3.Error)
+
+
+class _Disabled(sqlite3.OperationalError):
+    """Oldingi ochish xatosidan keyin RETRY_AFTER oynasi — qayta log qilinmaydi."""
+
+
+_LOCK = threading.RLock()
+_CONN: sqlite3.Connection | None = None
+_BROKEN_UNTIL = 0.0
+_PUTS = 0
+_PROCESS = {"hits": 0, "misses": 0}
+# hali yozilmagan: (key, langpair) -> [accessed_at, hits]; hit/miss deltalari
+_PENDING_TOUCH: dict[tuple[str, str], list] = {}
+_PENDING_META = {"hits": 0, "misses": 0}
+
+
+# =========================
+# CONNECTION + SEED
+# =========================
+def _connect() -> sqlite3.Connection:
+    CACHE_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB, check_same_thread=False, cached_statements=sql.SQLITE_STATEMENT_CACHE)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        migrations.migrate(conn, MIGRATIONS)
+    except BaseException:
+        conn.close()  # har muvaffaqiyatsiz urinish file handle qoldirmasin
+        raise
+    return conn
+
+
+def _conn() -> sqlite3.Connection:
+    """Ochilmasa _ERRORS’dan biri; keyingi RETRY_AFTER soniya qayta urinmasdan o‘sha xato."""
+    global _CONN, _BROKEN_UNTIL
+    if _CONN is None:
+        with _LOCK:
+            if _CONN is None:
+                if time.monotonic() < _BROKEN_UNTIL:
+                    raise _Disabled(f"translation cache o‘chiq: {CACHE_DB}")
+                try:
+                    conn = _connect()
+                except _ERRORS:
+                    _BROKEN_UNTIL = time.monotonic() + RETRY_AFTER
+                    raise
+                try:
+                    _seed_if_changed(conn)
+                except BaseException as e:
+                    conn.close()
+                    if isinstance(e, _ERRORS):
+                        _BROKEN_UNTIL = time.monotonic() + RETRY_AFTER
+                    raise
+                _CONN = conn
+    return _CONN
+
+
+def _log_error(action: str, e: Exception) -> None:
+    if isinstance(e, _Disabled):
+        return
+    logging.warning("translation cache %s xatosi (%s): %s — keshsiz davom etamiz", action, CACHE_DB, e)
+
+
+def _flush(conn: sqlite3.Connection) -> None:
+    """Process’da yig‘ilgan accessed_at/hits va hit/miss hisoblagichlari — chaqiruvchi tranzaksiyasida."""
+    touches = [(at, n, key, lp) for (key, lp), (at, n) in _PENDING_TOUCH.items()]
+    meta = [(name, n) for name, n in _PENDING_META.items() if n]
+    if touches:
+        sql.executemany(conn, _TOUCH, touches)
+    if meta:
+        sql.executemany(conn, _META_INCR, meta)
+    _PENDING_TOUCH.clear()
+    for name in _PENDING_META:
+        _PENDING_META[name] = 0
+
+
+def _flush_safe() -> None:
+    try:
+        conn = _conn()
+        _flush(conn)
+        conn.commit()
+    except _ERRORS as e:
+        _log_error("flush", e)
+        _rollback()
+        # kesh ishlamasa yig‘ilganlar tashlanadi (har lookup’da qayta urinmaymiz)
+        _PENDING_TOUCH.clear()
+        for name in _PENDING_META:
+            _PENDING_META[name] = 0
+
+
+def _rollback() -> None:
+    if _CONN is not None:
+        try:
+            _CONN.rollback()
+        except sqlite3.Error:
+            pass
+
+
+def _file_sig(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return "missing"
+
+
+def _clean(items: Iterable[str]) -> List[str]:
+    out, seen = [], set()
+    for c in items:
+        c2 = " ".join(str(c).strip().split())
+        key = c2.lower()
+        if c2 and key not in seen:
+            seen.add(key)
+            out.append(c2)
+    return out[:MAX_RESULTS]
+
+
+def _seed_rows() -> dict:
+    """norm_en -> [uz, ...]: avval asosiy lug‘at, keyin polysemy starter ma’nolari."""
+    seeds: dict = {}
+    for key, (_en, uz_list) in get_lexicon().entries.items():
+        seeds.setdefault(key, []).extend(uz_list)
+    try:
+        with POLYSEMY_CSV.open("r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                en = norm_en(row.get("english") or "")
+                meanings = [m.strip() for m in (row.get("uzbek_meanings") or "").split("|")]
+                if en and any(meanings):
+                    seeds.setdefault(en, []).extend(meanings)
+    except OSError:
+        pass
+    return seeds
+
+
+def _seed_if_changed(conn: sqlite3.Connection) -> None:
+    lex = get_lexicon()
+    signature = f"{lex.signature[1]}:{_file_sig(POLYSEMY_CSV)}"
+    row = sql.execute(conn, _META_GET, ("seed_signature",)).fetchone()
+    if row is not None and row[0] == signature:
+        return
+
+    now = time.time()
+    rows = [
+        (key, DEFAULT_LANGPAIR, json.dumps(_clean(uz), ensure_ascii=False), now)
+        for key, uz in _seed_rows().items()
+        if _clean(uz)
+    ]
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        sql.execute(conn, _DELETE_SEED)
+        sql.executemany(conn, _PUT_SEED, rows)
+        sql.execute(conn, _META_SET, ("seed_signature", signature))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# =========================
+# PUBLIC API
+# =========================
+def get(text: str, langpair: str = DEFAULT_LANGPAIR) -> List[str] | None:
+    """Keshdagi natija yoki None (yo‘q / muddati o‘tgan / kesh ishlamayapti). DB’ga yozmaydi."""
+    key = norm_en(text)
+    if not key:
+        return None
+    now = time.time()
+    with _LOCK:
+        try:
+            row = sql.execute(_conn(), _GET, (key, langpair)).fetchone()
+            result = json.loads(row[0]) if row is not None and (row[1] is None or row[1] > now) else None
+        except (*_ERRORS, ValueError) as e:
+            _log_error("get", e)
+            result = None
+        name = "misses" if result is None else "hits"
+        _PROCESS[name] += 1
+        _PENDING_META[name] += 1
+        if result is not None:
+            touch = _PENDING_TOUCH.setdefault((key, langpair), [now, 0])
+            touch[0] = now
+            touch[1] += 1
+        if _PENDING_META["hits"] + _PENDING_META["misses"] >= FLUSH_EVERY:
+            _flush_safe()
+    return result
+
+
+def put(text: str, result: List[str], langpair: str = DEFAULT_LANGPAIR) -> None:
+    """API natijasini saqlash (seed yozuvni almashtirmaydi)."""
+    global _PUTS
+    key = norm_en(text)
+    if not key:
+        return
+    now = time.time()
+    result = _clean(result)
+    expires = now + (TTL if result else EMPTY_TTL)
+    with _LOCK:
+        try:
+            conn = _conn()
+            sql.execute(conn, _PUT, (key, langpair, json.dumps(result, ensure_ascii=False), expires, now))
+            _flush(conn)
+            conn.commit()
+        except _ERRORS as e:
+            _log_error("put", e)
+            _rollback()
+            return
+        _PUTS += 1
+        if _PUTS % EVICT_EVERY == 0:
+            evict(conn)
+
+
+def evict(conn: sqlite3.Connection | None = None) -> int:
+    """
+    Yig‘ilgan accessed_at/hit/miss’ni yozadi, so‘ng muddati o‘tganlarni va MAX_ROWS’dan ortiq
+    eng eski (LRU) API yozuvlarini o‘chiradi. Kesh ishlamasa 0.
+    """
+    with _LOCK:
+        try:
+            conn = conn or _conn()
+            _flush(conn)
+            removed = sql.execute(conn, _DELETE_EXPIRED, (time.time(),)).rowcount
+            excess = sql.execute(conn, _COUNT_API).fetchone()[0] - MAX_ROWS
+            if excess > 0:
+                removed += sql.execute(conn, _EVICT_LRU, (excess,)).rowcount
+            conn.commit()
+        except _ERRORS as e:
+            _log_error("evict", e)
+            _rollback()
+            return 0
+    return removed
+
+
+def stats() -> dict:
+    """Kesh ishlamasa — faqat process hisoblagichlari va "error"."""
+    counts, totals, error = {}, {"hits": 0, "misses": 0}, None
+    with _LOCK:
+        try:
+            conn = _conn()
+            _flush(conn)
+            conn.commit()
+            counts = {r[0]: (int(r[1]), int(r[2])) for r in sql.execute(conn, _COUNTS).fetchall()}
+            for name in ("hits", "misses"):
+                row = sql.execute(conn, _META_GET, (name,)).fetchone()
+                totals[name] = int(row[0]) if row else 0
+        except _ERRORS as e:
+            _log_error("stats", e)
+            _rollback()
+            error = str(e)
+    lookups = totals["hits"] + totals["misses"]
+    p_lookups = _PROCESS["hits"] + _PROCESS["misses"]
+    return {
+        "seed_entries": counts.get("seed", (0, 0))[0],
+        "api_entries": counts.get("api", (0, 0))[0],
+        "max_api_entries": MAX_ROWS,
+        "hits": totals["hits"],
+        "misses": totals["misses"],
+        "hit_ratio": totals["hits"] / lookups if lookups else 0.0,
+        "process_hits": _PROCESS["hits"],
+        "process_misses": _PROCESS["misses"],
+        "process_hit_ratio": _PROCESS["hits"] / p_lookups if p_lookups else 0.0,
+        "path": str(CACHE_DB),
+        "error": error,
+    }
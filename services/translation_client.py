@@ -0,0 +1,300 @@
+# services/translation_client.py
+"""
+MyMemory uchun translation client:
+- bitta umumiy keep-alive requests.Session (urllib3 pool, retry budget)
+- ThreadPoolExecutor bilan cheklangan parallel so‘rovlar (translate_many)
+- bir xil so‘z uchun bir vaqtda faqat bitta HTTP so‘rov (coalescing)
+- circuit breaker: provider ketma-ket xato/sekin bo‘lsa — vaqtincha lokal lug‘atdan javob
+Natijalar services.translation_cache orqali keshlanadi.
+
+    python -m services.translation_client words.txt     # fayldagi so‘zlar bilan keshni isitish
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.lexicon import get_lexicon
+from core.text import norm_en
+from services import translation_cache
+
+MYMEMORY_URL = os.getenv("MYMEMORY_URL", "https://api.mymemory.translated.net/get")
+MAX_WORKERS = int(os.getenv("TRANSLATION_MAX_WORKERS", "8"))
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "12"))
+RETRIES = int(os.getenv("TRANSLATION_RETRIES", "2"))
+
+BREAKER_FAILURES = int(os.getenv("TRANSLATION_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("TRANSLATION_BREAKER_RESET", "30"))
+SLOW_CALL = float(os.getenv("TRANSLATION_SLOW_CALL", "5"))  # bundan uzoq javob ham xato hisoblanadi
+
+
+class CircuitOpen(RuntimeError):
+    """Provider vaqtincha o‘chirilgan (breaker ochiq) va lokal lug‘atda ham topilmadi."""
+
+
+class CircuitBreaker:
+    """
+    closed -> (ketma-ket failure_threshold ta xato) -> open -> (reset_timeout) -> half_open
+    half_open’da bitta sinov so‘rov: muvaffaqiyatli bo‘lsa closed, aks holda yana open.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            st = self._state(time.monotonic())
+            if st == "closed":
+                return True
+            if st == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+def parse_mymemory(data: dict, limit: int = 10) -> List[str]:
+    candidates = []
+
+    main = (data.get("responseData") or {}).get("translatedText", "")
+    if main:
+        candidates.append(main)
+
+    for m in (data.get("matches") or []):
+        t = (m.get("translation") or "").strip()
+        if t:
+            candidates.append(t)
+
+    cleaned, seen = [], set()
+    for c in candidates:
+        c2 = " ".join(c.strip().split())
+        key = c2.lower()
+        if c2 and key not in seen:
+            seen.add(key)
+            cleaned.append(c2)
+
+    return cleaned[:limit]
+
+
+def local_translations(en_text: str) -> List[str]:
+    """Lokal lug‘at (5000_lugat_en_uz.csv) bo‘yicha tarjima — provider ishlamaganda."""
+    hit = get_lexicon().entries.get(norm_en(en_text))
+    return list(hit[1]) if hit else []
+
+
+class TranslationClient:
+    def __init__(
+        self,
+        url: str = MYMEMORY_URL,
+        *,
+        max_workers: int = MAX_WORKERS,
+        timeout: tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+        retries: int = RETRIES,
+        breaker: CircuitBreaker | None = None,
+        slow_call: float = SLOW_CALL,
+        use_cache: bool = True,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.slow_call = slow_call
+        self.use_cache = use_cache
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self._inflight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"http": 0, "coalesced": 0, "cache_hits": 0, "fallbacks": 0, "errors": 0, "cache_errors": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    # ---------- HTTP ----------
+    def _fetch(self, en_text: str, langpair: str) -> List[str]:
+        t0 = time.monotonic()
+        try:
+            self._count("http")
+            r = self.session.get(self.url, params={"q": en_text, "langpair": langpair}, timeout=self.timeout)
+            r.raise_for_status()
+            result = parse_mymemory(r.json())
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if time.monotonic() - t0 > self.slow_call:
+            # javob keldi, lekin juda sekin — breaker uchun xato sifatida sanaymiz
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return result
+
+    # kesh ixtiyoriy: uning xatosi miss / yozilmagan natija — breaker va lokal fallback’ni chetlab o‘tmaydi
+    def _cache_get(self, en_text: str, langpair: str) -> List[str] | None:
+        try:
+            return translation_cache.get(en_text, langpair)
+        except Exception:
+            self._count("cache_errors")
+            logging.exception("translation cache get xatosi")
+            return None
+
+    def _cache_put(self, en_text: str, result: List[str], langpair: str) -> None:
+        try:
+            translation_cache.put(en_text, result, langpair)
+        except Exception:
+            self._count("cache_errors")
+            logging.exception("translation cache put xatosi")
+
+    def _resolve(self, en_text: str, langpair: str) -> List[str]:
+        if self.breaker.allow():
+            try:
+                result = self._fetch(en_text, langpair)
+            except Exception:
+                self._count("errors")
+                local = local_translations(en_text)
+                if local:
+                    self._count("fallbacks")
+                    return local
+                raise
+            if self.use_cache:
+                self._cache_put(en_text, result, langpair)
+            return result
+
+        local = local_translations(en_text)
+        self._count("fallbacks")
+        if local:
+            return local
+        raise CircuitOpen("Tarjima xizmati vaqtincha ishlamayapti, keyinroq urinib ko‘ring")
+
+    # ---------- PUBLIC ----------
+    def submit(self, en_text: str, langpair: str = "en|uz") -> Future:
+        """Future[List[str]]; bir xil so‘z allaqachon so‘ralayotgan bo‘lsa — o‘sha Future qaytadi."""
+        en_text = en_text.strip()
+        done: Future = Future()
+        if not en_text:
+            done.set_result([])
+            return done
+
+        if self.use_cache:
+            cached = self._cache_get(en_text, langpair)
+            if cached is not None:
+                self._count("cache_hits")
+                done.set_result(cached)
+                return done
+
+        key = (norm_en(en_text), langpair)
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.stats["coalesced"] += 1
+                return fut
+            fut = self._executor.submit(self._resolve, en_text, langpair)
+            self._inflight[key] = fut
+
+        def _done(_f: Future, key=key) -> None:
+            with self._lock:
+                if self._inflight.get(key) is _f:
+                    del self._inflight[key]
+
+        fut.add_done_callback(_done)
+        return fut
+
+    def translate(self, en_text: str, langpair: str = "en|uz") -> List[str]:
+        return self.submit(en_text, langpair).result()
+
+    def translate_many(self, texts: Iterable[str], langpair: str = "en|uz") -> Dict[str, List[str] | Exception]:
+        """{matn: natija yoki Exception} — parallel (max_workers), takrorlar bitta so‘rov."""
+        futures = {t: self.submit(t, langpair) for t in texts}
+        out: Dict[str, List[str] | Exception] = {}
+        for t, fut in futures.items():
+            try:
+                out[t] = fut.result()
+            except Exception as e:
+                out[t] = e
+        return out
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+_CLIENT: TranslationClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> TranslationClient:
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = TranslationClient()
+    return _CLIENT
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description="So‘zlar ro‘yxati bilan tarjima keshini isitish")
+    ap.add_argument("file", help="har qatorda bitta inglizcha so‘z ('-' => stdin)")
+    ap.add_argument("--langpair", default="en|uz")
+    args = ap.parse_args()
+
+    src = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    words = [w.strip() for w in src if w.strip()]
+    client = get_client()
+    t0 = time.perf_counter()
+    res = client.translate_many(words, args.langpair)
+    errors = sum(isinstance(v, Exception) for v in res.values())
+    print(f"{len(res)} so‘z, {errors} xato, {time.perf_counter() - t0:.1f} s — {client.stats}, breaker={client.breaker.state}")
+    client.close()
@@ -1,40 +1,15 @@
-import requests
-import streamlit as st
+from services.translation_client import get_client
 
 
-@st.cache_data(show_spinner=False)
-def translate_mymemory(en_text: str):
+def translate_mymemory(en_text: str, langpair: str = "en|uz"):
+    """
+    Kesh -> (umumiy session, coalescing, circuit breaker) MyMemory -> lokal lug‘at.
+    Xato va lokal javob yo‘q bo‘lsa exception ko‘tariladi (sahifa xabar ko‘rsatadi).
+    """
     en_text = en_text.strip()
     if not en_text:
         return []
-
-    url = "https://api.mymemory.translated.net/get"
-    params = {"q": en_text, "langpair": "en|uz"}
-
-    r = requests.get(url, params=params, timeout=12)
-    r.raise_for_status()
-    data = r.json()
-
-    candidates = []
-
-    main = (data.get("responseData") or {}).get("translatedText", "")
-    if main:
-        candidates.append(main)
-
-    for m in (data.get("matches") or []):
-        t = (m.get("translation") or "").strip()
-        if t:
-            candidates.append(t)
-
-    cleaned, seen = [], set()
-    for c in candidates:
-        c2 = " ".join(c.strip().split())
-        key = c2.lower()
-        if c2 and key not in seen:
-            seen.add(key)
-            cleaned.append(c2)
-
-    return cleaned[:10]
+    return get_client().translate(en_text, langpair)
 
 
 def is_weird_translation(t: str) -> bool:
@@ -47,4 +22,4 @@ def is_weird_translation(t: str) -> bool:
         return True
     if "-" in s and len(s) > 18:
         return True
-    return False
\ No newline at end of file
+    return False
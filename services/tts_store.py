@@ -0,0 +1,191 @@
+# services/tts_store.py
+"""
+Talaffuz (gTTS) uchun diskdagi content-addressed audio store.
+
+- Fayl nomi: sha256(lang + norm_en(so‘z)) => data/tts/ab/abcdef....mp3
+- Hit: fayl to‘g‘ridan-to‘g‘ri o‘qiladi (tarmoq yo‘q), mtime LRU belgisi sifatida yangilanadi
+- Umumiy hajm TTS_CACHE_MAX_MB dan oshsa — eng eski (mtime) fayllar o‘chiriladi
+- Oldindan generatsiya (lug‘atdagi barcha so‘zlar, parallel):
+
+    python -m services.tts_store --workers 4
+    python -m services.tts_store --limit 200 --lang en
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable
+
+from core.lexicon import PROJECT_ROOT, get_lexicon
+from core.text import norm_en
+
+TTS_DIR = Path(os.getenv("TTS_CACHE_DIR", str(PROJECT_ROOT / "data" / "tts")))
+MAX_BYTES = int(float(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024)
+EVICT_EVERY = 50  # har N ta yangi fayldan keyin hajm tekshiriladi
+EVICT_TARGET = 0.9  # tozalashdan keyin chegaraning 90% gacha tushiriladi
+
+_LOCK = threading.Lock()
+_WRITES = 0
+
+
+def audio_path(word: str, lang: str = "en") -> Path:
+    digest = hashlib.sha256(f"{lang}\0{norm_en(word)}".encode("utf-8")).hexdigest()
+    return TTS_DIR / digest[:2] / f"{digest}.mp3"
+
+
+def _synthesize(word: str, lang: str) -> bytes:
+    from gtts import gTTS  # tarmoq kerak bo‘lgandagina import
+
+    fp = io.BytesIO()
+    gTTS(text=word, lang=lang).write_to_fp(fp)
+    return fp.getvalue()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def get_cached(word: str, lang: str = "en") -> bytes | None:
+    """Diskda bo‘lsa bytes, aks holda None (tarmoqqa chiqmaydi)."""
+    path = audio_path(word, lang)
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    try:
+        os.utime(path)  # LRU: oxirgi foydalanish
+    except OSError:
+        pass
+    return data
+
+
+def get_mp3(word: str, lang: str = "en") -> bytes:
+    """So‘z talaffuzi (mp3). Diskda bo‘lmasa gTTS bilan yaratib saqlaydi."""
+    global _WRITES
+    word = (word or "").strip()
+    if not word:
+        return b""
+    data = get_cached(word, lang)
+    if data is not None:
+        return data
+
+    data = _synthesize(word, lang)
+    if data:
+        try:
+            _write_atomic(audio_path(word, lang), data)
+        except OSError:
+            return data  # read-only FS — baribir javob beramiz
+        with _LOCK:
+            _WRITES += 1
+            check = _WRITES % EVICT_EVERY == 0
+        if check:
+            evict()
+    return data
+
+
+def _files() -> list[tuple[float, int, Path]]:
+    out = []
+    if not TTS_DIR.exists():
+        return out
+    for p in TTS_DIR.glob("*/*.mp3"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        out.append((st.st_mtime, st.st_size, p))
+    return out
+
+
+def usage() -> dict:
+    files = _files()
+    return {"files": len(files), "bytes": sum(f[1] for f in files), "max_bytes": MAX_BYTES, "path": str(TTS_DIR)}
+
+
+def evict(max_bytes: int | None = None) -> int:
+    """Hajm chegaradan oshsa eng eski fayllarni o‘chiradi; o‘chirilganlar soni."""
+    limit = MAX_BYTES if max_bytes is None else int(max_bytes)
+    files = _files()
+    total = sum(f[1] for f in files)
+    if total <= limit:
+        return 0
+    target = int(limit * EVICT_TARGET)
+    removed = 0
+    for _mtime, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def pregenerate(words: Iterable[str], lang: str = "en", workers: int = 4, progress=None) -> dict:
+    """So‘zlar uchun audio’ni parallel yaratish (bor fayllar o‘tkazib yuboriladi)."""
+    todo, seen = [], set()
+    stats = {"cached": 0, "created": 0, "failed": 0}
+    for w in words:
+        w = (w or "").strip()
+        key = norm_en(w)
+        if not w or key in seen:
+            continue
+        seen.add(key)
+        if audio_path(w, lang).exists():
+            stats["cached"] += 1
+        else:
+            todo.append(w)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tts") as ex:
+        futures = {ex.submit(get_mp3, w, lang): w for w in todo}
+        for i, fut in enumerate(as_completed(futures), 1):
+            try:
+                fut.result()
+                stats["created"] += 1
+            except Exception:
+                stats["failed"] += 1
+            if progress:
+                progress(i, len(todo))
+    evict()
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    ap = argparse.ArgumentParser(description="Lug‘atdagi so‘zlar talaffuzini oldindan yaratish")
+    ap.add_argument("--lang", default="en")
+    ap.add_argument("--workers", type=int, default=4, help="gTTS rate-limit’ga tushmaslik uchun ko‘p qilmang")
+    ap.add_argument("--limit", type=int, default=None)
+    args = ap.parse_args()
+
+    words = [en for en, _ in get_lexicon().entries.values()][: args.limit]
+
+    def _progress(i: int, n: int) -> None:
+        if i % 50 == 0 or i == n:
+            print(f"\r{i}/{n}", end="", file=sys.stderr, flush=True)
+
+    t0 = time.perf_counter()
+    res = pregenerate(words, args.lang, args.workers, _progress)
+    print(f"\n{res} — {time.perf_counter() - t0:.1f} s, {usage()}")
+    raise SystemExit(1 if res["failed"] else 0)